@@ -1,14 +1,31 @@
-from dash import html, dcc, Input, Output, State
+from dash import html, dcc, Input, Output, State, ALL
 from strategies.strategies_helpful_functions import (
     generate_all_strategy_cards,
     build_options_template,
 )
+from strategies.strategies_sweep import parse_param_values
 from strategies.strategies_constants import (
     df_input_parameters,
 )
 import dash_mantine_components as dmc
 
 
+def _param_input_props(param: str, input_type: str, with_ranges: bool):
+    """
+    Тип и подсказка поля параметра: int/float — числовые поля; в режиме диапазонов — текстовые:
+    кроме числа принимают диапазон перебора '5..50:5' или список '5, 10'.
+    """
+    dash_input_type = "text"
+    if input_type == "bool" or (input_type in ["int", "float"] and not with_ranges):
+        dash_input_type = "number"
+    placeholder = {
+        "int": f"{param}, e.g. 14" + (" or 5..50:5" if with_ranges else ""),
+        "float": f"{param}, e.g. 1.0" + (" or 1.0, 2.0" if with_ranges else ""),
+        "bool": f"{param}, 0 or 1",
+    }.get(input_type, param)
+    return dash_input_type, placeholder
+
+
 def register_callbacks(app):
 
     # Генерирует карточки стратегий
@@ -50,15 +67,19 @@ def register_callbacks(app):
         Output("indicator_inputs_ready", "data"),
         # Output('card_indicators_input', 'style'),
         Input("param_instances", "data"),
+        State({"type": "param_ranges", "indicator": ALL}, "checked"),
+        State({"type": "param_ranges", "indicator": ALL}, "id"),
         State("stored_inputs", "data"),
         prevent_initial_call=False,  # важно, чтобы карточка могла появиться сразу
     )
-    def generate_indicator_inputs(param_instances, stored_data):
+    def generate_indicator_inputs(param_instances, ranges_checked, ranges_ids, stored_data):
         # Нет выбранных индикаторов / нет счётчиков — нечего рисовать
         if not param_instances:
             return [], {"display": "none"}
 
         stored_data = stored_data or {}
+        # Индикаторы с включённым переключателем Ranges: их int/float-поля принимают диапазоны
+        ranges_on = {i["indicator"] for i, checked in zip(ranges_ids or [], ranges_checked or []) if checked}
         all_cards = []
         has_any_input = False  # флаг: есть ли хотя бы одно поле ввода
 
@@ -70,8 +91,20 @@ def register_callbacks(app):
                 # у этого индикатора нет полей — пропускаем
                 continue
 
+            # Уже сохранённый диапазон или список тоже держит карточку в режиме диапазонов
+            with_ranges = indicator in ranges_on or any(
+                len(parse_param_values(value)) > 1
+                for key, value in stored_data.items()
+                if key.startswith(f"{indicator}__")
+            )
             card_body = [
-                html.H5(f"{indicator} Parameters", className="card-title text-center")
+                html.H5(f"{indicator} Parameters", className="card-title text-center"),
+                dmc.Switch(
+                    id={"type": "param_ranges", "indicator": indicator},
+                    label="Ranges (5..50:5 or 10, 20)",
+                    checked=with_ranges,
+                    size="xs",
+                ),
             ]
             # Инстансы (1..count)
             for instance_num in range(1, count + 1):
@@ -81,15 +114,7 @@ def register_callbacks(app):
                     param = row["input_name"]
                     input_type = row["input_type"]
 
-                    dash_input_type = "text"
-                    if input_type in ["int", "float", "bool"]:
-                        dash_input_type = "number"
-
-                    placeholder = {
-                        "int": f"{param}, e.g. 1",
-                        "float": f"{param}, e.g. 1.0",
-                        "bool": f"{param}, 0 or 1",
-                    }.get(input_type, param)
+                    dash_input_type, placeholder = _param_input_props(param, input_type, with_ranges)
 
                     input_id_str = f"{indicator}__{instance_num}__{param}"
                     wrapper_id = f"wrap__{input_id_str}"
@@ -174,3 +199,27 @@ def register_callbacks(app):
                 return [], False
 
         return all_cards, True
+
+    # Переключатель Ranges меняет только тип и подсказку полей своего индикатора: карточки не перерисовываются,
+    # поэтому введённые значения и сам переключатель остаются на месте
+    @app.callback(
+        Output({"type": "param_input", "id": ALL}, "type"),
+        Output({"type": "param_input", "id": ALL}, "placeholder"),
+        Input({"type": "param_ranges", "indicator": ALL}, "checked"),
+        State({"type": "param_ranges", "indicator": ALL}, "id"),
+        State({"type": "param_input", "id": ALL}, "id"),
+        prevent_initial_call=True,
+    )
+    def toggle_param_ranges(ranges_checked, ranges_ids, input_ids):
+        ranges_on = {i["indicator"]: bool(checked) for i, checked in zip(ranges_ids or [], ranges_checked or [])}
+        types, placeholders = [], []
+        for input_id in input_ids or []:
+            indicator, _, param = input_id["id"].split("__", 2)
+            row = df_input_parameters[
+                (df_input_parameters["indicator"] == indicator) & (df_input_parameters["input_name"] == param)
+            ]
+            input_type = row["input_type"].iloc[0] if len(row) else "text"
+            dash_input_type, placeholder = _param_input_props(param, input_type, ranges_on.get(indicator, False))
+            types.append(dash_input_type)
+            placeholders.append(placeholder)
+        return types, placeholders
@@ -0,0 +1,130 @@
+from dash import html, dcc, Input, Output, State, no_update
+from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
+from strategies.strategies_helpful_functions import group_params, replace_ids_with_names, relabel_conditions
+from strategies.strategies_candles import load_candles
+from strategies.strategies_live import LiveSession, live_sessions, make_feed
+from strategies.strategies_sweep import expand_param_grid
+from strategies.strategies_constants import LIVE_WINDOW_BARS
+
+LIVE_ENDED_NOTE = "Live session ended (evicted or served by another worker) — switch Live off and on to restart"
+
+
+def _live_figures(session):
+    """Исходные графики живого режима: последние LIVE_WINDOW_BARS баров истории, дальше — только extendData."""
+    tail = session.history.iloc[-LIVE_WINDOW_BARS:]
+    fig_candles = go.Figure(
+        go.Candlestick(x=tail.index, open=tail["Open"], high=tail["High"], low=tail["Low"], close=tail["Close"], name=session.ticker)
+    )
+    fig_candles.update_layout(
+        title=f"Live: {session.ticker} {session.interval}",
+        xaxis_rangeslider_visible=False,
+        margin=dict(l=0, r=0, t=40, b=8),
+        height=350,
+        uirevision="live",
+    )
+    fig_equity = go.Figure()
+    for j, sid in enumerate(session.ids):
+        fig_equity.add_trace(go.Scatter(x=tail.index, y=session.history_equity[-LIVE_WINDOW_BARS:, j], mode="lines", name=sid))
+    fig_equity.add_trace(go.Scatter(x=[], y=[], mode="markers", name="Buy", marker=dict(symbol="triangle-up", size=10, color="green")))
+    fig_equity.add_trace(go.Scatter(x=[], y=[], mode="markers", name="Sell", marker=dict(symbol="triangle-down", size=10, color="red")))
+    fig_equity.update_layout(
+        yaxis_title="Equity (x initial)",
+        margin=dict(l=0, r=0, t=8, b=8),
+        height=250,
+        uirevision="live",
+    )
+    return fig_candles, fig_equity
+
+
+def _live_status(session):
+    positions = ", ".join(f"{sid}: {'long' if s else 'flat'}" for sid, s in zip(session.ids, session.state))
+    return f"{session.last_time:%Y-%m-%d %H:%M} close {session.last_close:,.4f} · {positions} · online: {', '.join(session.online) or '—'}"
+
+
+def register_callbacks(app):
+
+    # Живой режим: сессия считает историю один раз, дальше dcc.Interval забирает новые бары из ленты
+    # (strategies_live) и дописывает их в графики через extendData, не перестраивая фигуры
+    @app.callback(
+        Output("graph_live_div", "children"),
+        Output("live_interval", "disabled"),
+        Output("live_token", "data"),
+        Input("live_switch", "checked"),
+        State("dropdown_coin", "value"),
+        State("dropdown_indicators", "value"),
+        State("date_picker", "start_date"),
+        State("date_picker", "end_date"),
+        State("dropdown_interval", "value"),
+        State("stored_inputs", "data"),
+        State("conditions_store_inputs", "data"),
+        State("strategies_store", "data"),
+        State("live_token", "data"),
+        prevent_initial_call=True,
+    )
+    def toggle_live(checked, ticker, indicators, start, end, interval, stored_inputs, conditions, strategies, token):
+        live_sessions.stop(token)
+        if not checked:
+            return [], True, None
+        combos, _, _ = expand_param_grid(stored_inputs)
+        params = combos[0] if combos else {}
+        conditions = relabel_conditions(replace_ids_with_names(conditions, strategies), params)
+        candles = load_candles(ticker, start, end, interval)
+        if len(candles) == 0:
+            return html.H5("Live: no history for this symbol and range"), True, None
+        try:
+            session = LiveSession(
+                ticker,
+                interval,
+                candles,
+                indicators or [],
+                group_params(params) if params else {},
+                conditions or {},
+                make_feed(ticker, str(interval)),
+            )
+        except KeyError as exc:
+            return html.H5(f"Live: {exc}"), True, None
+        fig_candles, fig_equity = _live_figures(session)
+        children = [
+            dcc.Graph(id="live_chart", figure=fig_candles),
+            dcc.Graph(id="live_equity", figure=fig_equity),
+            html.Div(_live_status(session), id="live_status", style={"color": "gray"}),
+        ]
+        return children, False, live_sessions.start(session)
+
+    @app.callback(
+        Output("live_chart", "extendData"),
+        Output("live_equity", "extendData"),
+        Output("live_status", "children"),
+        Output("live_interval", "disabled", allow_duplicate=True),
+        Input("live_interval", "n_intervals"),
+        State("live_token", "data"),
+        prevent_initial_call=True,
+    )
+    def live_tick(n_intervals, token):
+        session = live_sessions.get(token)
+        if session is None:
+            # Сессии нет в этом процессе: сообщаем и останавливаем опрос, а не молчим на каждом тике
+            return no_update, no_update, LIVE_ENDED_NOTE, True
+        ticks = session.poll()
+        if not ticks:
+            raise PreventUpdate
+        times = [t["bar"]["time"] for t in ticks]
+        candles = (
+            {"x": [times], **{col.lower(): [[t["bar"][col] for t in ticks]] for col in ("Open", "High", "Low", "Close")}},
+            [0],
+            LIVE_WINDOW_BARS,
+        )
+
+        k = len(session.ids)
+        xs = [times for _ in range(k)]
+        ys = [[float(t["equity"][j]) for t in ticks] for j in range(k)]
+        indices = list(range(k))
+        for trace, side in ((k, 1), (k + 1, -1)):
+            hits = [(t["bar"]["time"], float(t["equity"][j])) for t in ticks for j in range(k) if t["events"][j] == side]
+            if hits:
+                xs.append([x for x, _ in hits])
+                ys.append([y for _, y in hits])
+                indices.append(trace)
+        equity = ({"x": xs, "y": ys}, indices, LIVE_WINDOW_BARS) if k else no_update
+        return candles, equity, _live_status(session), no_update
@@ -1,6 +1,7 @@
 from dash import Input, Output, State, MATCH
 from strategies.strategies_helpful_functions import (
     build_options_template,
+    indicator_column_label,
 )
 from strategies.strategies_constants import (
     COMPARISON_OPERATORS,
@@ -224,21 +225,8 @@ def register_callbacks(app):
             )
             count = int(param_instances.get(ind, 1) or 1)
             for inst in range(1, count + 1):
-                key_period = f"{ind}__{inst}__period"
-                period_val = stored_inputs.get(key_period, None)
-                if period_val in (None, "", "None"):
-                    period_label = "i"
-                else:
-                    try:
-                        period_label = (
-                            str(int(period_val)) if float(period_val).is_integer() else str(period_val)
-                        )
-                    except Exception:
-                        period_label = str(period_val)
-
-                base = f"{period_label} period"
                 for col in cols:
-                    label_val = f"{ind}_{col.replace('i period', base)}"
+                    label_val = indicator_column_label(ind, inst, col, stored_inputs)
                     raw_key = f"{ind}__{inst}__{col}"  # 👈 добавляем сырой ключ для связи с param_source
                     output_options.append(
                         {
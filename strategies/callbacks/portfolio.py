@@ -0,0 +1,165 @@
+from dash import html, dcc, Input, Output, State
+from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
+from strategies.strategies_helpful_functions import (
+    group_params,
+    _fmt_pct,
+    _color_scale_number,
+    replace_ids_with_names,
+    relabel_conditions,
+)
+from strategies.strategies_metrics import periods_per_year
+from strategies.strategies_portfolio import run_portfolio
+from strategies.strategies_executor import BacktestError
+from strategies.strategies_background import background_callback_manager
+from strategies.strategies_sweep import expand_param_grid
+from strategies.strategies_constants import CHART_WEBGL
+from strategies.strategies_figures import chart_x, compact_figure, downsample_line
+from strategies.callbacks.results import _table, _no_progress
+
+Scatter = go.Scattergl if CHART_WEBGL else go.Scatter
+
+
+def _portfolio_component(result, n_symbols):
+    """Кривая капитала портфеля по стратегиям, метрики портфеля и срез по символам."""
+    portfolio, cross = result["portfolio"], result["cross_section"]
+    fig_equity = go.Figure()
+    for j, sid in enumerate(result["ids"]):
+        x, y = downsample_line(result["index"], result["equity"][:, j])
+        fig_equity.add_trace(Scatter(x=chart_x(x), y=y, mode="lines", name=sid))
+    fig_equity.update_layout(
+        title=f"Portfolio: {n_symbols - len(result['errors'])} of {n_symbols} symbols, equal weight",
+        yaxis_title="Equity (x initial)",
+        margin=dict(l=0, r=0, t=40, b=8),
+        height=350,
+    )
+
+    white = ["white"] * len(portfolio)
+    fig_portfolio = _table(
+        ["Strategy", "Total Return", "CAGR", "Sharpe", "Sortino", "Max DD"],
+        [
+            portfolio["strategy"].tolist(),
+            [_fmt_pct(x) for x in portfolio["total_return"]],
+            [_fmt_pct(x) for x in portfolio["cagr"]],
+            [f"{x:.2f}" for x in portfolio["sharpe"]],
+            [f"{x:.2f}" for x in portfolio["sortino"]],
+            [_fmt_pct(x) for x in portfolio["max_drawdown"]],
+        ],
+        [
+            white,
+            [_color_scale_number(x, good_high=True) for x in portfolio["total_return"]],
+            white,
+            [_color_scale_number(x, good_high=True) for x in portfolio["sharpe"]],
+            [_color_scale_number(x, good_high=True) for x in portfolio["sortino"]],
+            [_color_scale_number(x, good_high=False) for x in portfolio["max_drawdown"]],
+        ],
+        [80, 90, 80, 70, 70, 80],
+        len(portfolio),
+    )
+
+    white = ["white"] * len(cross)
+    fig_cross = _table(
+        ["Strategy", "Symbols", "Profitable", "Mean Sharpe", "Median Sharpe", "Return Dispersion", "Best", "Worst"],
+        [
+            cross["strategy"].tolist(),
+            cross["symbols"].tolist(),
+            [_fmt_pct(x) for x in cross["profitable_share"]],
+            [f"{x:.2f}" for x in cross["mean_sharpe"]],
+            [f"{x:.2f}" for x in cross["median_sharpe"]],
+            [_fmt_pct(x) for x in cross["return_dispersion"]],
+            cross["best_symbol"].tolist(),
+            cross["worst_symbol"].tolist(),
+        ],
+        [
+            white,
+            white,
+            white,
+            [_color_scale_number(x, good_high=True) for x in cross["mean_sharpe"]],
+            [_color_scale_number(x, good_high=True) for x in cross["median_sharpe"]],
+            white,
+            white,
+            white,
+        ],
+        [80, 60, 80, 80, 80, 100, 100, 100],
+        len(cross),
+    )
+
+    children = [
+        dcc.Graph(id="portfolio_equity", figure=compact_figure(fig_equity)),
+        html.H5("Portfolio metrics"),
+        dcc.Graph(id="portfolio_metrics", figure=fig_portfolio, config={"displayModeBar": False}),
+        html.H5("Cross-section by symbol"),
+        dcc.Graph(id="portfolio_cross_section", figure=fig_cross, config={"displayModeBar": False}),
+    ]
+    if result["errors"]:
+        children.append(
+            html.Div("Skipped: " + "; ".join(f"{s} ({e})" for s, e in result["errors"].items()), style={"color": "gray"})
+        )
+    return html.Div(children)
+
+
+def register_callbacks(app):
+
+    portfolio_outputs = Output("graph_portfolio_div", "children")
+    portfolio_inputs = [Input("portfolio_button", "n_clicks")]
+    portfolio_states = [
+        State("dropdown_portfolio_coins", "value"),
+        State("dropdown_indicators", "value"),
+        State("date_picker", "start_date"),
+        State("date_picker", "end_date"),
+        State("dropdown_interval", "value"),
+        State("stored_inputs", "data"),
+        State("conditions_store_inputs", "data"),
+        State("strategies_store", "data"),
+    ]
+
+    # Портфельный режим: тот же набор стратегий на нескольких символах (strategies_portfolio.run_portfolio).
+    # Поля-диапазоны параметров не перебираются — берутся первые значения сетки.
+    # set_progress((процент, этап)) — прогресс в фоновом режиме, иначе заглушка
+    def create_portfolio(set_progress, clicks, symbols, indicators, start, end, interval, stored_inputs, conditions, strategies):
+        if not clicks or not symbols:
+            raise PreventUpdate
+        combos, _, _ = expand_param_grid(stored_inputs)
+        params = combos[0] if combos else {}
+        conditions = relabel_conditions(replace_ids_with_names(conditions, strategies), params)
+        try:
+            result = run_portfolio(
+                symbols,
+                start,
+                end,
+                interval,
+                indicators or [],
+                group_params(params) if params else {},
+                conditions or {},
+                periods_per_year(interval),
+                progress=lambda fraction, stage: set_progress((int(5 + 90 * fraction), stage)),
+            )
+        except BacktestError as exc:
+            return html.H5(f"Portfolio: {exc}")
+        if not result["ids"]:
+            return html.H5("Portfolio: no data or no strategies with buy conditions")
+        return _portfolio_component(result, len(dict.fromkeys(symbols)))
+
+    if background_callback_manager is not None:
+        # Фоновый режим: задача в отдельном процессе, с прогрессом по символам и отменой
+        app.callback(
+            portfolio_outputs,
+            portfolio_inputs,
+            portfolio_states,
+            prevent_initial_call=True,
+            background=True,
+            progress=[
+                Output("portfolio_progress", "value"),
+                Output("portfolio_progress_label", "children"),
+            ],
+            running=[
+                (Output("portfolio_progress_box", "style"), {"display": "block", "marginTop": "10px"}, {"display": "none"}),
+                (Output("portfolio_cancel_button", "disabled"), False, True),
+                (Output("portfolio_button", "disabled"), True, False),
+            ],
+            cancel=[Input("portfolio_cancel_button", "n_clicks")],
+        )(create_portfolio)
+    else:
+        @app.callback(portfolio_outputs, portfolio_inputs, portfolio_states, prevent_initial_call=True)
+        def create_portfolio_sync(*args):
+            return create_portfolio(_no_progress, *args)
@@ -1,86 +1,340 @@
-from dash import html, dcc, Input, Output, State
+from dash import html, dcc, dash_table, Input, Output, State, Patch, MATCH
+from dash.exceptions import PreventUpdate
 import plotly.graph_objects as go
-from calculate import Coin, Indicator
+import dash_mantine_components as dmc
 from strategies.strategies_helpful_functions import (
     group_params,
     _fmt_pct,
     _color_scale_number,
     replace_ids_with_names,
+    relabel_conditions,
 )
-from strategies.strategies_constants import (
-    dict_ops,
-    submit_clicks,
+from strategies.strategies_candles import load_candles
+from strategies.strategies_executor import backtest_executor, BacktestError
+from strategies.strategies_metrics import summary_metrics, periods_per_year
+from strategies.strategies_sweep import expand_param_grid, run_sweep, RANK_METRIC
+from strategies.strategies_walkforward import run_walk_forward, run_sweep_walk_forward, walk_forward_summary
+from strategies.strategies_background import background_callback_manager
+from strategies.strategies_constants import CHART_WEBGL, TRADES_PAGE_SIZE
+from strategies.strategies_trades import ledger_frame
+from strategies.strategies_result_cache import result_cache, submit_key, result_ttl
+from strategies.strategies_spec import build_spec
+from strategies.strategies_figures import (
+    chart_x,
+    compact_figure,
+    typed_array,
+    downsample_line,
+    downsample_ohlc,
+    relayout_range,
+    rescale_chart,
+    chart_cache,
 )
 import itertools
+import numpy as np
 import plotly.colors as pc
 
 
-def register_callbacks(app):
+def _table(header_vals, cell_vals, fill_color, columnwidth, rows, title=None):
+    """Таблица метрик (go.Table) в общем оформлении; высота — по числу строк, не больше 15."""
+    fig = go.Figure(
+        data=[
+            go.Table(
+                columnwidth=columnwidth,
+                header=dict(
+                    values=header_vals,
+                    fill_color="#f0f2f6",
+                    align="left",
+                    font=dict(color="#2a2f45", size=13),
+                ),
+                cells=dict(
+                    values=cell_vals,
+                    fill_color=fill_color,
+                    align="left",
+                    font=dict(size=12),
+                    height=26,
+                ),
+            )
+        ]
+    )
+    fig.update_layout(
+        title=title,
+        margin=dict(l=0, r=0, t=40 if title else 8, b=8),
+        height=(80 if title else 50) + 28 * min(rows, 15),
+    )
+    return fig
 
-    # Отрисовываем результаты стратегий: таблица сравнения, графики - стратегий, монеты, индикаторов
-    @app.callback(
-        [
-            Output("graph_coin_div", "children"),
-            Output("graph_strategy_div", "children"),
-            Output("graphs_indicators", "children"),
-            Output("header", "children"),
-            Output("no_data_message", "style"),
-        ],
+
+def _sweep_component(ranking, evaluated, total):
+    """Таблица результатов перебора параметров: комбинации, отсортированные по Sharpe."""
+    if ranking.empty:
+        return html.H5("Parameter sweep: no valid combinations")
+    title = f"Parameter sweep: {evaluated} combinations"
+    if total > evaluated:
+        title += f" (first {evaluated} of {total})"
+    header_vals = ["Rank", "Parameters", "Strategy", "Sharpe", "Sortino", "CAGR", "Total Return", "Max DD"]
+    cell_vals = [
+        list(range(1, len(ranking) + 1)),
+        ranking["params"].tolist(),
+        ranking["strategy"].tolist(),
+        [f"{x:.2f}" for x in ranking["sharpe"]],
+        [f"{x:.2f}" for x in ranking["sortino"]],
+        [_fmt_pct(x) for x in ranking["cagr"]],
+        [_fmt_pct(x) for x in ranking["total_return"]],
+        [_fmt_pct(x) for x in ranking["max_drawdown"]],
+    ]
+    fill_color = [
+        ["white"] * len(ranking),
+        ["white"] * len(ranking),
+        ["white"] * len(ranking),
+        [_color_scale_number(x, good_high=True) for x in ranking["sharpe"]],
+        [_color_scale_number(x, good_high=True) for x in ranking["sortino"]],
+        ["white"] * len(ranking),
+        ["white"] * len(ranking),
+        [_color_scale_number(x, good_high=False) for x in ranking["max_drawdown"]],
+    ]
+    fig = _table(header_vals, cell_vals, fill_color, [40, 220, 80, 70, 70, 80, 90, 80], len(ranking), title)
+    # Бэктест для графиков один на все стратегии — с параметрами первой строки рейтинга
+    best = ranking.iloc[0]
+    note = (
+        f"Charts below use the top-ranked parameters ({best['params']}), best for {best['strategy']}; "
+        "every strategy is charted with them, not with its own best combination."
+    )
+    return html.Div(
         [
-            Input("dropdown_coin", "value"),
-            Input("dropdown_indicators", "value"),
-            Input("date_picker", "start_date"),
-            Input("date_picker", "end_date"),
-            Input("dropdown_interval", "value"),
-            Input("submit_button", "n_clicks"),
-        ],
+            dcc.Graph(id="strategy_sweep", figure=fig, config={"displayModeBar": False}),
+            html.Div(note, style={"color": "gray"}),
+        ]
+    )
+
+
+def _walk_forward_component(frame, mode):
+    """Таблица walk-forward: окно × стратегия, параметры-победители на обучении и метрики на тесте."""
+    if frame.empty:
+        return html.H5("Walk-forward: not enough data or no valid combinations")
+    summary = walk_forward_summary(frame)
+    title = f"Walk-forward ({mode}, {frame['window'].nunique()} windows): " + "; ".join(
+        f"{row.strategy} OOS {_fmt_pct(row.oos_return)}" for row in summary.itertuples()
+    )
+    header_vals = [
+        "Window", "Train", "Test", "Strategy", "Parameters",
+        f"Train {RANK_METRIC.capitalize()}", f"Test {RANK_METRIC.capitalize()}", "Test Return", "Test Max DD",
+    ]
+    cell_vals = [
+        frame["window"].tolist(),
+        [f"{a:%Y-%m-%d}..{b:%Y-%m-%d}" for a, b in zip(frame["train_start"], frame["train_end"])],
+        [f"{a:%Y-%m-%d}..{b:%Y-%m-%d}" for a, b in zip(frame["test_start"], frame["test_end"])],
+        frame["strategy"].tolist(),
+        frame["params"].tolist(),
+        [f"{x:.2f}" for x in frame[f"train_{RANK_METRIC}"]],
+        [f"{x:.2f}" for x in frame[f"test_{RANK_METRIC}"]],
+        [_fmt_pct(x) for x in frame["test_total_return"]],
+        [_fmt_pct(x) for x in frame["test_max_drawdown"]],
+    ]
+    white = ["white"] * len(frame)
+    fill_color = [
+        white, white, white, white, white,
+        [_color_scale_number(x, good_high=True) for x in frame[f"train_{RANK_METRIC}"]],
+        [_color_scale_number(x, good_high=True) for x in frame[f"test_{RANK_METRIC}"]],
+        [_color_scale_number(x, good_high=True) for x in frame["test_total_return"]],
+        [_color_scale_number(x, good_high=False) for x in frame["test_max_drawdown"]],
+    ]
+    fig = _table(header_vals, cell_vals, fill_color, [50, 150, 150, 80, 200, 70, 70, 80, 80], len(frame), title)
+    return dcc.Graph(id="strategy_walk_forward", figure=fig, config={"displayModeBar": False})
+
+
+def _trade_rows(ledger, ids, index, page: int, page_size: int = TRADES_PAGE_SIZE):
+    """Одна страница журнала сделок -> строки DataTable."""
+    part = ledger_frame(ledger[page * page_size:(page + 1) * page_size], ids, index)
+    return [
+        {
+            "strategy": row.strategy,
+            "entry_time": f"{row.entry_time:%Y-%m-%d %H:%M}",
+            "exit_time": f"{row.exit_time:%Y-%m-%d %H:%M}" + (" (open)" if row.is_open else ""),
+            "entry_price": f"{row.entry_price:,.4f}",
+            "exit_price": f"{row.exit_price:,.4f}",
+            "pnl": _fmt_pct(row.pnl),
+            "holding_bars": int(row.holding_bars),
+            "mae": _fmt_pct(row.mae),
+            "mfe": _fmt_pct(row.mfe),
+        }
+        for row in part.itertuples(index=False)
+    ]
+
+
+def _trades_component(ledger, ids, index):
+    """Журнал сделок: таблица с постраничной подгрузкой с сервера и выгрузка в CSV."""
+    columns = [
+        ("strategy", "Strategy"),
+        ("entry_time", "Entry"),
+        ("exit_time", "Exit"),
+        ("entry_price", "Entry Price"),
+        ("exit_price", "Exit Price"),
+        ("pnl", "PnL"),
+        ("holding_bars", "Bars"),
+        ("mae", "MAE"),
+        ("mfe", "MFE"),
+    ]
+    return html.Div(
         [
-            State("stored_inputs", "data"),
-            State("conditions_store_inputs", "data"),
-            State("strategies_store", "data"),
+            html.Div(
+                [
+                    html.H5(f"Trades: {len(ledger)}"),
+                    dmc.Button(
+                        "Download CSV",
+                        id="trades_download_button",
+                        n_clicks=0,
+                        variant="light",
+                        size="xs",
+                    ),
+                ],
+                style={"display": "flex", "justifyContent": "space-between", "alignItems": "center"},
+            ),
+            dash_table.DataTable(
+                id="trades_table",
+                columns=[{"name": name, "id": key} for key, name in columns],
+                data=_trade_rows(ledger, ids, index, 0),
+                page_action="custom",
+                page_current=0,
+                page_size=TRADES_PAGE_SIZE,
+                page_count=max(1, -(-len(ledger) // TRADES_PAGE_SIZE)),
+                style_cell={"fontSize": "12px", "textAlign": "left", "padding": "4px 8px"},
+                style_header={"backgroundColor": "#f0f2f6", "fontWeight": "bold"},
+            ),
         ],
+        style={"marginTop": "12px"},
     )
+
+
+def _no_progress(_):
+    pass
+
+
+# Массивов Submit нет в chart_cache этого процесса: истёк срок/вытеснены или запрос попал
+# на другой воркер сервера (кэш — в памяти процесса)
+EXPIRED_NOTE = "Chart data is no longer available on this server worker — press Submit again"
+
+
+# Линии и маркеры: при CHART_WEBGL — WebGL-трассы
+Scatter = go.Scattergl if CHART_WEBGL else go.Scatter
+
+
+def register_callbacks(app):
+
+    charts_outputs = [
+        Output("graph_coin_div", "children"),
+        Output("graph_strategy_div", "children"),
+        Output("graphs_indicators", "children"),
+        Output("header", "children"),
+        Output("no_data_message", "style"),
+        Output("charts_token", "data"),
+    ]
+    # Тяжёлый callback запускает только Submit: остальные поля читаются как State,
+    # поэтому состояние «был ли клик» не нужно хранить на сервере
+    charts_inputs = [
+        Input("submit_button", "n_clicks"),
+    ]
+    charts_states = [
+        State("dropdown_coin", "value"),
+        State("dropdown_indicators", "value"),
+        State("date_picker", "start_date"),
+        State("date_picker", "end_date"),
+        State("dropdown_interval", "value"),
+        State("stored_inputs", "data"),
+        State("conditions_store_inputs", "data"),
+        State("strategies_store", "data"),
+        State("dropdown_walk_forward", "value"),
+    ]
+
+    # Отрисовываем результаты стратегий: таблица сравнения, графики - стратегий, монеты, индикаторов.
+    # set_progress((процент, этап)) — прогресс в фоновом режиме, иначе заглушка
     def create_charts(
+        set_progress,
+        clicks,
         ticker,
         indicators,
         start,
         end,
         interval,
-        clicks,
         stored_inputs,
         conditions_store_inputs,
         strategies,
+        walk_forward="off",
     ):
         # print("CHART-----------------------")
         # print("conditions_store_inputs", conditions_store_inputs)
         # print("stored_inputs", stored_inputs)
-        if clicks == submit_clicks["click"]:
-            return [], [], [], [], {"display": "none"}
-        submit_clicks["click"] = clicks
+        set_progress((5, "Loading data"))
         conditions_store_inputs = replace_ids_with_names(
             conditions_store_inputs, strategies
         )
-        # print(stored_inputs)
-        kwargs = group_params(stored_inputs) if stored_inputs else {}
-        # print(kwargs)
-        coin = Coin(ticker, start, end, interval)
-        if len(coin.data) == 0:
-            return [], [], [], [], {"visibility": "visible"}
-
-        # Бэктест (дедуп имён индикаторов делается внутри backtest_all_strategies)
-        results, df, added_cols = Indicator.backtest_all_strategies(
-            df=coin.data.copy(),
-            conditions=conditions_store_inputs or {},
-            indicator_names=indicators or [],
-            kwargs_map=kwargs,
-            dict_operators=dict_ops,
-            debug=True,
+        # Тот же запрос недавно уже считали — отдаём готовые компоненты
+        walk_forward = walk_forward or "off"
+        cache_key = submit_key(
+            ticker, start, end, interval, build_spec(indicators, stored_inputs, conditions_store_inputs), walk_forward
         )
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            token = cached["token"]
+            if chart_cache.get(token) is None:
+                chart_cache.put(cached["chart_entry"], token)
+            return (*cached["outputs"], token)
+        # Поля параметров могут содержать диапазоны ('5..50:5') — тогда перебираем сетку
+        combos, swept, grid_size = expand_param_grid(stored_inputs)
+        candles = load_candles(ticker, start, end, interval)
+        if len(candles) == 0:
+            return [], [], [], [], {"visibility": "visible"}, None
+        bars_per_year = periods_per_year(interval)
+
+        set_progress((25, "Indicators"))
+        sweep_component = None
+        walk_forward_component = None
+        params = combos[0] if combos else {}
+        ranking = None
+        # Перебор и walk-forward — в пулах процессов с тем же таймаутом, что у бэктеста
+        try:
+            if walk_forward != "off":
+                set_progress((40, "Walk-forward"))
+                anchored = walk_forward == "anchored"
+                args = (candles, indicators or [], combos, swept, conditions_store_inputs or {}, bars_per_year)
+                if swept:
+                    # один проход по комбинациям: метрики по всему ряду и по окнам из одних сигналов
+                    ranking, frame = run_sweep_walk_forward(*args, anchored=anchored)
+                else:
+                    frame = run_walk_forward(*args, anchored=anchored)
+                walk_forward_component = _walk_forward_component(frame, walk_forward)
+            elif swept:
+                ranking = run_sweep(
+                    candles, indicators or [], combos, swept, conditions_store_inputs or {}, bars_per_year
+                )
+        except BacktestError as exc:
+            return [], [], [], str(exc), {"visibility": "hidden"}, None
+        if ranking is not None:
+            sweep_component = _sweep_component(ranking, len(combos), grid_size)
+            if not ranking.empty:
+                params = ranking.loc[0, "combo"]  # графики — для лучшей комбинации
+        conditions_store_inputs = relabel_conditions(conditions_store_inputs, params)
+        kwargs = group_params(params) if params else {}
+
+        set_progress((50, "Backtest"))
+        # Бэктест всех стратегий одним проходом (см. strategies_backtest.run_backtest),
+        # при BACKTEST_EXECUTOR=process — в пуле процессов, а не в потоке запроса
+        try:
+            batch, df, added_cols = backtest_executor.run_backtest(
+                candles,
+                conditions_store_inputs or {},
+                indicators or [],
+                kwargs,
+                bars_per_year,
+            )
+        except BacktestError as exc:
+            return [], [], [], str(exc), {"visibility": "hidden"}, None
+        strategy_ids = batch["ids"]
+        set_progress((75, "Figures"))
 
         # ---------- Цвета ----------
         strategy_colors = itertools.cycle(pc.qualitative.Set1 + pc.qualitative.Set2)
         indicator_colors = itertools.cycle(pc.qualitative.Plotly)
-        strat_color_map = {sid: next(strategy_colors) for sid in results.keys()}
+        strat_color_map = {sid: next(strategy_colors) for sid in strategy_ids}
         ind_color_map = {
             col: next(indicator_colors)
             for _, cols in (added_cols or {}).items()
@@ -88,60 +342,80 @@ def register_callbacks(app):
         }
 
         # --- График монеты ---
+        # все трассы прорежены до CHART_MAX_POINTS точек; полные массивы — в chart_entry,
+        # из них при зуме перестраивается видимый диапазон (см. rescale_visible_range)
+        chart_entry = {"index": df.index, "charts": {}, "ledger": batch["ledger"], "ids": list(strategy_ids)}
+        chart_entry["charts"]["coin"] = {
+            "ohlc": {col: df[col].to_numpy(dtype=np.float64) for col in ("Open", "High", "Low", "Close")}
+        }
+        coin = downsample_ohlc(df)
         fig_coin = go.Figure()
         fig_coin.add_trace(
             go.Candlestick(
-                x=df.index,
-                open=df["Open"],
-                high=df["High"],
-                low=df["Low"],
-                close=df["Close"],
+                x=chart_x(coin.index),
+                open=coin["Open"],
+                high=coin["High"],
+                low=coin["Low"],
+                close=coin["Close"],
             )
         )
         fig_coin.update_layout(
             title=f"Candlestick chart of {ticker} price",
             xaxis_title="Date",
             yaxis_title="Price",
+            xaxis_type="date",
+            xaxis_rangeslider_visible=False,
+            uirevision=ticker,
         )
-        coin_component = dcc.Graph(id="graph_coin", figure=fig_coin)
+        coin_component = dcc.Graph(id={"type": "chart", "name": "coin"}, figure=compact_figure(fig_coin))
 
         # --- График стратегий ---
         fig_strategy = go.Figure()
         df["Buy_Hold_Cumulative_Return"] = (df["Close"] / df["Close"].iloc[0]) - 1
+        strategy_lines = {0: df["Buy_Hold_Cumulative_Return"].to_numpy(dtype=np.float64)}
+        chart_entry["charts"]["strategy"] = {"lines": strategy_lines}
+        bh_x, bh_y = downsample_line(df.index, strategy_lines[0])
         fig_strategy.add_trace(
-            go.Scatter(
-                x=df.index,
-                y=df["Buy_Hold_Cumulative_Return"],
+            Scatter(
+                x=chart_x(bh_x),
+                y=bh_y,
                 name="Buy & Hold",
                 line=dict(color="orange", width=2),
             )
         )
-        for sid, res in results.items():
-            cum_col = res["cum_returns_column"]
-            deal_col = res["deal_column"]
+        events = batch["events"]
+        for j, sid in enumerate(strategy_ids):
+            cum = batch["cum_returns"][:, j]
+            lo, hi = events["offsets"][j], events["offsets"][j + 1]
+            side = events["side"][lo:hi]
+            event_bars = events["bar"][lo:hi]
+            event_cum = events["cum"][lo:hi]
             color = strat_color_map[sid]
+            strategy_lines[len(fig_strategy.data)] = cum
+            cum_x, cum_y = downsample_line(df.index, cum)
             fig_strategy.add_trace(
-                go.Scatter(
-                    x=df.index,
-                    y=df[cum_col],
+                Scatter(
+                    x=chart_x(cum_x),
+                    y=cum_y,
                     name=f"Strategy: {sid}",
                     line=dict(width=2, color=color),
                 )
             )
-            # buy/sell маркеры
+            # buy/sell маркеры — прямо из событий сделок стратегии
+            is_buy = side == 1
             fig_strategy.add_trace(
-                go.Scatter(
-                    x=df.loc[df[deal_col] == 1].index,
-                    y=df.loc[df[deal_col] == 1][cum_col],
+                Scatter(
+                    x=chart_x(df.index[event_bars[is_buy]]),
+                    y=event_cum[is_buy],
                     mode="markers",
                     name=f"{sid} buy",
                     marker=dict(color="green", size=7),
                 )
             )
             fig_strategy.add_trace(
-                go.Scatter(
-                    x=df.loc[df[deal_col] == -1].index,
-                    y=df.loc[df[deal_col] == -1][cum_col],
+                Scatter(
+                    x=chart_x(df.index[event_bars[~is_buy]]),
+                    y=event_cum[~is_buy],
                     mode="markers",
                     name=f"{sid} sell",
                     marker=dict(color="red", size=7),
@@ -151,52 +425,30 @@ def register_callbacks(app):
             title="Graph of cumulative returns",
             xaxis_title="Date",
             yaxis_title="Cumulative Return",
+            xaxis_type="date",
+            uirevision=ticker,
         )
 
         # --- Сводная таблица по стратегиям (если они есть) ---
         summary_component = None
-        if results:
-            # соберём метрики
-            rows = []
-            n_periods = int(df["Close"].count()) if df["Close"].count() else 0
-            for sid, res in results.items():
-                cum_col = res["cum_returns_column"]
-                # ret_col = res['returns_column']
-                deal_col = res["deal_column"]
-
-                cum = df[cum_col].astype(float)
-                final_factor = float(cum.iloc[-1]) if len(cum) else 1.0
-                total_return = final_factor - 1.0
-                # CAGR согласуем с 252 из твоего бэктеста
-                cagr = (final_factor ** (252.0 / n_periods) - 1.0) if n_periods > 0 else 0.0
-                max_dd = float((cum / cum.cummax() - 1.0).min()) if len(cum) else 0.0
-                buys = int((df[deal_col] == 1).sum()) if deal_col in df.columns else 0
-                sells = int((df[deal_col] == -1).sum()) if deal_col in df.columns else 0
-
-                rows.append(
-                    {
-                        "Strategy": sid,
-                        "Final Balance": res["final_balance"],
-                        "Total Return %": total_return,
-                        "CAGR %": cagr,
-                        "Sharpe": res["sharpe_ratio"],
-                        "Sortino": res["sortino_ratio"],
-                        "Max Drawdown %": max_dd,
-                        "Buys": buys,
-                        "Sells": sells,
-                    }
-                )
+        if strategy_ids:
+            # метрики сразу по всем стратегиям, годовые — по интервалу свечей
+            metrics = summary_metrics(batch, bars_per_year)
 
             # формируем колонки для таблицы
-            strategies = [r["Strategy"] for r in rows]
-            final_bal = [f"{r['Final Balance']:,.2f}" for r in rows]
-            total_ret = [r["Total Return %"] for r in rows]
-            cagr_vals = [r["CAGR %"] for r in rows]
-            sharpe = [r["Sharpe"] for r in rows]
-            sortino = [r["Sortino"] for r in rows]
-            maxdd = [r["Max Drawdown %"] for r in rows]
-            buys = [r["Buys"] for r in rows]
-            sells = [r["Sells"] for r in rows]
+            strategies = list(strategy_ids)
+            final_bal = [f"{x:,.2f}" for x in metrics["final_balance"]]
+            total_ret = metrics["total_return"].tolist()
+            cagr_vals = metrics["cagr"].tolist()
+            sharpe = metrics["sharpe"].tolist()
+            sortino = metrics["sortino"].tolist()
+            maxdd = metrics["max_drawdown"].tolist()
+            buys = metrics["buys"].tolist()
+            sells = metrics["sells"].tolist()
+            win_rate = metrics["win_rate"].tolist()
+            exposure = metrics["exposure"].tolist()
+            turnover = metrics["turnover"].tolist()
+            avg_trade = metrics["avg_trade_days"].tolist()
 
             # текста для процентов
             total_ret_txt = [_fmt_pct(x) for x in total_ret]
@@ -215,6 +467,10 @@ def register_callbacks(app):
                 for x in cagr_vals
             ]
             maxdd_bg = [_color_scale_number(x, good_high=False) for x in maxdd]
+            win_bg = [
+                _color_scale_number(x, good_high=True, thr_good=0.55, thr_ok=0.45)
+                for x in win_rate
+            ]
 
             header_vals = [
                 "Strategy",
@@ -226,6 +482,10 @@ def register_callbacks(app):
                 "Max DD",
                 "Buys",
                 "Sells",
+                "Win Rate",
+                "Exposure",
+                "Turnover/yr",
+                "Avg Trade",
             ]
             cell_vals = [
                 strategies,
@@ -237,6 +497,10 @@ def register_callbacks(app):
                 maxdd_txt,
                 buys,
                 sells,
+                [_fmt_pct(x) for x in win_rate],
+                [_fmt_pct(x) for x in exposure],
+                [f"{x:.1f}" for x in turnover],
+                [f"{x:.1f} d" for x in avg_trade],
             ]
 
             # для разных колонок дадим собственный фон
@@ -250,13 +514,17 @@ def register_callbacks(app):
                 maxdd_bg,  # Max DD
                 ["white"] * len(strategies),  # Buys
                 ["white"] * len(strategies),  # Sells
+                win_bg,  # Win Rate
+                ["white"] * len(strategies),  # Exposure
+                ["white"] * len(strategies),  # Turnover
+                ["white"] * len(strategies),  # Avg Trade
             ]
 
             fig_summary = go.Figure(
                 data=[
                     go.Table(
                         columnorder=list(range(1, len(header_vals) + 1)),
-                        columnwidth=[80, 90, 90, 80, 70, 70, 90, 60, 60],
+                        columnwidth=[80, 90, 90, 80, 70, 70, 90, 60, 60, 70, 70, 80, 80],
                         header=dict(
                             values=header_vals,
                             fill_color="#f0f2f6",
@@ -287,31 +555,38 @@ def register_callbacks(app):
             )
 
         # --- Header ---
-        if not results:
+        if not strategy_ids:
             header = "Performance: Buy & Hold"
-        elif len(results) == 1:
-            header = f"Performance: Strategy {list(results.keys())[0]} vs Buy & Hold"
+        elif len(strategy_ids) == 1:
+            header = f"Performance: Strategy {strategy_ids[0]} vs Buy & Hold"
         else:
-            header = f"Performance: Strategies {', '.join(results.keys())} vs Buy & Hold"
+            header = f"Performance: Strategies {', '.join(strategy_ids)} vs Buy & Hold"
 
         # --- Графики индикаторов ---
         children_indicators = []
         for ind, cols in (added_cols or {}).items():
             for col in cols:
                 fig_indicator = go.Figure()
+                ind_values = df[col].to_numpy(dtype=np.float64)
+                chart_entry["charts"][col] = {"lines": {0: ind_values}}
+                ind_x, ind_y = downsample_line(df.index, ind_values)
                 fig_indicator.add_trace(
-                    go.Scatter(
-                        x=df.index,
-                        y=df[col],
+                    Scatter(
+                        x=chart_x(ind_x),
+                        y=ind_y,
                         name=f"Indicator {ind}",
                         line=dict(width=2, color=ind_color_map[col]),
                     )
                 )
                 fig_indicator.update_layout(
-                    title=f"Graph of {col}", xaxis_title="Date", yaxis_title=col
+                    title=f"Graph of {col}",
+                    xaxis_title="Date",
+                    yaxis_title=col,
+                    xaxis_type="date",
+                    uirevision=ticker,
                 )
                 children_indicators.append(
-                    dcc.Graph(id=f"graph_{col}", figure=fig_indicator)
+                    dcc.Graph(id={"type": "chart", "name": col}, figure=compact_figure(fig_indicator))
                 )
 
         # собираем блок стратегии (график + таблица)
@@ -320,20 +595,119 @@ def register_callbacks(app):
                 [
                     summary_component,
                     dcc.Graph(
-                        id="graph_strategy",
-                        figure=fig_strategy,
+                        id={"type": "chart", "name": "strategy"},
+                        figure=compact_figure(fig_strategy),
                         style={"marginTop": "0px", "paddingTop": "0px"},
                     ),
+                    _trades_component(batch["ledger"], strategy_ids, df.index),
                 ],
                 style={"marginBottom": "0px", "paddingBottom": "0px"},
             )
         else:
-            strategy_children = dcc.Graph(id="graph_strategy", figure=fig_strategy)
+            strategy_children = dcc.Graph(id={"type": "chart", "name": "strategy"}, figure=compact_figure(fig_strategy))
+        if sweep_component is not None:
+            strategy_children = html.Div([sweep_component, strategy_children])
+        if walk_forward_component is not None:
+            strategy_children = html.Div([walk_forward_component, strategy_children])
 
-        return (
+        outputs = (
             coin_component,
             strategy_children,
             children_indicators,
             header,
             {"visibility": "hidden"},
         )
+        token = chart_cache.put(chart_entry)
+        result_cache.put(cache_key, outputs, chart_entry, token, result_ttl(end))
+        return (*outputs, token)
+
+    # Журнал сделок: страница таблицы и выгрузка — из массивов последнего Submit
+    @app.callback(
+        Output("trades_table", "data"),
+        Input("trades_table", "page_current"),
+        State("charts_token", "data"),
+        prevent_initial_call=True,
+    )
+    def page_trades(page, token):
+        entry = chart_cache.get(token)
+        if entry is None:
+            return [{"strategy": EXPIRED_NOTE}]
+        return _trade_rows(entry["ledger"], entry["ids"], entry["index"], page or 0)
+
+    @app.callback(
+        Output("trades_download", "data"),
+        Input("trades_download_button", "n_clicks"),
+        State("charts_token", "data"),
+        prevent_initial_call=True,
+    )
+    def download_trades(clicks, token):
+        entry = chart_cache.get(token)
+        if not clicks or entry is None:
+            raise PreventUpdate
+        frame = ledger_frame(entry["ledger"], entry["ids"], entry["index"])
+        return dcc.send_data_frame(frame.to_csv, "trades.csv", index=False)
+
+    if background_callback_manager is not None:
+        # Фоновый режим: задача в отдельном процессе, повторный Submit отменяет предыдущую задачу
+        app.callback(
+            charts_outputs,
+            charts_inputs,
+            charts_states,
+            prevent_initial_call=True,
+            background=True,
+            progress=[
+                Output("charts_progress", "value"),
+                Output("charts_progress_label", "children"),
+            ],
+            running=[
+                (Output("charts_progress_box", "style"), {"display": "block", "marginTop": "10px"}, {"display": "none"}),
+                (Output("cancel_button", "disabled"), False, True),
+            ],
+            cancel=[Input("cancel_button", "n_clicks")],
+        )(create_charts)
+    else:
+        @app.callback(charts_outputs, charts_inputs, charts_states, prevent_initial_call=True)
+        def create_charts_sync(*args):
+            return create_charts(_no_progress, *args)
+
+    # Зум/панорама любого графика: видимый диапазон из массивов последнего Submit (charts_token),
+    # с полным разрешением, если помещается в CHART_MAX_POINTS, иначе снова прореженный
+    @app.callback(
+        Output({"type": "chart", "name": MATCH}, "figure"),
+        Input({"type": "chart", "name": MATCH}, "relayoutData"),
+        State({"type": "chart", "name": MATCH}, "id"),
+        State("charts_token", "data"),
+        prevent_initial_call=True,
+    )
+    def rescale_visible_range(relayout, graph_id, token):
+        x_range = relayout_range(relayout)
+        if x_range is None:
+            raise PreventUpdate
+        entry = chart_cache.get(token)
+        if entry is None:
+            # графики остаются прореженными — показываем, почему зум не уточнил их
+            patched = Patch()
+            patched["layout"]["annotations"] = [
+                dict(
+                    text=EXPIRED_NOTE,
+                    xref="paper",
+                    yref="paper",
+                    x=0.5,
+                    y=1.0,
+                    yanchor="bottom",
+                    showarrow=False,
+                    font=dict(color="#c92a2a", size=12),
+                    bgcolor="rgba(255,255,255,0.85)",
+                )
+            ]
+            return patched
+        traces = rescale_chart(entry, graph_id["name"], x_range)
+        if not traces:
+            raise PreventUpdate
+
+        patched = Patch()
+        patched["layout"]["annotations"] = []
+        for i, fields in traces.items():
+            for key, value in fields.items():
+                patched["data"][i][key] = typed_array(chart_x(value) if key == "x" else value)
+        return patched
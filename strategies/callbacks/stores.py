@@ -12,6 +12,7 @@ from strategies.strategies_helpful_functions import (
     handle_option_button_click,
     is_noop_trigger,
 )
+from strategies.strategies_spec import build_spec, export_spec, spec_hash
 import json
 
 
@@ -302,3 +303,21 @@ def register_callbacks(app):
                 return param_instances, stored_inputs
         # Ничего подходящего — без изменений
         return param_instances, stored_inputs
+
+    # Выгрузка текущей стратегии в каноническую спецификацию (strategies_spec)
+    @app.callback(
+        Output('spec_download', 'data'),
+        Input('export_spec_button', 'n_clicks'),
+        [
+            State('dropdown_indicators', 'value'),
+            State('stored_inputs', 'data'),
+            State('conditions_store_inputs', 'data'),
+            State('strategies_store', 'data'),
+        ],
+        prevent_initial_call=True
+    )
+    def export_strategy_spec(n_clicks, indicators, stored_inputs, conditions_store_inputs, strategies):
+        if not n_clicks:
+            raise PreventUpdate
+        spec = build_spec(indicators, stored_inputs, conditions_store_inputs, strategies or [])
+        return dict(content=export_spec(spec), filename=f"strategy_{spec_hash(spec)[:12]}.json")
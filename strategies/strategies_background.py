@@ -0,0 +1,23 @@
+from __future__ import annotations
+from typing import Optional
+from .strategies_constants import BACKGROUND_CALLBACKS, BACKGROUND_CACHE_DIR, BACKGROUND_RESULT_EXPIRE
+
+
+def get_background_manager(enabled: bool = BACKGROUND_CALLBACKS):
+    """
+    Менеджер фоновых callback-ов Dash на локальном diskcache (без брокера).
+    None — если режим выключен или не установлены diskcache / multiprocess / psutil:
+    тогда create_charts регистрируется как обычный callback.
+    """
+    if not enabled:
+        return None
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+
+        return DiskcacheManager(diskcache.Cache(BACKGROUND_CACHE_DIR), expire=BACKGROUND_RESULT_EXPIRE)
+    except ImportError:
+        return None
+
+
+background_callback_manager: Optional[object] = get_background_manager()
@@ -0,0 +1,190 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .strategies_conditions import compile_conditions, evaluate_signals
+from .strategies_indicators import compute_indicators, backtest_with_cached_indicators
+from .strategies_metrics import sharpe_sortino
+from .strategies_trades import build_ledger
+from .strategies_constants import INITIAL_BALANCE, BACKTEST_ENGINE, DEFAULT_BARS_PER_YEAR
+
+Batch = Dict[str, object]
+
+
+def _ffill_state(buy: np.ndarray, sell: np.ndarray) -> np.ndarray:
+    """
+    Состояние позиции (0/1) по сигналам для всех стратегий сразу, матрица (n_bars × n_strategies).
+    buy без sell -> 1, sell без buy -> 0, иначе состояние переносится с прошлого бара.
+    """
+    n, k = buy.shape
+    sig = np.full((n, k), -1, dtype=np.int8)
+    sig[buy & ~sell] = 1
+    sig[sell & ~buy] = 0
+    if n:
+        first = sig[0]
+        first[first < 0] = 0  # до первого сигнала — вне рынка
+    valid = sig >= 0
+    rows = np.where(valid, np.arange(n)[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return sig[rows, np.arange(k)[None, :]].astype(np.float64)
+
+
+def trade_events(deals: np.ndarray, close: np.ndarray, cum_returns: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Разреженные события сделок всех стратегий, отсортированные по (стратегия, бар):
+    bar, strategy (номер столбца), side (+1 вход / -1 выход), price (Close бара), cum (капитал).
+    offsets[j]:offsets[j + 1] — события стратегии j.
+    """
+    strategy, bar = np.nonzero(deals.T)
+    return {
+        "bar": bar,
+        "strategy": strategy,
+        "side": deals[bar, strategy],
+        "price": np.asarray(close, dtype=np.float64)[bar],
+        "cum": cum_returns[bar, strategy],
+        "offsets": np.searchsorted(strategy, np.arange(deals.shape[1] + 1)),
+    }
+
+
+def backtest_batch(
+    close: np.ndarray,
+    buy: np.ndarray,
+    sell: np.ndarray,
+    initial_balance: float = INITIAL_BALANCE,
+    periods_per_year: float = DEFAULT_BARS_PER_YEAR,
+) -> Batch:
+    """
+    Векторный long-only бэктест всех стратегий за один проход по матрицам (n_bars × n_strategies).
+    Позиция, открытая сигналом на баре t, получает доходность начиная с бара t + 1.
+    Возвращает массивы: positions, returns, cum_returns (множитель капитала), deals (+1 вход, -1 выход),
+    events (см. trade_events), final_balance, sharpe_ratio, sortino_ratio.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    state = _ffill_state(np.asarray(buy, dtype=bool), np.asarray(sell, dtype=bool))
+    n = len(close)
+
+    asset_ret = np.zeros(n)
+    if n > 1:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            asset_ret[1:] = close[1:] / close[:-1] - 1.0
+        asset_ret[~np.isfinite(asset_ret)] = 0.0
+
+    positions = np.zeros_like(state)
+    positions[1:] = state[:-1]
+    returns = positions * asset_ret[:, None]
+    cum_returns = np.cumprod(1.0 + returns, axis=0)
+
+    deals = np.zeros(state.shape, dtype=np.int8)
+    deals[1:] = np.diff(state, axis=0).astype(np.int8)
+    if n:
+        deals[0] = state[0].astype(np.int8)
+
+    final = cum_returns[-1] if n else np.ones(state.shape[1])
+    sharpe, sortino = sharpe_sortino(returns, periods_per_year)
+    return {
+        "positions": positions,
+        "returns": returns,
+        "cum_returns": cum_returns,
+        "deals": deals,
+        "events": trade_events(deals, close, cum_returns),
+        "final_balance": initial_balance * final,
+        "sharpe_ratio": sharpe,
+        "sortino_ratio": sortino,
+    }
+
+
+def signal_matrices(df: pd.DataFrame, conditions) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Условия всех стратегий -> (ids, buy, sell): матрицы сигналов (n_bars × n_strategies).
+    Стратегии без единого условия покупки пропускаются. KeyError — если условие
+    ссылается на колонку, которой нет в df.
+    """
+    compiled = tuple(s for s in compile_conditions(conditions) if s.buy)
+    ids: List[str] = [s.sid for s in compiled]
+    n = len(df)
+    buy = np.zeros((n, len(ids)), dtype=bool)
+    sell = np.zeros((n, len(ids)), dtype=bool)
+    for j, (b, s) in enumerate(evaluate_signals(df, compiled).values()):
+        buy[:, j] = b
+        sell[:, j] = s
+    return ids, buy, sell
+
+
+def run_batch_backtest(df: pd.DataFrame, conditions, periods_per_year: float = DEFAULT_BARS_PER_YEAR) -> Batch:
+    """Условия всех стратегий -> сигналы (signal_matrices) -> один бэктест на 2-D массивах."""
+    ids, buy, sell = signal_matrices(df, conditions)
+    batch = backtest_batch(df["Close"].to_numpy(dtype=np.float64), buy, sell, periods_per_year=periods_per_year)
+    batch["ids"] = ids
+    return batch
+
+
+def batch_from_results(results: Dict[str, Dict], df: pd.DataFrame) -> Batch:
+    """Результаты Indicator.backtest_all_strategies (колонки в df) -> та же форма, что у backtest_batch."""
+    ids = list(results.keys())
+    n, k = len(df), len(ids)
+    cum_returns = np.ones((n, k))
+    deals = np.zeros((n, k), dtype=np.int8)
+    for j, sid in enumerate(ids):
+        res = results[sid]
+        cum_returns[:, j] = df[res["cum_returns_column"]].to_numpy(dtype=np.float64)
+        if res["deal_column"] in df.columns:
+            deals[:, j] = df[res["deal_column"]].fillna(0).to_numpy().astype(np.int8)
+
+    returns = np.zeros((n, k))
+    if n > 1:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns[1:] = cum_returns[1:] / cum_returns[:-1] - 1.0
+        returns[~np.isfinite(returns)] = 0.0
+    positions = np.zeros((n, k))
+    if n > 1:
+        positions[1:] = np.clip(np.cumsum(deals, axis=0), 0, 1)[:-1]
+    return {
+        "ids": ids,
+        "positions": positions,
+        "returns": returns,
+        "cum_returns": cum_returns,
+        "deals": deals,
+        "events": trade_events(deals, df["Close"].to_numpy(dtype=np.float64), cum_returns),
+        "final_balance": np.array([float(results[sid]["final_balance"]) for sid in ids]),
+        "sharpe_ratio": np.array([float(results[sid]["sharpe_ratio"]) for sid in ids]),
+        "sortino_ratio": np.array([float(results[sid]["sortino_ratio"]) for sid in ids]),
+    }
+
+
+def run_backtest(
+    df: pd.DataFrame,
+    conditions,
+    indicator_names: List[str],
+    kwargs_map: Dict,
+    engine: Optional[str] = None,
+    debug: bool = False,
+    periods_per_year: float = DEFAULT_BARS_PER_YEAR,
+) -> Tuple[Batch, pd.DataFrame, Dict[str, List[str]]]:
+    """
+    Точка входа бэктеста для create_charts: (batch, df с индикаторами, added_cols).
+    engine="batch" (по умолчанию) — условия через compile_conditions / evaluate_signals и все стратегии
+    одним векторным проходом, с отличиями от legacy, перечисленными у BACKTEST_ENGINE; если условие
+    ссылается на колонку, которую не удаётся сопоставить с df, — engine="legacy":
+    Indicator.backtest_all_strategies.
+    batch["ledger"] — журнал сделок (strategies_trades.build_ledger).
+    """
+    engine = engine or BACKTEST_ENGINE
+    if engine == "batch":
+        enriched, added_cols = compute_indicators(df, indicator_names, kwargs_map)
+        try:
+            batch = run_batch_backtest(enriched, conditions, periods_per_year)
+            batch["ledger"] = build_ledger(batch, enriched)
+            return batch, enriched, added_cols
+        except KeyError:
+            pass
+
+    results, enriched, added_cols = backtest_with_cached_indicators(
+        df=df,
+        conditions=conditions,
+        indicator_names=indicator_names,
+        kwargs_map=kwargs_map,
+        debug=debug,
+    )
+    batch = batch_from_results(results, enriched)
+    batch["ledger"] = build_ledger(batch, enriched)
+    return batch, enriched, added_cols
@@ -1,7 +1,7 @@
 from dash import html, dcc
 import dash_mantine_components as dmc
 from datetime import date
-from .strategies_constants import today_str, df_coins, indicators_dict
+from .strategies_constants import today_str, df_coins, indicators_dict, INTERVAL_CODES, WALK_FORWARD_MODES, LIVE_POLL_MS
 
 strategies_header = html.Header([
         html.Div([
@@ -89,8 +89,7 @@ strategies_choose_strategies_field = dmc.Card(
                     ),
                     dcc.Dropdown(
                         id='dropdown_interval',
-                        options=[{'label': i, 'value': i} for i in
-                                 '1,3,5,15,30,60,120,240,360,720,D,W,M'.split(',')],
+                        options=[{'label': i, 'value': i} for i in INTERVAL_CODES],
                         value='720',
                         style={
                             # **input_style,
@@ -98,6 +97,17 @@ strategies_choose_strategies_field = dmc.Card(
                             "padding": "0 6px"
                         }
                     ),
+                    dcc.Dropdown(
+                        id='dropdown_walk_forward',
+                        options=[{'label': f'Walk-forward: {m}', 'value': m} for m in WALK_FORWARD_MODES],
+                        value='off',
+                        clearable=False,
+                        style={
+                            # **input_style,
+                            "height": "32px",
+                            "padding": "0 6px"
+                        }
+                    ),
                     dcc.Dropdown(
                         id='dropdown_indicators',
                         options=[{'label': indicator, 'value': indicator} for indicator in indicators_dict.keys()],
@@ -118,6 +128,79 @@ strategies_choose_strategies_field = dmc.Card(
                         color="blue",
                         size="md",
                         style={"height": "20px", "marginTop": "10px"}
+                    ),
+                    dmc.Button(
+                        'Export spec',
+                        id='export_spec_button',
+                        n_clicks=0,
+                        variant="subtle",
+                        color="gray",
+                        size="xs"
+                    ),
+                    dcc.Dropdown(
+                        df_coins['Symbol'].unique(),
+                        value=[],
+                        id='dropdown_portfolio_coins',
+                        multi=True,
+                        searchable=True,
+                        placeholder='Portfolio symbols',
+                        style={
+                            # **input_style,
+                            "padding": "0 6px"
+                        }
+                    ),
+                    dmc.Button(
+                        'Run portfolio',
+                        id='portfolio_button',
+                        n_clicks=0,
+                        variant="light",
+                        color="grape",
+                        size="xs"
+                    ),
+                    html.Div(
+                        id='portfolio_progress_box',
+                        children=[
+                            dmc.Progress(id='portfolio_progress', value=0, size="sm", animated=True),
+                            dmc.Group([
+                                dmc.Text(id='portfolio_progress_label', size="xs", c="dimmed"),
+                                dmc.Button(
+                                    'Cancel',
+                                    id='portfolio_cancel_button',
+                                    n_clicks=0,
+                                    disabled=True,
+                                    variant="subtle",
+                                    color="red",
+                                    size="xs"
+                                )
+                            ], justify="space-between")
+                        ],
+                        style={'display': 'none', 'marginTop': '10px'}
+                    ),
+                    dmc.Switch(
+                        id='live_switch',
+                        label='Live',
+                        checked=False,
+                        size="sm"
+                    ),
+                    dcc.Interval(id='live_interval', interval=LIVE_POLL_MS, disabled=True),
+                    html.Div(
+                        id='charts_progress_box',
+                        children=[
+                            dmc.Progress(id='charts_progress', value=0, size="sm", animated=True),
+                            dmc.Group([
+                                dmc.Text(id='charts_progress_label', size="xs", c="dimmed"),
+                                dmc.Button(
+                                    'Cancel',
+                                    id='cancel_button',
+                                    n_clicks=0,
+                                    disabled=True,
+                                    variant="subtle",
+                                    color="red",
+                                    size="xs"
+                                )
+                            ], justify="space-between")
+                        ],
+                        style={'display': 'none', 'marginTop': '10px'}
                     )
                 ])
             )
@@ -133,6 +216,8 @@ strategies_graphs = dcc.Loading(
         [
             html.H4(id='no_data_message', children=['Sorry. There is no data'], style={'visibility': 'hidden'}),
             html.H4(id='header', children=[]),
+            html.Div(id='graph_live_div', children=[]),
+            html.Div(id='graph_portfolio_div', children=[]),
             html.Div(id='graph_strategy_div', children=[]),
             html.Div(id='graph_coin_div', children=[]),
             html.Div(id='graphs_indicators', children=[])
@@ -140,6 +225,8 @@ strategies_graphs = dcc.Loading(
         target_components={
             'no_data_message': 'children',
             'header': 'children',
+            'graph_live_div': 'children',
+            'graph_portfolio_div': 'children',
             'graph_strategy_div': 'children',
             'graph_coin_div': 'children',
             'graphs_indicators': 'children'
@@ -248,6 +335,10 @@ stores = html.Div([
     dcc.Store(id="strategies_store", data=[{"id": 1, "conditions_store": {"buy": 1, "sell": 1}}], storage_type="memory"),
     dcc.Store(id="param_instances", data={}, storage_type="memory"),
     dcc.Store(id="indicator_inputs_ready", data=False),
+    dcc.Store(id="charts_token", storage_type="memory"),
+    dcc.Store(id="live_token", storage_type="memory"),
+    dcc.Download(id="trades_download"),
+    dcc.Download(id="spec_download"),
 ])
 
 # === BLOCK 6: Footer ===
@@ -0,0 +1,332 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+import threading
+import time
+import numpy as np
+import pandas as pd
+from calculate import Coin
+from .strategies_candle_store import ColumnarCandleStore
+from .strategies_constants import (
+    CANDLE_CACHE_MAX_BYTES,
+    CANDLE_TAIL_REFRESH_SECONDS,
+    CANDLE_STORE_DIR,
+)
+
+Loader = Callable[[str, str, str, str], pd.DataFrame]
+
+
+def _to_day(value) -> pd.Timestamp:
+    """Дата из date_picker ('2022-01-01' или '2022-01-01T00:00:00') -> начало дня."""
+    return pd.Timestamp(value).normalize()
+
+
+def _fmt_day(ts: pd.Timestamp) -> str:
+    return ts.strftime("%Y-%m-%d")
+
+
+def _coin_loader(symbol: str, start: str, end: str, interval: str) -> pd.DataFrame:
+    return Coin(symbol, start, end, interval).data
+
+
+class _CandleBuffer:
+    """
+    Колоночный буфер свечей одного (symbol, interval) с запасом ёмкости.
+    Новые свечи дописываются в свободный хвост массивов; история копируется, только когда кончилась
+    ёмкость (с удвоением) или перезаписывается последний бар (copy-on-write, см. append).
+    Кадры для callbacks собираются из срезов-представлений массивов.
+    Буфер может оборачивать memmap-массивы ColumnarCandleStore — тогда он ничего не копирует.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        n = len(frame)
+        capacity = max(n + n // 4, 64)
+        self.columns = list(frame.columns)
+        self.index_name = frame.index.name
+        self.tz = frame.index.tz
+        self.index = np.empty(capacity, dtype="datetime64[ns]")
+        self.index[:n] = self._naive(frame.index)
+        self.data: Dict[str, np.ndarray] = {}
+        for col in self.columns:
+            values = frame[col].to_numpy()
+            self.data[col] = np.empty(capacity, dtype=values.dtype)
+            self.data[col][:n] = values
+        self.size = n
+
+    @classmethod
+    def from_arrays(cls, index: np.ndarray, data: Dict[str, np.ndarray], index_name=None, tz=None) -> "_CandleBuffer":
+        """Оборачивает готовые массивы (например, memmap) без копирования."""
+        buffer = cls.__new__(cls)
+        buffer.columns = list(data.keys())
+        buffer.index_name = index_name
+        buffer.tz = tz
+        buffer.index = index
+        buffer.data = dict(data)
+        buffer.size = len(index)
+        return buffer
+
+    def _naive(self, index: pd.DatetimeIndex) -> np.ndarray:
+        return (index.tz_localize(None) if self.tz else index).values.astype("datetime64[ns]")
+
+    @property
+    def capacity(self) -> int:
+        return len(self.index)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.index.nbytes + sum(arr.nbytes for arr in self.data.values()))
+
+    @property
+    def last_ts(self) -> pd.Timestamp:
+        ts = pd.Timestamp(self.index[self.size - 1])
+        return ts.tz_localize(self.tz) if self.tz else ts
+
+    def _reallocate(self, capacity: int) -> None:
+        """Новые массивы с копией занятой части: старые остаются у уже выданных кадров."""
+        index = np.empty(capacity, dtype=self.index.dtype)
+        index[:self.size] = self.index[:self.size]
+        self.index = index
+        for col, arr in self.data.items():
+            grown = np.empty(capacity, dtype=arr.dtype)
+            grown[:self.size] = arr[:self.size]
+            self.data[col] = grown
+
+    def append(self, tail: pd.DataFrame) -> int:
+        """
+        Дописывает свечи начиная с last_ts: последний бар (ещё формирующаяся свеча) перезаписывается
+        свежей копией, более поздние добавляются. Возвращает число записанных строк.
+        tail должен содержать все колонки буфера. Кадры из frame() — представления массивов, поэтому
+        перезапись последнего бара идёт в новые массивы (copy-on-write): кадр, который сейчас
+        считается в другом запросе, не меняется. Новые бары пишутся в свободный хвост — его кадры не видят.
+        """
+        lo = self.size
+        if self.size:
+            tail = tail[tail.index >= self.last_ts]
+            if len(tail) and tail.index[0] == self.last_ts:
+                lo -= 1
+        n = len(tail)
+        if n == 0:
+            return 0
+        hi = lo + n
+        if lo < self.size or hi > self.capacity:
+            self._reallocate(max(self.capacity * 2, hi) if hi > self.capacity else self.capacity)
+        self.index[lo:hi] = self._naive(tail.index)
+        for col, arr in self.data.items():
+            arr[lo:hi] = tail[col].to_numpy()
+        self.size = hi
+        return n
+
+    def frame(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """Срез [start, end] по дням (end включительно) без булевых масок и без копий."""
+        index = self.index[:self.size]
+        lo = index.searchsorted(np.datetime64(start, "ns"), side="left")
+        hi = index.searchsorted(np.datetime64(end + pd.Timedelta(days=1), "ns"), side="left")
+        idx = pd.DatetimeIndex(index[lo:hi], name=self.index_name)
+        if self.tz:
+            idx = idx.tz_localize(self.tz)
+        return pd.DataFrame(
+            {col: self.data[col][lo:hi] for col in self.columns}, index=idx, copy=False
+        )
+
+
+class CandleCache:
+    """
+    Серверный кэш свечей по ключу (symbol, interval).
+    Для каждого ключа хранится самый широкий загруженный диапазон дат,
+    любой более узкий запрос (start, end) отдаётся срезом без обращения к Coin.
+    Если end сдвинулся вперёд (или диапазон заканчивается сегодня и давно не обновлялся),
+    догружаются только свечи после последней сохранённой и дописываются в буфер.
+    Вытеснение — LRU с ограничением по суммарному размеру в байтах.
+    С store (ColumnarCandleStore) буферы — это memmap на файлы хранилища: промах сначала
+    читается с диска, загрузки из Coin и догруженные хвосты сохраняются туда же.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = CANDLE_CACHE_MAX_BYTES,
+        loader: Loader = _coin_loader,
+        store: Optional[ColumnarCandleStore] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.tail_appends = 0
+        self._entries: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+
+    def get(self, symbol: str, start, end, interval: str) -> pd.DataFrame:
+        key = (symbol, str(interval))
+        start_ts, end_ts = _to_day(start), _to_day(end)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            covered = entry is not None and entry["start"] <= start_ts
+            if covered and end_ts <= entry["end"] and not self._tail_is_stale(entry, end_ts):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["buffer"].frame(start_ts, end_ts)
+        # загрузка из Coin — вне блокировки кэша: медленный символ не задерживает попадания по остальным
+        if covered and self._append_tail(key, entry, symbol, interval, end_ts):
+            return entry["buffer"].frame(start_ts, end_ts)
+
+        with self._lock:
+            self.misses += 1
+        # расширяем уже загруженный диапазон, а не заменяем его более узким
+        if entry is not None:
+            start_ts = min(start_ts, entry["start"])
+            end_ts = max(end_ts, entry["end"])
+        load_start, load_end = start_ts, end_ts
+
+        entry = self._entry_from_store(key, symbol, interval, load_start, load_end)
+        if entry is None:
+            frame, load_start, load_end = self._load(symbol, interval, load_start, load_end)
+            if frame is None or len(frame) == 0 or not isinstance(frame.index, pd.DatetimeIndex):
+                return frame if frame is not None else pd.DataFrame()
+            if not frame.index.is_monotonic_increasing:
+                frame = frame.sort_index()
+
+            buffer = None
+            if self.store is not None and self.store.write(symbol, str(interval), frame, load_start, load_end):
+                buffer = self._store_buffer(symbol, interval)
+            entry = {
+                "start": load_start,
+                "end": load_end,
+                "buffer": buffer or _CandleBuffer(frame),
+                "stored": buffer is not None,
+                "refreshed_at": time.monotonic(),
+            }
+            self._put(key, entry)
+        return entry["buffer"].frame(_to_day(start), _to_day(end))
+
+    def _load(self, symbol: str, interval: str, start: pd.Timestamp, end: pd.Timestamp):
+        """
+        Загрузка диапазона из Coin -> (frame, start, end). Если в хранилище уже есть история,
+        диапазон расширяется до объединения с ней, а из Coin грузятся только недостающие края:
+        store.write перезаписывает (symbol, interval) целиком и не должен сузить сохранённое.
+        """
+        meta = self.store.meta(symbol, str(interval)) if self.store is not None else None
+        buffer = self._store_buffer(symbol, interval) if meta else None
+        if buffer is None:
+            return self.loader(symbol, _fmt_day(start), _fmt_day(end), str(interval)), start, end
+        parts = [buffer.frame(meta["start"], meta["end"])]
+        if start < meta["start"]:
+            parts.append(self.loader(symbol, _fmt_day(start), _fmt_day(meta["start"]), str(interval)))
+        if end > meta["end"]:
+            parts.append(self.loader(symbol, _fmt_day(meta["end"]), _fmt_day(end), str(interval)))
+        parts = [p for p in parts if p is not None and len(p) and isinstance(p.index, pd.DatetimeIndex)]
+        frame = pd.concat(parts)
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()  # на стыках — свежие свечи из Coin
+        return frame, min(start, meta["start"]), max(end, meta["end"])
+
+    def _store_buffer(self, symbol: str, interval: str) -> Optional[_CandleBuffer]:
+        stored = self.store.read(symbol, str(interval))
+        if stored is None:
+            return None
+        index, data, meta = stored
+        return _CandleBuffer.from_arrays(index, data, index_name=meta.get("index_name"), tz=meta.get("tz"))
+
+    def _entry_from_store(self, key, symbol: str, interval: str, load_start, load_end) -> Optional[Dict]:
+        """Промах памяти: берём диапазон из хранилища, при необходимости догружаем только хвост."""
+        if self.store is None:
+            return None
+        meta = self.store.meta(symbol, str(interval))
+        if not meta or meta["start"] > load_start:
+            return None
+        buffer = self._store_buffer(symbol, interval)
+        if buffer is None:
+            return None
+        age = max(0.0, time.time() - float(meta.get("updated_at") or 0.0))
+        entry = {
+            "start": meta["start"],
+            "end": meta["end"],
+            "buffer": buffer,
+            "stored": True,
+            "refreshed_at": time.monotonic() - age,
+        }
+        if load_end > entry["end"] or self._tail_is_stale(entry, load_end):
+            if not self._append_tail(key, entry, symbol, interval, load_end):
+                return None
+        else:
+            self._put(key, entry)
+        return entry
+
+    @staticmethod
+    def _tail_is_stale(entry: Dict, end_ts: pd.Timestamp) -> bool:
+        """Диапазон до сегодняшнего дня ещё растёт — обновляем хвост не чаще раза в N секунд."""
+        if end_ts < pd.Timestamp.today().normalize():
+            return False
+        return time.monotonic() - entry["refreshed_at"] > CANDLE_TAIL_REFRESH_SECONDS
+
+    def _append_tail(self, key, entry: Dict, symbol: str, interval: str, end_ts: pd.Timestamp) -> bool:
+        """
+        Догружает свечи с последней сохранённой (она перезаписывается — могла ещё формироваться)
+        вместо полной перезагрузки диапазона. Coin и диск — без блокировки кэша, под ней только подмена буфера.
+        """
+        buffer: _CandleBuffer = entry["buffer"]
+        if buffer.size == 0:
+            return False
+        last_day = pd.Timestamp(buffer.index[buffer.size - 1]).normalize()
+        new_end = max(end_ts, entry["end"])
+        tail = self.loader(symbol, _fmt_day(last_day), _fmt_day(new_end), str(interval))
+        if tail is None or not isinstance(tail.index, pd.DatetimeIndex):
+            return False
+        if len(tail) and not set(buffer.columns) <= set(tail.columns):
+            return False  # хвост без части колонок не дописываем — диапазон перезагрузится целиком
+        if len(tail) and not tail.index.is_monotonic_increasing:
+            tail = tail.sort_index()
+        if entry.get("stored"):
+            self.store.append(symbol, str(interval), tail, new_end)
+            buffer = self._store_buffer(symbol, interval) or buffer
+        with self._lock:
+            if entry.get("stored"):
+                entry["buffer"] = buffer
+            else:
+                buffer.append(tail)
+            entry["end"] = max(new_end, entry["end"])
+            entry["refreshed_at"] = time.monotonic()
+            self.tail_appends += 1
+            self._put(key, entry)
+        return True
+
+    def _put(self, key: Tuple[str, str], entry: Dict) -> None:
+        nbytes = entry["buffer"].nbytes
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old["nbytes"]
+            entry["nbytes"] = nbytes
+            if entry["nbytes"] > self.max_bytes:
+                return  # одиночный буфер больше всего кэша — не кэшируем
+            self._entries[key] = entry
+            self._nbytes += entry["nbytes"]
+            while self._nbytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted["nbytes"]
+
+    def invalidate(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                if (symbol is None or key[0] == symbol) and (interval is None or key[1] == str(interval)):
+                    self._nbytes -= self._entries.pop(key)["nbytes"]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "tail_appends": self.tail_appends,
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+candle_cache = CandleCache(store=ColumnarCandleStore(CANDLE_STORE_DIR) if CANDLE_STORE_DIR else None)
+
+
+def load_candles(symbol: str, start, end, interval: str) -> pd.DataFrame:
+    """Свечи монеты за период — через общий кэш процесса вместо Coin(...) на каждый Submit."""
+    return candle_cache.get(symbol, start, end, interval)
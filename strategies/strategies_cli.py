@@ -0,0 +1,161 @@
+"""
+Пакетный бэктест без Dash: символы × интервалы × диапазоны дат × стратегии -> таблица метрик.
+
+    python -m strategies.strategies_cli --all-symbols --intervals 60 D \
+        --ranges 2023-01-01:2024-01-01 --strategy nightly/*.json --out scores.parquet
+
+Файл стратегии — спецификация (strategies_spec.export_spec, кнопка Export spec) или то же,
+что хранит UI: {"indicators": [...], "stored_inputs": {...}, "conditions_store_inputs": {...},
+"strategies": [...]} (strategies — strategies_store, нужен, если ключи условий с id стратегий).
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import glob
+import itertools
+import json
+import os
+import sys
+import pandas as pd
+from .strategies_backtest import run_backtest
+from .strategies_candles import load_candles
+from .strategies_executor import MP_CONTEXT
+from .strategies_helpful_functions import group_params, relabel_conditions, replace_ids_with_names
+from .strategies_metrics import summary_metrics, periods_per_year
+from .strategies_spec import build_spec, import_spec, spec_hash, spec_to_inputs, SPEC_VERSION
+from .strategies_sweep import expand_param_grid, params_label
+from .strategies_constants import df_coins, today_str, BACKTEST_ENGINE
+
+Job = Tuple[str, str, str, str, List[Tuple[str, Dict[str, Any]]], str]
+
+
+def load_strategy_file(path: str) -> Dict[str, Any]:
+    """Файл стратегии (спецификация или формат UI) -> спецификация."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: strategy file must contain a JSON object, got {type(data).__name__}")
+    if data.get("version") == SPEC_VERSION:
+        return import_spec(text)
+    conditions = data.get("conditions_store_inputs") or {}
+    if data.get("strategies"):
+        conditions = replace_ids_with_names(conditions, data["strategies"])
+    indicators = data.get("indicators") or sorted({k.split("__", 1)[0] for k in data.get("stored_inputs") or {}})
+    return build_spec(indicators, data.get("stored_inputs"), conditions)
+
+
+def _parse_range(text: str) -> Tuple[str, str]:
+    """'2023-01-01:2024-01-01' / '2023-01-01:' (до сегодня)."""
+    start, _, end = text.partition(":")
+    if not start:
+        raise argparse.ArgumentTypeError(f"Bad date range: {text!r}")
+    return start, end or today_str
+
+
+def _run_job(job: Job) -> List[Dict[str, Any]]:
+    """Одна пара (символ, интервал, диапазон): свечи грузятся один раз на все стратегии и комбинации."""
+    symbol, interval, start, end, specs, engine = job
+    base = {"symbol": symbol, "interval": interval, "start": start, "end": end}
+    try:
+        candles = load_candles(symbol, start, end, interval)
+    except Exception as exc:
+        return [{**base, "error": f"load: {exc}"}]
+    if len(candles) == 0:
+        return [{**base, "error": "no data"}]
+
+    bars_per_year = periods_per_year(interval)
+    rows: List[Dict[str, Any]] = []
+    for spec_name, spec in specs:
+        indicators, stored_inputs, conditions = spec_to_inputs(spec)
+        combos, swept, _ = expand_param_grid(stored_inputs)
+        for combo in combos:
+            row_base = {**base, "spec": spec_name, "spec_hash": spec_hash(spec), "params": params_label(combo, swept)}
+            try:
+                batch, _, _ = run_backtest(
+                    candles.copy(),
+                    relabel_conditions(conditions, combo),
+                    indicators,
+                    group_params(combo),
+                    engine=engine,
+                    periods_per_year=bars_per_year,
+                )
+            except Exception as exc:
+                rows.append({**row_base, "error": str(exc)})
+                continue
+            metrics = summary_metrics(batch, bars_per_year)
+            rows.extend(
+                {"strategy": sid, **row_base, **{name: float(values[j]) for name, values in metrics.items()}}
+                for j, sid in enumerate(batch["ids"])
+            )
+    return rows
+
+
+def run_batch(
+    symbols: List[str],
+    intervals: List[str],
+    ranges: List[Tuple[str, str]],
+    specs: List[Tuple[str, Dict[str, Any]]],
+    workers: int = os.cpu_count() or 1,
+    engine: str = BACKTEST_ENGINE,
+) -> pd.DataFrame:
+    """Все сочетания символ × интервал × диапазон в пуле процессов -> DataFrame метрик (строка на стратегию)."""
+    jobs: List[Job] = [
+        (symbol, str(interval), start, end, specs, engine)
+        for symbol, interval, (start, end) in itertools.product(symbols, intervals, ranges)
+    ]
+    parallel = workers > 1 and len(jobs) > 1
+    rows: List[Dict[str, Any]] = []
+    pool_ctx = ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=MP_CONTEXT) if parallel else nullcontext()
+    with pool_ctx as pool:
+        chunks = pool.map(_run_job, jobs) if parallel else map(_run_job, jobs)
+        for done, (job, chunk) in enumerate(zip(jobs, chunks), start=1):
+            rows.extend(chunk)
+            print(f"[{done}/{len(jobs)}] {job[0]} {job[1]} {job[2]}..{job[3]}", file=sys.stderr)
+    return pd.DataFrame(rows)
+
+
+def write_metrics(frame: pd.DataFrame, path: str) -> None:
+    """.parquet (нужен pyarrow или fastparquet) или .csv — по расширению."""
+    if path.lower().endswith(".parquet"):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m strategies.strategies_cli", description=__doc__.split("\n\n")[0].strip())
+    symbols = parser.add_mutually_exclusive_group(required=True)
+    symbols.add_argument("--symbols", nargs="+", help="тикеры, например BTCUSDT ETHUSDT")
+    symbols.add_argument("--all-symbols", action="store_true", help="все символы из need_files/Symbols_mini.csv")
+    parser.add_argument("--intervals", nargs="+", default=["D"], help="коды интервалов, как в dropdown_interval")
+    parser.add_argument("--ranges", nargs="+", type=_parse_range, required=True, help="START:END, END можно опустить")
+    parser.add_argument("--strategy", nargs="+", required=True, help="файлы стратегий (JSON), можно glob")
+    parser.add_argument("--out", required=True, help="куда писать метрики: .parquet или .csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--engine", choices=["batch", "legacy"], default=BACKTEST_ENGINE,
+                        help="batch — векторный проход по всем стратегиям (по умолчанию, STRATEGIES_BACKTEST_ENGINE); "
+                             "legacy — Indicator.backtest_all_strategies (колонки индикаторов — через общий кэш, как в UI)")
+    args = parser.parse_args(argv)
+
+    paths = sorted({p for pattern in args.strategy for p in (glob.glob(pattern) or [pattern])})
+    try:
+        specs = [(os.path.splitext(os.path.basename(p))[0], load_strategy_file(p)) for p in paths]
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    universe = df_coins["Symbol"].unique().tolist() if args.all_symbols else args.symbols
+
+    frame = run_batch(universe, args.intervals, args.ranges, specs, workers=args.workers, engine=args.engine)
+    try:
+        write_metrics(frame, args.out)
+    except ImportError as exc:
+        print(f"Cannot write {args.out}: {exc}. Use a .csv output or install pyarrow.", file=sys.stderr)
+        return 1
+    print(f"{len(frame)} rows -> {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
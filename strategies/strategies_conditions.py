@@ -0,0 +1,187 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Операторы условий -> ufunc (результат пишется в заранее выделенный буфер через out=)
+UFUNC_OPS = {
+    ">": np.greater,
+    "<": np.less,
+    "=": np.equal,
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    "!=": np.not_equal,
+}
+
+SIDES = ("buy", "sell")
+
+# ("col", value, raw) | ("const", number)
+Ref = Tuple
+Clause = Tuple[Ref, str, Ref]
+Tree = Tuple[Tuple[str, Tuple[Clause, ...], Tuple[Clause, ...]], ...]
+
+
+def _split_key(key: str) -> Optional[Tuple[str, str, int]]:
+    """'1_buy_0' / 'My_strategy_sell_2' -> (sid, side, idx)."""
+    parts = str(key).rsplit("_", 2)
+    if len(parts) != 3 or parts[1] not in SIDES:
+        return None
+    try:
+        return parts[0], parts[1], int(parts[2])
+    except ValueError:
+        return None
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _normalize_clause(cond: Dict[str, Any]) -> Optional[Clause]:
+    """Условие из conditions_store_inputs -> (lhs, op, rhs); незаполненные условия -> None."""
+    if not cond:
+        return None
+    column = cond.get("column")
+    op = cond.get("comparison_operator") or cond.get("operator")
+    right = cond.get("column_or_custom")
+    if not column or op not in UFUNC_OPS or not right:
+        return None
+
+    lhs = ("col", column, cond.get("column_raw") or column)
+    if right == "custom":
+        number = _to_number(cond.get("custom"))
+        if number is None:
+            return None
+        rhs = ("const", number)
+    else:
+        rhs = ("col", right, cond.get("column_or_custom_raw") or right)
+    return lhs, op, rhs
+
+
+def normalize_conditions(conditions: Optional[Dict[str, Dict[str, Any]]]) -> Tree:
+    """
+    Нормализованное дерево условий: подписи (*_label) и пустые карточки отбрасываются,
+    *_raw остаются третьим элементом ссылки на колонку — запасное имя для resolve_column.
+    Условия внутри стороны сортируются (И — коммутативно), поэтому одинаковые наборы условий
+    дают одно и то же дерево -> один объект CompiledStrategy из кэша.
+    """
+    grouped: Dict[str, Dict[str, set]] = {}
+    for key, cond in (conditions or {}).items():
+        parsed = _split_key(key)
+        if parsed is None:
+            continue
+        sid, side, _ = parsed
+        bucket = grouped.setdefault(sid, {s: set() for s in SIDES})
+        clause = _normalize_clause(cond or {})
+        if clause is not None:
+            bucket[side].add(clause)
+    return tuple(
+        (sid, tuple(sorted(sides["buy"], key=repr)), tuple(sorted(sides["sell"], key=repr)))
+        for sid, sides in grouped.items()
+    )
+
+
+def resolve_column(ref: Ref, columns) -> str:
+    """Имя колонки df для ссылки условия: value, затем raw, затем value без префикса индикатора."""
+    _, value, raw = ref
+    candidates = [value, raw]
+    if isinstance(value, str) and "_" in value:
+        candidates.append(value.split("_", 1)[1])
+    for cand in candidates:
+        if cand in columns:
+            return cand
+    raise KeyError(f"Column for condition not found: {value!r}")
+
+
+class CompiledStrategy:
+    """
+    Нормализованные условия одной стратегии, которые evaluate считает векторно: каждое сравнение
+    пишет в общий булев буфер, стороны сворачиваются логическим И in-place, без промежуточных pandas Series.
+    Кода здесь не генерируется — «компиляция» это нормализация дерева и кэш готовых объектов;
+    имена колонок разрешаются при evaluate, потому что набор колонок df известен только тогда.
+    """
+
+    __slots__ = ("sid", "buy", "sell")
+
+    def __init__(self, sid: str, buy: Tuple[Clause, ...], sell: Tuple[Clause, ...]):
+        self.sid = sid
+        self.buy = buy
+        self.sell = sell
+
+    @staticmethod
+    def _operand(ref: Ref, arrays: Mapping[str, np.ndarray], columns):
+        if ref[0] == "const":
+            return ref[1]
+        return arrays[resolve_column(ref, columns)]
+
+    def _side(self, clauses, arrays, columns, n: int, memo: Dict) -> np.ndarray:
+        mask = np.zeros(n, dtype=bool) if not clauses else np.ones(n, dtype=bool)
+        for clause in clauses:
+            hit = memo.get(clause)
+            if hit is None:
+                lhs, op, rhs = clause
+                hit = np.empty(n, dtype=bool)
+                with np.errstate(invalid="ignore"):
+                    UFUNC_OPS[op](self._operand(lhs, arrays, columns), self._operand(rhs, arrays, columns), out=hit)
+                memo[clause] = hit
+            np.logical_and(mask, hit, out=mask)
+        return mask
+
+    def evaluate(self, arrays: Mapping[str, np.ndarray], n: int, memo: Optional[Dict] = None):
+        """-> (buy_mask, sell_mask) длины n."""
+        memo = {} if memo is None else memo
+        columns = arrays.keys()
+        return (
+            self._side(self.buy, arrays, columns, n, memo),
+            self._side(self.sell, arrays, columns, n, memo),
+        )
+
+
+@lru_cache(maxsize=512)
+def _compile_tree(tree: Tree) -> Tuple[CompiledStrategy, ...]:
+    return tuple(CompiledStrategy(sid, buy, sell) for sid, buy, sell in tree)
+
+
+def compile_conditions(conditions: Optional[Dict[str, Dict[str, Any]]]) -> Tuple[CompiledStrategy, ...]:
+    """conditions_store_inputs -> CompiledStrategy по стратегиям (кэш по нормализованному дереву)."""
+    return _compile_tree(normalize_conditions(conditions))
+
+
+class _ColumnArrays(Mapping):
+    """Ленивый доступ к колонкам df как к float64-массивам (конвертация один раз на колонку)."""
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, col: str) -> np.ndarray:
+        arr = self._arrays.get(col)
+        if arr is None:
+            arr = self._df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            self._arrays[col] = arr
+        return arr
+
+    def __iter__(self):
+        return iter(self._df.columns)
+
+    def __len__(self) -> int:
+        return len(self._df.columns)
+
+    def __contains__(self, col) -> bool:
+        return col in self._df.columns
+
+
+def evaluate_signals(df: pd.DataFrame, conditions) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    {sid: (buy_mask, sell_mask)} для всех стратегий. Одинаковые условия у разных стратегий
+    вычисляются один раз. KeyError — если условие ссылается на отсутствующую колонку.
+    """
+    compiled = conditions if isinstance(conditions, tuple) else compile_conditions(conditions)
+    arrays = _ColumnArrays(df)
+    memo: Dict = {}
+    return {strategy.sid: strategy.evaluate(arrays, len(df), memo) for strategy in compiled}
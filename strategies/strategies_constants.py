@@ -61,8 +61,6 @@ Key = str
 Store = Dict[Key, Dict[str, Any]]
 StrategyList = List[Dict[str, Any]]
 
-submit_clicks = {"click": 0}
-
 df_output_parameters = pd.read_csv(
     os.path.join(
         os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
@@ -73,7 +71,89 @@ df_output_parameters = pd.read_csv(
 
 today_str = dt.date.today().strftime("%Y-%m-%d")
 
+# Интервалы свечей (dropdown_interval): код -> длина бара в минутах; месяц — 1/12 года.
+# Рынок работает 24/7, поэтому год — 365 полных дней
+INTERVAL_CODES = '1,3,5,15,30,60,120,240,360,720,D,W,M'.split(',')
+MINUTES_PER_YEAR = 365 * 24 * 60
+INTERVAL_MINUTES = {
+    **{code: float(code) for code in INTERVAL_CODES if code.isdigit()},
+    "D": 24 * 60.0,
+    "W": 7 * 24 * 60.0,
+    "M": MINUTES_PER_YEAR / 12,
+}
+# Баров в году по интервалу — для годовых метрик (CAGR, Sharpe, Sortino, turnover)
+INTERVAL_BARS_PER_YEAR = {code: MINUTES_PER_YEAR / minutes for code, minutes in INTERVAL_MINUTES.items()}
+DEFAULT_BARS_PER_YEAR = 252.0
+
 df_coins = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'need_files', 'Symbols_mini.csv'))
 
 with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'need_files', 'indicator_list.txt'), 'r') as f:
     indicators_dict = json.loads(f.read())
+
+# Серверный кэш свечей (strategies_candles.CandleCache): лимит в байтах на процесс
+CANDLE_CACHE_MAX_BYTES = int(os.environ.get("STRATEGIES_CANDLE_CACHE_MB", "512")) * 1024 * 1024
+# Как часто (сек) догружать хвост свечей для диапазона, заканчивающегося сегодня
+CANDLE_TAIL_REFRESH_SECONDS = int(os.environ.get("STRATEGIES_CANDLE_TAIL_REFRESH", "60"))
+# Каталог для данных на диске (хранилище свечей, фоновые задачи, живые ленты) — вне дерева репозитория
+CACHE_DIR = os.environ.get("STRATEGIES_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "strategies"))
+# Колоночное хранилище свечей на диске (memmap); пустая строка — отключить
+CANDLE_STORE_DIR = os.environ.get("STRATEGIES_CANDLE_STORE", os.path.join(CACHE_DIR, "candle_store"))
+# Кэш колонок индикаторов (strategies_indicators): "0" — отключить
+INDICATOR_CACHE_ENABLED = os.environ.get("STRATEGIES_INDICATOR_CACHE", "1") != "0"
+INDICATOR_CACHE_MAX_BYTES = int(os.environ.get("STRATEGIES_INDICATOR_CACHE_MB", "256")) * 1024 * 1024
+# Расчёт индикаторов: "batch" — calculate.Indicator, "online" — онлайн-версии (strategies_online),
+# где они есть (SMA, EMA, RSI, ADX, BBANDS, CCI), "plan" — граф с общими промежуточными узлами
+# (strategies_indicator_plan); индикаторы без своей версии — как в "batch"
+INDICATOR_ENGINE = os.environ.get("STRATEGIES_INDICATOR_ENGINE", "batch")
+# Бэктест стратегий: "batch" (по умолчанию) — условия всех стратегий векторно (strategies_conditions),
+# затем один проход по матрицам сигналов (strategies_backtest.backtest_batch); сверка с построчным
+# бэктестом — tests/test_backtest.py. "legacy" — calculate.Indicator.backtest_all_strategies, туда же
+# batch уходит, если условие ссылается на колонку, которой нет в df. Отличия batch от legacy:
+#   - стартовый капитал — INITIAL_BALANCE, а не тот, что задаёт calculate;
+#   - позиция по сигналу бара t получает доходность с бара t + 1;
+#   - Sharpe/Sortino — strategies_metrics.sharpe_sortino (годовые, по periods_per_year интервала);
+#   - стратегии без условий покупки не попадают в результат.
+# Перебор параметров, walk-forward и живой режим всегда считают по правилам batch.
+BACKTEST_ENGINE = os.environ.get("STRATEGIES_BACKTEST_ENGINE", "batch")
+INITIAL_BALANCE = float(os.environ.get("STRATEGIES_INITIAL_BALANCE", "10000"))
+# Перебор параметров индикаторов (strategies_sweep)
+SWEEP_MAX_COMBINATIONS = int(os.environ.get("STRATEGIES_SWEEP_MAX_COMBINATIONS", "500"))
+SWEEP_WORKERS = int(os.environ.get("STRATEGIES_SWEEP_WORKERS", str(os.cpu_count() or 1)))
+# Исполнитель бэктеста (strategies_executor): "inline" — в потоке запроса, "process" — в пуле процессов
+BACKTEST_EXECUTOR = os.environ.get("STRATEGIES_BACKTEST_EXECUTOR", "inline")
+BACKTEST_WORKERS = int(os.environ.get("STRATEGIES_BACKTEST_WORKERS", "2"))
+BACKTEST_TIMEOUT = float(os.environ.get("STRATEGIES_BACKTEST_TIMEOUT", "120"))
+# Фоновый режим create_charts (Dash background callback через diskcache): "1" — включить
+BACKGROUND_CALLBACKS = os.environ.get("STRATEGIES_BACKGROUND_CALLBACKS", "0") == "1"
+BACKGROUND_CACHE_DIR = os.environ.get("STRATEGIES_BACKGROUND_CACHE", os.path.join(CACHE_DIR, "background_cache"))
+BACKGROUND_RESULT_EXPIRE = int(os.environ.get("STRATEGIES_BACKGROUND_EXPIRE", "3600"))
+# Максимум точек на трассу графика (примерно ширина графика в пикселях); длиннее — прореживаем
+CHART_MAX_POINTS = int(os.environ.get("STRATEGIES_CHART_MAX_POINTS", "2000"))
+# Массивы графиков последнего Submit для зума (strategies_figures.chart_cache)
+CHART_CACHE_MAX_BYTES = int(os.environ.get("STRATEGIES_CHART_CACHE_MB", "256")) * 1024 * 1024
+# Линии и маркеры через WebGL (go.Scattergl): "1" — включить
+CHART_WEBGL = os.environ.get("STRATEGIES_CHART_WEBGL", "0") == "1"
+# Массивы фигур — base64 typed arrays вместо JSON-списков чисел: "0" — отключить
+CHART_BINARY_ARRAYS = os.environ.get("STRATEGIES_CHART_BINARY_ARRAYS", "1") != "0"
+# Журнал сделок: строк на странице таблицы
+TRADES_PAGE_SIZE = 20
+# Кэш результатов Submit целиком (strategies_result_cache): срок жизни и лимит в байтах
+RESULT_CACHE_TTL = int(os.environ.get("STRATEGIES_RESULT_CACHE_TTL", "900"))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("STRATEGIES_RESULT_CACHE_MB", "128")) * 1024 * 1024
+# Walk-forward (strategies_walkforward): число окон, доля обучающей части, режимы окон в UI
+WALK_FORWARD_WINDOWS = int(os.environ.get("STRATEGIES_WALK_FORWARD_WINDOWS", "4"))
+WALK_FORWARD_TRAIN_RATIO = float(os.environ.get("STRATEGIES_WALK_FORWARD_TRAIN_RATIO", "0.75"))
+WALK_FORWARD_MODES = ["off", "rolling", "anchored"]
+# Портфельный режим (strategies_portfolio): процессов на расчёт символов и потоков на загрузку свечей
+PORTFOLIO_WORKERS = int(os.environ.get("STRATEGIES_PORTFOLIO_WORKERS", str(os.cpu_count() or 1)))
+PORTFOLIO_LOAD_THREADS = int(os.environ.get("STRATEGIES_PORTFOLIO_LOAD_THREADS", "8"))
+# Живой режим (strategies_live): источник свечей — файл, который дописывает внешний процесс,
+# или локальный сокет "tcp://host:port"; {symbol} и {interval} подставляются
+LIVE_FEED = os.environ.get("STRATEGIES_LIVE_FEED", os.path.join(CACHE_DIR, "live", "{symbol}_{interval}.csv"))
+LIVE_POLL_MS = int(os.environ.get("STRATEGIES_LIVE_POLL_MS", "1000"))
+# Сколько последних баров держат живые графики и сколько баров пересчитывают индикаторы без онлайн-версии
+LIVE_WINDOW_BARS = int(os.environ.get("STRATEGIES_LIVE_WINDOW_BARS", "500"))
+LIVE_FALLBACK_BARS = int(os.environ.get("STRATEGIES_LIVE_FALLBACK_BARS", "500"))
+# Живые сессии хранятся в памяти процесса (strategies_live.live_sessions): сервер с живым режимом —
+# один процесс-воркер (gunicorn -w 1 --threads N), иначе тик может попасть в воркер без сессии
+LIVE_MAX_SESSIONS = int(os.environ.get("STRATEGIES_LIVE_MAX_SESSIONS", "8"))
@@ -0,0 +1,185 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_all_start_methods, get_context, shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+import queue
+import numpy as np
+import pandas as pd
+from .strategies_backtest import run_backtest
+from .strategies_constants import BACKTEST_EXECUTOR, BACKTEST_WORKERS, BACKTEST_TIMEOUT, DEFAULT_BARS_PER_YEAR
+
+
+class BacktestError(Exception):
+    """Бэктест в пуле процессов не выполнен; текст — для пользователя."""
+
+
+class BacktestTimeout(BacktestError):
+    """Бэктест не уложился в BACKTEST_TIMEOUT секунд."""
+
+
+class BacktestWorkerLost(BacktestError):
+    """Процесс-воркер упал (и при повторе на новом процессе тоже)."""
+
+
+# =========================================================
+# === Свечи в shared memory
+# =========================================================
+def publish_candles(df: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """
+    Кладёт свечи в один блок shared memory: время int64 (нс), затем колонки float64, каждая подряд.
+    Возвращает (блок, дескриптор). Дескриптор маленький и передаётся воркерам вместо самих данных;
+    блок должен освободить публикующий процесс (release_candles).
+    """
+    rows, columns = len(df), list(df.columns)
+    shm = shared_memory.SharedMemory(create=True, size=max(rows * 8 * (len(columns) + 1), 1))
+    index = df.index.tz_localize(None) if getattr(df.index, "tz", None) is not None else df.index
+    np.ndarray((rows,), dtype=np.int64, buffer=shm.buf)[:] = index.values.astype("datetime64[ns]").view(np.int64)
+    for i, col in enumerate(columns, start=1):
+        np.ndarray((rows,), dtype=np.float64, buffer=shm.buf, offset=rows * 8 * i)[:] = df[col].to_numpy(dtype=np.float64)
+    desc = {
+        "name": shm.name,
+        "rows": rows,
+        "columns": columns,
+        "tz": str(df.index.tz) if getattr(df.index, "tz", None) is not None else None,
+        "index_name": df.index.name,
+    }
+    return shm, desc
+
+
+def attach_candles(desc: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, pd.DataFrame]:
+    """В воркере: DataFrame-представление свечей поверх shared memory, без копирования."""
+    try:
+        shm = shared_memory.SharedMemory(name=desc["name"], track=False)
+    except TypeError:  # Python < 3.13: resource_tracker общий с родителем, повторная регистрация безвредна
+        shm = shared_memory.SharedMemory(name=desc["name"])
+    rows = desc["rows"]
+    times = np.ndarray((rows,), dtype=np.int64, buffer=shm.buf).view("datetime64[ns]")
+    index = pd.DatetimeIndex(times, name=desc.get("index_name"))
+    if desc.get("tz"):
+        index = index.tz_localize(desc["tz"])
+    data = {
+        col: np.ndarray((rows,), dtype=np.float64, buffer=shm.buf, offset=rows * 8 * i)
+        for i, col in enumerate(desc["columns"], start=1)
+    }
+    return shm, pd.DataFrame(data, index=index, copy=False)
+
+
+def release_candles(shm: Optional[shared_memory.SharedMemory], unlink: bool = False) -> None:
+    if shm is None:
+        return
+    try:
+        shm.close()
+    except BufferError:
+        pass  # на буфер ещё есть ссылки — отображение закроется вместе с процессом
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# =========================================================
+# === Исполнитель бэктеста
+# =========================================================
+# Процессы расчёта — от forkserver (или spawn), а не fork: fork из многопоточного сервера Dash
+# копирует блокировки (CandleCache, ByteLRU), которые в этот момент мог держать другой поток.
+# Общий для всех пулов процессов (исполнитель, перебор, портфель, CLI)
+MP_CONTEXT = get_context("forkserver" if "forkserver" in get_all_start_methods() else "spawn")
+
+
+def terminate_pool(pool: ProcessPoolExecutor) -> None:
+    """Завершает процессы пула, не дожидаясь их задач (таймаут), и отменяет очередь."""
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _backtest_job(
+    desc: Dict[str, Any], conditions, indicator_names: List[str], kwargs_map: Dict, periods_per_year: float
+) -> Dict[str, Any]:
+    """
+    Выполняется в воркере. Назад уходят только компактные массивы: batch и колонки индикаторов,
+    сам df со свечами не сериализуется.
+    """
+    shm, candles = attach_candles(desc)
+    try:
+        batch, df, added_cols = run_backtest(
+            candles, conditions, indicator_names, kwargs_map, periods_per_year=periods_per_year
+        )
+        indicator_values = {
+            col: df[col].to_numpy(dtype=np.float64, copy=True)
+            for cols in added_cols.values()
+            for col in cols
+        }
+        del df, candles
+        return {"batch": batch, "added_cols": added_cols, "indicators": indicator_values}
+    finally:
+        release_candles(shm)
+
+
+class BacktestExecutor:
+    """
+    Подключаемый исполнитель бэктеста для create_charts.
+    kind="inline"  — в текущем потоке (как раньше);
+    kind="process" — в процессах: свечи публикуются в shared memory один раз на задачу,
+    ответ — массивы результата. Каждый из max_workers процессов — отдельный однопроцессный пул
+    («полоса»), задача занимает полосу целиком. По таймауту завершается только процесс этой задачи
+    и полоса пересоздаётся — задачи других запросов на своих полосах не затрагиваются.
+    """
+
+    def __init__(self, kind: str = BACKTEST_EXECUTOR, max_workers: int = BACKTEST_WORKERS, timeout: float = BACKTEST_TIMEOUT):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # свободные полосы; None — полоса ещё не создана (или её процесс завершён)
+        self._lanes: "queue.Queue[Optional[ProcessPoolExecutor]]" = queue.Queue()
+        for _ in range(max(1, max_workers)):
+            self._lanes.put(None)
+
+    def run_backtest(
+        self,
+        candles: pd.DataFrame,
+        conditions,
+        indicator_names: List[str],
+        kwargs_map: Dict,
+        periods_per_year: float = DEFAULT_BARS_PER_YEAR,
+    ):
+        """-> (batch, df с индикаторами, added_cols) — как strategies_backtest.run_backtest."""
+        if self.kind != "process":
+            return run_backtest(
+                candles.copy(), conditions, indicator_names, kwargs_map, debug=True, periods_per_year=periods_per_year
+            )
+
+        try:
+            lane = self._lanes.get(timeout=self.timeout)
+        except queue.Empty:
+            raise BacktestTimeout(f"All backtest workers are busy for {self.timeout:g} s")
+        shm, desc = publish_candles(candles)
+        try:
+            for _ in range(2):  # упавший процесс (BrokenProcessPool) — один повтор на новой полосе
+                lane = lane or ProcessPoolExecutor(max_workers=1, mp_context=MP_CONTEXT)
+                try:
+                    future = lane.submit(_backtest_job, desc, conditions, indicator_names, kwargs_map, periods_per_year)
+                    out = future.result(timeout=self.timeout)
+                    break
+                except FutureTimeout:
+                    terminate_pool(lane)
+                    lane = None
+                    raise BacktestTimeout(f"Backtest did not finish in {self.timeout:g} s")
+                except BrokenProcessPool:
+                    lane.shutdown(wait=False, cancel_futures=True)
+                    lane = None
+            else:
+                raise BacktestWorkerLost("Backtest worker process exited unexpectedly")
+        finally:
+            self._lanes.put(lane)
+            release_candles(shm, unlink=True)
+
+        df = candles
+        if out["indicators"]:
+            df = pd.concat([candles, pd.DataFrame(out["indicators"], index=candles.index)], axis=1)
+        return out["batch"], df, out["added_cols"]
+
+
+backtest_executor = BacktestExecutor()
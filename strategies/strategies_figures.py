@@ -0,0 +1,259 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+import base64
+import os
+import uuid
+import numpy as np
+import pandas as pd
+from .strategies_lru import ByteLRU
+from .strategies_constants import (
+    CHART_MAX_POINTS,
+    CHART_BINARY_ARRAYS,
+    CHART_CACHE_MAX_BYTES,
+    BACKGROUND_CALLBACKS,
+    BACKGROUND_CACHE_DIR,
+)
+
+
+# =========================================================
+# === Прореживание рядов
+# =========================================================
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: индексы n_out точек, визуально повторяющих линию (x, y).
+    Первая и последняя точки сохраняются; из каждой корзины берётся точка с максимальной
+    площадью треугольника с выбранной точкой слева и средним следующей корзины.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    bounds = np.append(edges, n)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        nlo, nhi = bounds[i + 1], bounds[i + 2]
+        cx = x[nlo:nhi].mean()
+        cy = y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area)) if hi > lo else lo
+        out[i + 1] = a
+    return out
+
+
+def _x_numeric(index) -> np.ndarray:
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(np.float64)
+    return np.asarray(index, dtype=np.float64)
+
+
+def downsample_line(index, y, max_points: int = CHART_MAX_POINTS) -> Tuple[Any, np.ndarray]:
+    """
+    (x, y) линии не длиннее max_points точек (LTTB). NaN (разгон индикатора) отбрасываются:
+    на графике линия всё равно начинается с первого конечного значения.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= max_points:
+        return index, y
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) == 0:
+        return index[:0], y[:0]
+    keep = finite[lttb_indices(_x_numeric(index[finite]), y[finite], max_points)]
+    return index[keep], y[keep]
+
+
+def downsample_ohlc(df: pd.DataFrame, max_points: int = CHART_MAX_POINTS) -> pd.DataFrame:
+    """
+    OHLC-агрегация в не более чем max_points свечей: open первой, high/low — максимум/минимум,
+    close последней свечи корзины; время — начало корзины.
+    """
+    n = len(df)
+    if n <= max_points:
+        return df
+    starts = np.unique(np.linspace(0, n, max_points + 1).astype(np.int64)[:-1])
+    last = np.append(starts[1:] - 1, n - 1)
+    return pd.DataFrame(
+        {
+            "Open": df["Open"].to_numpy(dtype=np.float64)[starts],
+            "High": np.fmax.reduceat(df["High"].to_numpy(dtype=np.float64), starts),
+            "Low": np.fmin.reduceat(df["Low"].to_numpy(dtype=np.float64), starts),
+            "Close": df["Close"].to_numpy(dtype=np.float64)[last],
+        },
+        index=df.index[starts],
+    )
+
+
+# =========================================================
+# === Бинарная сериализация массивов
+# =========================================================
+# dtype numpy -> код typed array plotly.js (int64 в браузере не поддерживается)
+_TYPED_CODES = {
+    np.dtype(np.float64): "f8",
+    np.dtype(np.float32): "f4",
+    np.dtype(np.int32): "i4",
+    np.dtype(np.int16): "i2",
+    np.dtype(np.int8): "i1",
+    np.dtype(np.uint32): "u4",
+    np.dtype(np.uint16): "u2",
+    np.dtype(np.uint8): "u1",
+}
+
+
+def epoch_ms(index: pd.DatetimeIndex) -> np.ndarray:
+    """Время баров -> миллисекунды (float64), как их понимает ось type='date'. Берётся локальное время индекса."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.as_unit("ns").asi8 / 1e6
+
+
+def chart_x(index):
+    """Ось x для трассы: при CHART_BINARY_ARRAYS даты передаются числами (ms), иначе как есть."""
+    if CHART_BINARY_ARRAYS and isinstance(index, pd.DatetimeIndex):
+        return epoch_ms(index)
+    return index
+
+
+def typed_array(values):
+    """Числовой массив -> {"dtype", "bdata"} (base64, little-endian); остальное — без изменений."""
+    if not CHART_BINARY_ARRAYS:
+        return values
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = values.to_numpy()
+    if not isinstance(values, np.ndarray) or values.dtype.kind not in "fiub":
+        return values
+    if values.dtype.kind == "b":
+        values = values.astype(np.uint8)
+    elif values.dtype not in _TYPED_CODES:
+        info = np.iinfo(np.int32)
+        fits = values.dtype.kind in "iu" and (values.size == 0 or (values.min() >= info.min and values.max() <= info.max))
+        values = values.astype(np.int32 if fits else np.float64)
+    values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+    return {"dtype": _TYPED_CODES[values.dtype.newbyteorder("=")], "bdata": base64.b64encode(values.tobytes()).decode("ascii")}
+
+
+def compact_figure(fig):
+    """
+    Фигура для dcc.Graph с массивами трасс в виде typed arrays. Новые версии plotly кодируют
+    numpy-массивы сами — тогда здесь остаются только уже закодированные поля.
+    """
+    if not CHART_BINARY_ARRAYS:
+        return fig
+    out = fig.to_dict()
+    for trace in out["data"]:
+        for key, value in trace.items():
+            if isinstance(value, np.ndarray):
+                trace[key] = typed_array(value)
+    return out
+
+
+# =========================================================
+# === Видимый диапазон (relayoutData)
+# =========================================================
+def relayout_range(relayout: Optional[Dict[str, Any]]):
+    """
+    relayoutData графика -> (x0, x1) при зуме/панораме, "auto" при сбросе масштаба,
+    None — если событие не меняет ось x (autosize, зум по y и т.п.).
+    """
+    if not relayout:
+        return None
+    if relayout.get("xaxis.autorange"):
+        return "auto"
+    if "xaxis.range[0]" in relayout and "xaxis.range[1]" in relayout:
+        return relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    if isinstance(relayout.get("xaxis.range"), (list, tuple)) and len(relayout["xaxis.range"]) == 2:
+        return tuple(relayout["xaxis.range"])
+    return None
+
+
+def visible_slice(index: pd.Index, x0, x1, pad: int = 1) -> slice:
+    """Позиции баров в [x0, x1] (+pad баров по краям, чтобы линия не обрывалась у границы)."""
+    if isinstance(index, pd.DatetimeIndex):
+        x0, x1 = pd.Timestamp(x0), pd.Timestamp(x1)
+        if index.tz is not None:
+            x0 = x0.tz_localize(index.tz) if x0.tzinfo is None else x0.tz_convert(index.tz)
+            x1 = x1.tz_localize(index.tz) if x1.tzinfo is None else x1.tz_convert(index.tz)
+    lo = int(index.searchsorted(x0, side="left"))
+    hi = int(index.searchsorted(x1, side="right"))
+    return slice(max(lo - pad, 0), min(hi + pad, len(index)))
+
+
+# =========================================================
+# === Массивы последнего Submit для зума
+# =========================================================
+def chart_entry_nbytes(entry: Dict[str, Any]) -> int:
+    total = entry["index"].nbytes + (entry["ledger"].nbytes if "ledger" in entry else 0)
+    for chart in entry["charts"].values():
+        for arrays in (chart.get("ohlc", {}), chart.get("lines", {})):
+            total += sum(arr.nbytes for arr in arrays.values())
+    return total
+
+
+class ChartCache:
+    """
+    Массивы графиков по токену Submit: {"index": DatetimeIndex, "charts": {имя: {"ohlc"|"lines": ...}}}.
+    В памяти процесса (ByteLRU); в фоновом режиме create_charts работает в другом процессе,
+    поэтому тогда массивы кладутся в diskcache рядом с результатами фоновых задач.
+    Без фонового режима и с несколькими воркерами сервера зум и журнал сделок, попавшие не на тот
+    воркер, токена не найдут — callbacks тогда показывают «нажмите Submit ещё раз».
+    """
+
+    def __init__(self, max_bytes: int = CHART_CACHE_MAX_BYTES, disk_dir: Optional[str] = None):
+        self._memory = ByteLRU(max_bytes, chart_entry_nbytes)
+        self._disk = None
+        if disk_dir:
+            try:
+                import diskcache
+
+                self._disk = diskcache.Cache(disk_dir, size_limit=max_bytes)
+            except ImportError:
+                self._disk = None
+
+    def put(self, entry: Dict[str, Any], token: Optional[str] = None) -> str:
+        token = token or uuid.uuid4().hex
+        if self._disk is not None:
+            self._disk.set(token, entry)
+        else:
+            self._memory.put(token, entry)
+        return token
+
+    def get(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not token:
+            return None
+        if self._disk is not None:
+            return self._disk.get(token)
+        return self._memory.get(token)
+
+
+chart_cache = ChartCache(disk_dir=os.path.join(BACKGROUND_CACHE_DIR, "charts") if BACKGROUND_CALLBACKS else None)
+
+
+def rescale_chart(entry: Dict[str, Any], name: str, x_range, max_points: int = CHART_MAX_POINTS) -> Dict[int, Dict[str, Any]]:
+    """
+    Трассы графика name для видимого диапазона x_range ((x0, x1) или "auto"): {номер трассы: поля}.
+    Срез — searchsorted по индексу, прореживание — только по видимым барам.
+    """
+    chart = entry["charts"].get(name)
+    if chart is None:
+        return {}
+    index = entry["index"]
+    sl = slice(None) if x_range == "auto" else visible_slice(index, *x_range)
+    part = index[sl]
+    traces: Dict[int, Dict[str, Any]] = {}
+    if "ohlc" in chart:
+        coin = downsample_ohlc(pd.DataFrame({col: arr[sl] for col, arr in chart["ohlc"].items()}, index=part), max_points)
+        traces[0] = {
+            "x": coin.index,
+            "open": coin["Open"].to_numpy(),
+            "high": coin["High"].to_numpy(),
+            "low": coin["Low"].to_numpy(),
+            "close": coin["Close"].to_numpy(),
+        }
+    for i, y in chart.get("lines", {}).items():
+        x, y_part = downsample_line(part, y[sl], max_points)
+        traces[i] = {"x": x, "y": y_part}
+    return traces
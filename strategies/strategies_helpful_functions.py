@@ -15,6 +15,7 @@ from .strategies_constants import (
     COMPARISON_OPERATORS,
     tooltip_styles,
     df_input_parameters,
+    df_output_parameters,
     Key,
     Store,
     StrategyList,
@@ -50,6 +51,80 @@ def group_params(params_dict):
     return grouped
 
 
+RAW_OUTPUT_RE = re.compile(r"([A-Za-z0-9]+)__([0-9]+)__(.+)")
+
+
+def indicator_column_label(ind: str, inst, col: str, stored_inputs: dict | None) -> str:
+    """
+    Имя выходной колонки инстанса индикатора с подставленным period — тот же формат,
+    что value опций в условиях: 'SMA' + 'i period' (period=14) -> 'SMA_14 period'.
+    """
+    period_val = (stored_inputs or {}).get(f"{ind}__{inst}__period", None)
+    if period_val in (None, "", "None"):
+        period_label = "i"
+    else:
+        try:
+            period_label = (
+                str(int(period_val)) if float(period_val).is_integer() else str(period_val)
+            )
+        except Exception:
+            period_label = str(period_val)
+    return f"{ind}_{col.replace('i period', f'{period_label} period')}"
+
+
+def indicator_output_names(ind: str, outputs) -> List[str]:
+    """
+    Выходы расчёта (в порядке outputs) под именами из indicators_output_parameters.csv: те же имена —
+    как есть, столько же выходов под другими именами — по порядку (как в TA-Lib), иначе outputs.
+    """
+    rows = df_output_parameters[
+        (df_output_parameters["indicator"] == ind) & (df_output_parameters["output_name"] != "no_parameters")
+    ]["output_name"].tolist()
+    if set(rows) == set(outputs) or len(rows) != len(outputs):
+        return list(outputs)
+    return rows
+
+
+# Имена параметров из indicators_input_parameters.csv -> аргументы расчёта
+PARAM_ALIASES = {"timeperiod": "period"}
+
+
+def instance_kwargs(params: Optional[Dict[str, Any]], accepted) -> Optional[List[Dict[str, Any]]]:
+    """
+    Параметры индикатора из kwargs_map ({'period': [14, 28]}) -> аргументы по инстансам
+    ([{'period': 14}, {'period': 28}]); period — int, остальные — float.
+    Параметр не из accepted или нечисловое значение -> None.
+    """
+    params = {PARAM_ALIASES.get(k, k): v if isinstance(v, (list, tuple)) else [v] for k, v in (params or {}).items()}
+    if any(k not in accepted for k in params):
+        return None
+    count = max((len(v) for v in params.values()), default=1) or 1
+    try:
+        return [
+            {k: int(float(v[i])) if k == "period" else float(v[i]) for k, v in params.items() if i < len(v)}
+            for i in range(count)
+        ]
+    except (TypeError, ValueError):
+        return None
+
+
+def relabel_conditions(conditions_store_inputs: dict, stored_inputs: dict | None) -> dict:
+    """
+    Пересобирает column / column_or_custom индикаторных условий по их raw-ключам
+    (IND__INST__COL) под конкретные параметры — нужно, когда period меняется (перебор параметров).
+    """
+    new_conditions = {}
+    for key, cond in (conditions_store_inputs or {}).items():
+        cond = dict(cond or {})
+        for field in ("column", "column_or_custom"):
+            m = RAW_OUTPUT_RE.fullmatch(str(cond.get(f"{field}_raw") or ""))
+            if m and cond.get(field):
+                ind, inst, col = m.groups()
+                cond[field] = indicator_column_label(ind, inst, col, stored_inputs)
+        new_conditions[key] = cond
+    return new_conditions
+
+
 # Вспомогательная: максимальный индекс карточек в UI для заданных strategy/condition
 def _max_ui_index_for(sid: str, cond: str) -> int:
     indices = []
@@ -0,0 +1,227 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import inspect
+import numpy as np
+import pandas as pd
+from .strategies_helpful_functions import indicator_column_label, indicator_output_names, instance_kwargs
+from .strategies_kernels import (
+    adx,
+    cci,
+    di,
+    directional_move,
+    ema,
+    gains,
+    losses,
+    masked,
+    rolling_std,
+    rsi,
+    sma,
+    true_range,
+    wilder_avg,
+    wilder_sum,
+)
+
+# Узел графа — кортеж (операция, *аргументы); аргументы — другие узлы или числа.
+# Одинаковый кортеж = один и тот же промежуточный результат: SMA(Close, 20) у SMA и у средней линии BBANDS,
+# TR у ATR и ADX, EMA(Close, 26) у EMA и у медленной линии MACD считаются один раз.
+Node = Tuple
+
+
+_OPS: Dict[str, Callable[..., np.ndarray]] = {
+    "sma": sma,
+    "std": rolling_std,
+    "ema": ema,
+    "wilder_avg": wilder_avg,
+    "wilder_sum": wilder_sum,
+    "tr": true_range,
+    "plus_dm": lambda high, low: directional_move(high, low, plus=True),
+    "minus_dm": lambda high, low: directional_move(high, low, plus=False),
+    "di": di,
+    "adx": adx,
+    "typical": lambda high, low, close: (high + low + close) / 3.0,
+    "cci": cci,
+    "gain": gains,
+    "loss": losses,
+    "rsi": rsi,
+    "sub": np.subtract,
+    "axpy": lambda a, b, k: a + k * b,
+    "mask": masked,
+}
+
+
+class IndicatorPlan:
+    """
+    План расчёта индикаторов одного Submit: выходы всех инстансов всех индикаторов раскладываются
+    на узлы, одинаковые узлы регистрируются один раз. Узел добавляется после своих аргументов,
+    поэтому порядок добавления — уже топологический.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[Node, None] = {}  # упорядоченное множество узлов
+        self.requested = 0  # сколько раз рецепты запросили узел (с повторами)
+        self.outputs: Dict[str, List[Tuple[str, Node]]] = {}  # индикатор -> [(колонка, узел)]
+
+    def node(self, op: str, *args) -> Node:
+        key = (op, *args)
+        self.requested += 1
+        self.nodes.setdefault(key)
+        return key
+
+    def run(self, df: pd.DataFrame, cache=None) -> Dict[str, pd.DataFrame]:
+        """
+        Каждый узел — ровно один раз (или из cache: get(node) / put(node, array)).
+        -> {индикатор: DataFrame его колонок}.
+        """
+        values: Dict[Node, np.ndarray] = {}
+        for key in self.nodes:
+            if key[0] == "col":
+                values[key] = df[key[1]].to_numpy(dtype=np.float64)
+                continue
+            hit = cache.get(key) if cache is not None else None
+            if hit is None:
+                hit = _OPS[key[0]](*(values[a] if isinstance(a, tuple) else a for a in key[1:]))
+                if cache is not None:
+                    cache.put(key, hit)
+            values[key] = hit
+        return {
+            name: pd.DataFrame({col: values[node] for col, node in outputs}, index=df.index)
+            for name, outputs in self.outputs.items()
+        }
+
+
+# Рецепты: индикатор -> узлы выходов (в порядке выходов TA-Lib); параметры и умолчания — как в TA-Lib
+def _recipe_sma(plan, period=30):
+    return {"i period": plan.node("sma", plan.node("col", "Close"), period)}
+
+
+def _recipe_ema(plan, period=30):
+    return {"i period": plan.node("ema", plan.node("col", "Close"), period, 0)}
+
+
+def _recipe_bbands(plan, period=5, nbdevup=2.0, nbdevdn=2.0, matype=0):
+    if int(matype) != 0:
+        raise ValueError("BBANDS plan supports only matype=0 (SMA)")
+    close = plan.node("col", "Close")
+    middle = plan.node("sma", close, period)
+    std = plan.node("std", close, period)
+    return {
+        "upperband": plan.node("axpy", middle, std, nbdevup),
+        "middleband": middle,
+        "lowerband": plan.node("axpy", middle, std, -nbdevdn),
+    }
+
+
+def _recipe_macd(plan, fastperiod=12, slowperiod=26, signalperiod=9):
+    fast, slow, signal = int(fastperiod), int(slowperiod), int(signalperiod)
+    if slow < fast:
+        fast, slow = slow, fast
+    close = plan.node("col", "Close")
+    # как в TA-Lib: быстрая EMA стартует с того же бара, что и медленная (её SMA-старт сдвинут на slow - fast)
+    line = plan.node("sub", plan.node("ema", close, fast, slow - fast), plan.node("ema", close, slow, 0))
+    signal_line = plan.node("ema", line, signal, 0)
+    return {
+        "macd": plan.node("mask", line, slow + signal - 2),
+        "macdsignal": signal_line,
+        "macdhist": plan.node("sub", line, signal_line),
+    }
+
+
+def _recipe_rsi(plan, period=14):
+    close = plan.node("col", "Close")
+    gain = plan.node("wilder_avg", plan.node("gain", close), period)
+    loss = plan.node("wilder_avg", plan.node("loss", close), period)
+    return {"i period": plan.node("rsi", gain, loss)}
+
+
+def _hlc(plan):
+    return plan.node("col", "High"), plan.node("col", "Low"), plan.node("col", "Close")
+
+
+def _recipe_atr(plan, period=14):
+    return {"i period": plan.node("wilder_avg", plan.node("tr", *_hlc(plan)), period)}
+
+
+def _directional(plan, period):
+    high, low, close = _hlc(plan)
+    tr_sum = plan.node("wilder_sum", plan.node("tr", high, low, close), period)
+    plus = plan.node("di", plan.node("wilder_sum", plan.node("plus_dm", high, low), period), tr_sum)
+    minus = plan.node("di", plan.node("wilder_sum", plan.node("minus_dm", high, low), period), tr_sum)
+    return plus, minus
+
+
+def _recipe_plus_di(plan, period=14):
+    return {"i period": _directional(plan, period)[0]}
+
+
+def _recipe_minus_di(plan, period=14):
+    return {"i period": _directional(plan, period)[1]}
+
+
+def _recipe_adx(plan, period=14):
+    return {"i period": plan.node("adx", *_directional(plan, period), period)}
+
+
+def _recipe_cci(plan, period=14):
+    return {"i period": plan.node("cci", plan.node("typical", *_hlc(plan)), period)}
+
+
+RECIPES: Dict[str, Callable[..., Dict[str, Node]]] = {
+    "SMA": _recipe_sma,
+    "EMA": _recipe_ema,
+    "BBANDS": _recipe_bbands,
+    "MACD": _recipe_macd,
+    "RSI": _recipe_rsi,
+    "ATR": _recipe_atr,
+    "PLUS_DI": _recipe_plus_di,
+    "MINUS_DI": _recipe_minus_di,
+    "ADX": _recipe_adx,
+    "CCI": _recipe_cci,
+}
+
+
+def build_plan(kwargs_map: Dict[str, Dict[str, Any]]) -> Tuple[IndicatorPlan, List[str]]:
+    """
+    {индикатор: параметры инстансов} (как kwargs_map) -> (план, индикаторы без рецепта).
+    Колонки называются как подписи в условиях ('SMA_14 period', 'MACD_macd'). Подписи различают
+    инстансы только по period, поэтому индикатор, у инстансов которого имена совпали бы
+    (BBANDS с двумя period), тоже уходит в остаток — его считает calculate.Indicator.
+    """
+    plan = IndicatorPlan()
+    rest: List[str] = []
+    for name, params in kwargs_map.items():
+        recipe = RECIPES.get(name)
+        signature = inspect.signature(recipe).parameters if recipe else {}
+        kwargs = instance_kwargs(params, set(signature) - {"plan"}) if recipe else None
+        if not kwargs:
+            rest.append(name)
+            continue
+        local = IndicatorPlan()  # узлы индикатора попадают в общий план, только если он считается планом
+        try:
+            outputs = [recipe(local, **kw) for kw in kwargs]
+        except (TypeError, ValueError):
+            rest.append(name)
+            continue
+        labels = indicator_output_names(name, list(outputs[0]))
+        columns = [
+            (
+                indicator_column_label(
+                    name, inst, label, {f"{name}__{inst}__period": kw.get("period", _default(signature, "period"))}
+                ),
+                node,
+            )
+            for inst, (kw, out) in enumerate(zip(kwargs, outputs), start=1)
+            for label, node in zip(labels, out.values())
+        ]
+        if len({col for col, _ in columns}) < len(columns):
+            rest.append(name)
+            continue
+        # порядок local топологический; уже известные узлы остаются на своих местах
+        plan.nodes.update(dict.fromkeys(local.nodes))
+        plan.requested += local.requested
+        plan.outputs[name] = columns
+    return plan, rest
+
+
+def _default(signature, param: str) -> Optional[Any]:
+    p = signature.get(param)
+    return p.default if p is not None else None
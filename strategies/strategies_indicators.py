@@ -0,0 +1,163 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import numpy as np
+import pandas as pd
+from calculate import Indicator
+from .strategies_lru import ByteLRU
+from .strategies_online import online_columns
+from .strategies_indicator_plan import build_plan
+from .strategies_constants import (
+    dict_ops,
+    INDICATOR_CACHE_ENABLED,
+    INDICATOR_CACHE_MAX_BYTES,
+    INDICATOR_ENGINE,
+)
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Хэш блока свечей: индекс времени + все колонки (по сырым байтам, без сериализации)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(list(df.columns)).encode())
+    h.update(np.ascontiguousarray(df.index.values).view(np.uint8))
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype == object:
+            h.update(repr(values.tolist()).encode())
+        else:
+            h.update(np.ascontiguousarray(values).view(np.uint8))
+    return h.hexdigest()
+
+
+def freeze_params(params: Optional[Dict[str, Any]]) -> Tuple:
+    """{'period': [14, 28]} -> (('period', (14, 28)),) — хэшируемый кортеж параметров всех инстансов."""
+    return tuple(
+        (name, tuple(values) if isinstance(values, (list, tuple)) else values)
+        for name, values in sorted((params or {}).items())
+    )
+
+
+indicator_cache = ByteLRU(
+    INDICATOR_CACHE_MAX_BYTES,
+    sizeof=lambda cols: int(cols.memory_usage(index=False, deep=False).sum()),
+)
+
+
+# Промежуточные узлы плана индикаторов по (хэш свечей, узел) — общие и между комбинациями перебора
+indicator_node_cache = ByteLRU(INDICATOR_CACHE_MAX_BYTES // 4, sizeof=lambda values: int(values.nbytes))
+
+
+class _NodeCache:
+    """Кэш узлов плана для одного блока свечей (интерфейс get/put для IndicatorPlan.run)."""
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+
+    def get(self, node):
+        return indicator_node_cache.get((self.fingerprint, node))
+
+    def put(self, node, values) -> None:
+        indicator_node_cache.put((self.fingerprint, node), values)
+
+
+def _compute_one(df: pd.DataFrame, name: str, params: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Колонки одного индикатора (все его инстансы) через calculate.Indicator, без условий;
+    при INDICATOR_ENGINE=online — онлайн-версией, если она есть.
+    """
+    if INDICATOR_ENGINE == "online":
+        cols = online_columns(df, name, params)
+        if cols is not None:
+            return cols
+    _, out, added = Indicator.backtest_all_strategies(
+        df=df.copy(),
+        conditions={},
+        indicator_names=[name],
+        kwargs_map={name: params} if params else {},
+        dict_operators=dict_ops,
+    )
+    cols = [c for c in (added or {}).get(name, []) if c in out.columns]
+    return out[cols].copy()
+
+
+def compute_indicators(
+    df: pd.DataFrame,
+    indicator_names: List[str],
+    kwargs_map: Dict[str, Dict[str, Any]],
+    use_cache: Optional[bool] = None,
+) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
+    """
+    Добавляет в df колонки выбранных индикаторов и возвращает (df, added_cols).
+    Выход каждого индикатора кэшируется по (хэш свечей, имя, кортеж параметров его инстансов),
+    поэтому повторный Submit с изменёнными только условиями не пересчитывает TA.
+    При INDICATOR_ENGINE=plan индикаторы с рецептом (strategies_indicator_plan) считаются одним планом.
+    """
+    use_cache = INDICATOR_CACHE_ENABLED if use_cache is None else use_cache
+    fingerprint = frame_fingerprint(df) if use_cache else None
+    names = list(dict.fromkeys(indicator_names or []))
+    params_of = {name: (kwargs_map or {}).get(name) or {} for name in names}
+    keys = {name: (fingerprint, name, freeze_params(params_of[name])) for name in names}
+    computed: Dict[str, pd.DataFrame] = {}
+    for name in names:
+        cols = indicator_cache.get(keys[name]) if use_cache else None
+        if cols is not None:
+            computed[name] = cols
+
+    missing = {name: params_of[name] for name in names if name not in computed}
+    if INDICATOR_ENGINE == "plan" and missing:
+        # общие промежуточные узлы (TR, скользящие средние) — один раз на все индикаторы и инстансы
+        plan, _ = build_plan(missing)
+        computed.update(plan.run(df, _NodeCache(fingerprint) if use_cache else None))
+    for name in names:
+        if name not in computed:
+            computed[name] = _compute_one(df, name, params_of[name])
+        if use_cache and name in missing:
+            indicator_cache.put(keys[name], computed[name])
+
+    added_cols: Dict[str, List[str]] = {}
+    new_cols: Dict[str, np.ndarray] = {}
+    for name in names:
+        cols = computed[name]
+        for col in cols.columns:
+            new_cols[col] = cols[col].to_numpy()
+        added_cols[name] = list(cols.columns)
+
+    if new_cols:
+        df = pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
+    return df, added_cols
+
+
+def backtest_with_cached_indicators(
+    df: pd.DataFrame,
+    conditions: Dict,
+    indicator_names: List[str],
+    kwargs_map: Dict,
+    debug: bool = False,
+    use_cache: Optional[bool] = None,
+):
+    """
+    То же, что Indicator.backtest_all_strategies, но колонки индикаторов берутся из кэша,
+    а бэктест условий запускается по уже готовым колонкам.
+    При выключенном кэше — прежний единый вызов без изменений.
+    """
+    use_cache = INDICATOR_CACHE_ENABLED if use_cache is None else use_cache
+    if not use_cache:
+        return Indicator.backtest_all_strategies(
+            df=df,
+            conditions=conditions,
+            indicator_names=indicator_names,
+            kwargs_map=kwargs_map,
+            dict_operators=dict_ops,
+            debug=debug,
+        )
+
+    df, added_cols = compute_indicators(df, indicator_names, kwargs_map, use_cache=True)
+    results, df, _ = Indicator.backtest_all_strategies(
+        df=df,
+        conditions=conditions,
+        indicator_names=[],
+        kwargs_map=kwargs_map,
+        dict_operators=dict_ops,
+        debug=debug,
+    )
+    return results, df, added_cols
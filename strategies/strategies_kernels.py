@@ -0,0 +1,161 @@
+from __future__ import annotations
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Векторные ядра индикаторов по массивам float64 с NaN-прогревом в начале, совпадающие с TA-Lib:
+# их собирает в граф strategies_indicator_plan, а онлайн-индикаторы (strategies_online) прогревают ими состояние.
+EPS = 1e-8  # TA_IS_ZERO в TA-Lib
+
+
+def first_valid(x: np.ndarray) -> int:
+    idx = np.flatnonzero(~np.isnan(x))
+    return int(idx[0]) if len(idx) else len(x)
+
+
+def sma(x, w):
+    out = np.full(len(x), np.nan)
+    f = first_valid(x)
+    if len(x) - f >= w:
+        out[f + w - 1:] = sliding_window_view(x[f:], w).mean(axis=1)
+    return out
+
+
+def rolling_std(x, w):
+    """Стандартное отклонение по генеральной совокупности (как в BBANDS)."""
+    out = np.full(len(x), np.nan)
+    f = first_valid(x)
+    if len(x) - f >= w:
+        out[f + w - 1:] = sliding_window_view(x[f:], w).std(axis=1)
+    return out
+
+
+def ema(x, w, skip=0):
+    """EMA со стартом от SMA первых w значений (после skip первых валидных), k = 2 / (w + 1)."""
+    out = np.full(len(x), np.nan)
+    f = first_valid(x) + skip
+    if len(x) - f < w:
+        return out
+    k = 2.0 / (w + 1)
+    value = float(np.mean(x[f:f + w]))
+    values = [value]
+    for v in x[f + w:].tolist():
+        value += k * (v - value)
+        values.append(value)
+    out[f + w - 1:] = values
+    return out
+
+
+def wilder_avg(x, w):
+    """Среднее Уайлдера (ATR, RSI): старт — среднее первых w значений, дальше (prev * (w - 1) + x) / w."""
+    out = np.full(len(x), np.nan)
+    f = first_valid(x)
+    if len(x) - f < w:
+        return out
+    value = float(np.mean(x[f:f + w]))
+    values = [value]
+    for v in x[f + w:].tolist():
+        value = (value * (w - 1) + v) / w
+        values.append(value)
+    out[f + w - 1:] = values
+    return out
+
+
+def wilder_sum(x, w):
+    """Сумма Уайлдера (+DM, -DM, TR в ADX): старт — сумма первых w - 1 значений, дальше prev - prev / w + x."""
+    out = np.full(len(x), np.nan)
+    f = first_valid(x)
+    if len(x) - f < w:
+        return out
+    value = float(np.sum(x[f:f + w - 1]))
+    values = [value]
+    for v in x[f + w - 1:].tolist():
+        value += v - value / w
+        values.append(value)
+    out[f + w - 2:] = values
+    return out
+
+
+def true_range(high, low, close):
+    out = np.full(len(close), np.nan)
+    prev = close[:-1]
+    out[1:] = np.maximum.reduce([high[1:] - low[1:], np.abs(high[1:] - prev), np.abs(low[1:] - prev)])
+    return out
+
+
+def directional_move(high, low, plus: bool):
+    out = np.full(len(high), np.nan)
+    up, down = np.diff(high), -np.diff(low)
+    out[1:] = np.where((up > 0) & (up > down), up, 0.0) if plus else np.where((down > 0) & (up < down), down, 0.0)
+    return out
+
+
+def di(dm_sum, tr_sum):
+    """+DI / -DI; первое значение — на баре после стартовой суммы, при нулевом TR — 0."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(np.abs(tr_sum) > EPS, 100.0 * dm_sum / tr_sum, 0.0)
+    out[np.isnan(tr_sum)] = np.nan
+    out[:first_valid(tr_sum) + 1] = np.nan
+    return out
+
+
+def dx(plus_di, minus_di):
+    """DX; там, где +DI + -DI = 0, значения нет (NaN) — ADX этот бар пропускает."""
+    total = plus_di + minus_di
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(np.abs(total) > EPS, 100.0 * np.abs(plus_di - minus_di) / total, np.nan)
+
+
+def adx(plus_di, minus_di, w):
+    """ADX: старт — среднее DX за первые w баров после прогрева DI (пропуски — нулём), дальше сглаживание Уайлдера."""
+    dx_values = dx(plus_di, minus_di)
+    out = np.full(len(dx_values), np.nan)
+    f = first_valid(plus_di)
+    if len(dx_values) - f < w:
+        return out
+    value = float(np.nansum(dx_values[f:f + w])) / w
+    values = [value]
+    for v in dx_values[f + w:].tolist():
+        if v == v:
+            value = (value * (w - 1) + v) / w
+        values.append(value)
+    out[f + w - 1:] = values
+    return out
+
+
+def cci(tp, w):
+    out = np.full(len(tp), np.nan)
+    f = first_valid(tp)
+    if len(tp) - f < w:
+        return out
+    windows = sliding_window_view(tp[f:], w)
+    mean = windows.mean(axis=1)
+    deviation = np.abs(windows - mean[:, None]).mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[f + w - 1:] = np.where(np.abs(deviation) > EPS, (tp[f + w - 1:] - mean) / (0.015 * deviation), 0.0)
+    return out
+
+
+def rsi(gain, loss):
+    total = gain + loss
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(total > EPS, 100.0 * gain / total, 0.0)
+    out[np.isnan(total)] = np.nan
+    return out
+
+
+def masked(x, start):
+    out = x.copy()
+    out[:start] = np.nan
+    return out
+
+
+def gains(close):
+    out = np.full(len(close), np.nan)
+    out[1:] = np.maximum(np.diff(close), 0.0)
+    return out
+
+
+def losses(close):
+    out = np.full(len(close), np.nan)
+    out[1:] = np.maximum(-np.diff(close), 0.0)
+    return out
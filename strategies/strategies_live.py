@@ -0,0 +1,251 @@
+from __future__ import annotations
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import socket
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from .strategies_backtest import backtest_batch, signal_matrices
+from .strategies_conditions import compile_conditions
+from .strategies_indicators import compute_indicators
+from .strategies_online import online_instances
+from .strategies_constants import LIVE_FEED, LIVE_FALLBACK_BARS, LIVE_MAX_SESSIONS
+
+OHLCV = ("Open", "High", "Low", "Close", "Volume")
+Bar = Dict[str, Any]
+
+
+def parse_bar(line: str) -> Optional[Bar]:
+    """
+    Строка ленты -> бар {'time': Timestamp, 'Open': ..., 'Volume': ...}:
+    JSON-объект ({"time": ..., "open": ...}, регистр ключей не важен) или CSV 'time,open,high,low,close,volume'.
+    time — ISO-строка или epoch (секунды или миллисекунды). Заголовок и мусор -> None.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        if line.startswith("{"):
+            raw = {k.lower(): v for k, v in json.loads(line).items()}
+            time = raw.get("time", raw.get("timestamp"))
+            values = [raw[col.lower()] if col != "Volume" else raw.get("volume", 0.0) for col in OHLCV]
+        else:
+            time, *values = [p.strip() for p in line.split(",")]
+            values = (values + ["0"])[:5]
+        bar = {col: float(v) for col, v in zip(OHLCV, values)}
+    except (ValueError, KeyError, TypeError):
+        return None
+    try:
+        number = float(time)
+        bar["time"] = pd.Timestamp(number, unit="ms" if number > 1e11 else "s")
+    except (TypeError, ValueError):
+        try:
+            bar["time"] = pd.Timestamp(time)
+        except (TypeError, ValueError):
+            return None
+    if bar["time"].tzinfo is not None:
+        bar["time"] = bar["time"].tz_convert(None)
+    return bar
+
+
+class FileTailFeed:
+    """Новые строки файла, который дописывает внешний процесс (tail -f); неполная последняя строка ждёт конца."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offset = 0
+        self._partial = ""
+
+    def poll(self) -> List[Bar]:
+        try:
+            if os.path.getsize(self.path) < self._offset:  # файл пересоздан
+                self._offset, self._partial = 0, ""
+            with open(self.path, "r", encoding="utf-8") as f:
+                f.seek(self._offset)
+                chunk = f.read()
+                self._offset = f.tell()
+        except OSError:
+            return []
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()
+        return [bar for bar in map(parse_bar, lines) if bar is not None]
+
+    def close(self) -> None:
+        pass
+
+
+class SocketFeed:
+    """Локальный TCP-источник (заглушка биржевого стрима): строки JSON/CSV через \\n; переподключение при обрыве."""
+
+    def __init__(self, host: str, port: int):
+        self.address = (host, int(port))
+        self._sock: Optional[socket.socket] = None
+        self._partial = ""
+
+    def poll(self) -> List[Bar]:
+        chunks = []
+        try:
+            if self._sock is None:
+                self._sock = socket.create_connection(self.address, timeout=1.0)
+                self._sock.setblocking(False)
+            while True:
+                data = self._sock.recv(65536)
+                if not data:
+                    self.close()
+                    break
+                chunks.append(data.decode("utf-8", errors="replace"))
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.close()
+        lines = (self._partial + "".join(chunks)).split("\n")
+        self._partial = lines.pop()
+        return [bar for bar in map(parse_bar, lines) if bar is not None]
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def make_feed(symbol: str, interval: str, template: str = LIVE_FEED):
+    """LIVE_FEED -> источник: 'tcp://host:port' — SocketFeed, иначе путь к файлу (можно 'file://...')."""
+    target = template.format(symbol=symbol, interval=interval)
+    if target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].rpartition(":")
+        return SocketFeed(host or "127.0.0.1", int(port))
+    return FileTailFeed(target[len("file://"):] if target.startswith("file://") else target)
+
+
+class _TailRecompute:
+    """Индикатор без онлайн-версии: пересчёт по последним LIVE_FALLBACK_BARS барам, берём последнюю строку."""
+
+    def __init__(self, name: str, params: Dict[str, Any], history: pd.DataFrame, columns: List[str]):
+        self.name, self.params, self.columns = name, params, columns
+        self._bars: deque = deque(
+            ({"time": t, **row} for t, row in zip(history.index, history[list(OHLCV)].to_dict("records"))),
+            maxlen=LIVE_FALLBACK_BARS,
+        )
+
+    def update(self, bar: Bar) -> Tuple[float, ...]:
+        self._bars.append({"time": bar["time"], **{col: bar[col] for col in OHLCV}})
+        frame = pd.DataFrame(list(self._bars)).set_index("time")
+        df, _ = compute_indicators(frame, [self.name], {self.name: self.params} if self.params else {}, use_cache=False)
+        return tuple(float(df[col].iloc[-1]) if col in df.columns else float("nan") for col in self.columns)
+
+
+class _OnlineGroup:
+    """Все инстансы одного индикатора: выходы подряд в порядке колонок, которые дал batch-расчёт."""
+
+    def __init__(self, instances):
+        self.instances = instances
+
+    def update(self, bar: Bar) -> Tuple[float, ...]:
+        return tuple(value for inst in self.instances for value in inst.update(bar))
+
+
+class LiveSession:
+    """
+    Живой режим одной монеты: история считается один раз (индикаторы, сигналы, позиции, капитал),
+    дальше каждый новый бар ленты обновляет индикаторы онлайн-версиями (strategies_online) за O(1),
+    условия проверяются только на этом баре, позиция и капитал переносятся с прошлого бара —
+    по тем же правилам, что backtest_batch. Индикаторы без онлайн-версии пересчитываются по хвосту.
+    """
+
+    def __init__(self, ticker, interval, candles: pd.DataFrame, indicators, kwargs_map, conditions, feed):
+        self.ticker, self.interval, self.feed = ticker, interval, feed
+        self.lock = threading.Lock()
+        kwargs_map = kwargs_map or {}
+        df, added_cols = compute_indicators(candles, indicators or [], kwargs_map)
+        self.ids, buy, sell = signal_matrices(df, conditions)  # KeyError — условие на несуществующую колонку
+        self._compiled = tuple(s for s in compile_conditions(conditions) if s.buy)
+
+        self._updaters = []
+        self.online = []
+        for name in dict.fromkeys(indicators or []):
+            columns = added_cols.get(name, [])
+            instances = online_instances(name, kwargs_map.get(name) or {})
+            if instances and sum(len(inst.outputs) for inst in instances) == len(columns):
+                for inst in instances:
+                    inst.batch(candles)  # прогрев состояния по истории
+                self._updaters.append((columns, _OnlineGroup(instances)))
+                self.online.append(name)
+            elif columns:
+                self._updaters.append((columns, _TailRecompute(name, kwargs_map.get(name) or {}, candles, columns)))
+
+        batch = backtest_batch(df["Close"].to_numpy(dtype=np.float64), buy, sell)
+        self.history = df
+        self.history_equity = batch["cum_returns"]
+        self.state = batch["deals"].sum(axis=0).astype(np.float64)  # позиция после последнего бара (deals — разности)
+        self.equity = batch["cum_returns"][-1].copy() if len(df) else np.ones(len(self.ids))
+        self.tz = getattr(df.index, "tz", None)
+        self.last_time = df.index[-1] if len(df) else None
+        self.last_close = float(df["Close"].iloc[-1]) if len(df) else float("nan")
+
+    def on_bar(self, bar: Bar) -> Optional[Dict[str, Any]]:
+        """Один новый бар -> точка для графиков: бар, капитал и события (+1 вход / -1 выход) по стратегиям."""
+        if self.tz is not None and bar["time"].tzinfo is None:
+            # parse_bar отдаёт наивное UTC, а история может быть с tz — приводим к часовому поясу истории
+            bar = {**bar, "time": bar["time"].tz_localize("UTC").tz_convert(self.tz)}
+        if self.last_time is not None and bar["time"] <= self.last_time:
+            return None  # уже в истории или повтор
+        close = bar["Close"]
+        ret = close / self.last_close - 1.0 if self.last_close and np.isfinite(self.last_close) else 0.0
+        self.equity = self.equity * (1.0 + self.state * (ret if np.isfinite(ret) else 0.0))
+
+        values = {col: np.array([bar[col]]) for col in OHLCV}
+        for columns, updater in self._updaters:
+            values.update((col, np.array([v])) for col, v in zip(columns, updater.update(bar)))
+        memo: Dict = {}
+        events = np.zeros(len(self.ids), dtype=np.int8)
+        for j, strategy in enumerate(self._compiled):
+            b, s = strategy.evaluate(values, 1, memo)
+            new = 1.0 if b[0] and not s[0] else 0.0 if s[0] and not b[0] else self.state[j]
+            events[j] = int(new - self.state[j])
+            self.state[j] = new
+
+        self.last_time, self.last_close = bar["time"], close
+        return {"bar": bar, "equity": self.equity.copy(), "events": events, "state": self.state.copy()}
+
+    def poll(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            ticks = (self.on_bar(bar) for bar in self.feed.poll())
+            return [t for t in ticks if t is not None]
+
+
+class LiveSessions:
+    """
+    Сессии живого режима процесса по токену (в dcc.Store live_token); старые вытесняются сверх LIVE_MAX_SESSIONS.
+    Состояние — в памяти процесса, поэтому живой режим требует одного воркера; при нескольких воркерах
+    (или после вытеснения) get() вернёт None, и UI покажет, что сессия завершена.
+    """
+
+    def __init__(self, max_sessions: int = LIVE_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, LiveSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, session: LiveSession) -> str:
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[token] = session
+            while len(self._sessions) > self.max_sessions:
+                _, old = self._sessions.popitem(last=False)
+                old.feed.close()
+        return token
+
+    def get(self, token: Optional[str]) -> Optional[LiveSession]:
+        with self._lock:
+            return self._sessions.get(token) if token else None
+
+    def stop(self, token: Optional[str]) -> None:
+        with self._lock:
+            session = self._sessions.pop(token, None) if token else None
+        if session is not None:
+            session.feed.close()
+
+
+live_sessions = LiveSessions()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import threading
+import time
+
+
+class ByteLRU:
+    """
+    Потокобезопасный LRU-словарь с лимитом по суммарному размеру значений в байтах.
+    sizeof(value) -> int задаёт «вес» значения; значения тяжелее всего лимита не кэшируются.
+    ttl (сек) — срок жизни записи: по умолчанию для всех, либо свой в put(); None — бессрочно.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int], ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._expires: Dict[Hashable, float] = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._expires and self._expires[key] <= time.monotonic():
+                self._discard(key)
+            if key not in self._items:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        size = int(self.sizeof(value))
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._items[key] = value
+            self._sizes[key] = size
+            if ttl is not None:
+                self._expires[key] = time.monotonic() + ttl
+            self._nbytes += size
+            while self._nbytes > self.max_bytes and self._items:
+                oldest = next(iter(self._items))
+                self._discard(oldest)
+
+    def _discard(self, key: Hashable) -> None:
+        if key in self._items:
+            del self._items[key]
+            self._nbytes -= self._sizes.pop(key)
+            self._expires.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._expires.clear()
+            self._nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._items),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,136 @@
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+import numpy as np
+from .strategies_constants import INTERVAL_BARS_PER_YEAR, DEFAULT_BARS_PER_YEAR
+
+
+def periods_per_year(interval: Optional[str], default: float = DEFAULT_BARS_PER_YEAR) -> float:
+    """'60' -> 8760, 'D' -> 365, 'W' -> 52.14, 'M' -> 12 (таблица INTERVAL_BARS_PER_YEAR); иначе default."""
+    return INTERVAL_BARS_PER_YEAR.get(str(interval or "").strip(), default)
+
+
+def sharpe_sortino(returns: np.ndarray, periods_per_year: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Sharpe и Sortino по столбцам матрицы доходностей (annualised через periods_per_year)."""
+    if len(returns) < 2:
+        zeros = np.zeros(returns.shape[1])
+        return zeros, zeros.copy()
+    mean = returns.mean(axis=0)
+    std = returns.std(axis=0, ddof=1)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2, axis=0))
+    scale = np.sqrt(periods_per_year)
+    # у постоянной доходности std — ошибка округления, а не ноль: сравниваем с масштабом среднего
+    varying = std > 1e-9 * np.abs(mean)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(varying, mean / std * scale, 0.0)
+        sortino = np.where(downside > 0, mean / downside * scale, 0.0)
+    return sharpe, sortino
+
+
+def equity_metrics(cum: np.ndarray, periods_per_year: float = DEFAULT_BARS_PER_YEAR) -> Dict[str, np.ndarray]:
+    """
+    Метрики по одной только кривой капитала (множитель, матрица n_bars × n_columns) — для кривых,
+    у которых нет сделок, например сводного портфеля: total_return, cagr, sharpe, sortino, max_drawdown.
+    """
+    n, k = cum.shape
+    if n == 0:
+        zeros = np.zeros(k)
+        return {name: zeros for name in ("total_return", "cagr", "sharpe", "sortino", "max_drawdown")}
+    returns = np.empty_like(cum)
+    returns[0] = cum[0] - 1.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = np.nan_to_num(cum[1:] / cum[:-1] - 1.0)
+        final = cum[-1]
+        cagr = np.where(final > 0, final ** (periods_per_year / n) - 1.0, -1.0)
+        drawdown = cum / np.maximum.accumulate(cum, axis=0) - 1.0
+    sharpe, sortino = sharpe_sortino(returns, periods_per_year)
+    return {
+        "total_return": final - 1.0,
+        "cagr": cagr,
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "max_drawdown": np.nanmin(drawdown, axis=0),
+    }
+
+
+def _rank_in_column(cols: np.ndarray, k: int) -> np.ndarray:
+    """Порядковый номер события внутри своего столбца (cols отсортированы)."""
+    starts = np.concatenate(([0], np.cumsum(np.bincount(cols, minlength=k))[:-1]))
+    return np.arange(len(cols)) - starts[cols]
+
+
+def closed_trades(events: Dict[str, np.ndarray], cum: np.ndarray):
+    """
+    Закрытые сделки всех стратегий разом по событиям сделок (strategies_backtest.trade_events):
+    (столбец, бар входа, бар выхода, доходность сделки).
+    Входы и выходы чередуются, поэтому k-й выход столбца закрывает его k-й вход;
+    незакрытая к концу периода позиция в статистику сделок не попадает.
+    """
+    k = cum.shape[1]
+    is_entry = events["side"] == 1
+    entry_col, entry_row = events["strategy"][is_entry], events["bar"][is_entry]
+    exit_col, exit_row = events["strategy"][~is_entry], events["bar"][~is_entry]
+    n_entries = np.bincount(entry_col, minlength=k)
+    n_exits = np.bincount(exit_col, minlength=k)
+    keep_entry = _rank_in_column(entry_col, k) < n_exits[entry_col]
+    keep_exit = _rank_in_column(exit_col, k) < n_entries[exit_col]
+    col, entry_row, exit_row = entry_col[keep_entry], entry_row[keep_entry], exit_row[keep_exit]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trade_ret = cum[exit_row, col] / cum[entry_row, col] - 1.0
+    return col, entry_row, exit_row, np.nan_to_num(trade_ret)
+
+
+def summary_metrics(batch: Dict, periods_per_year: float = DEFAULT_BARS_PER_YEAR) -> Dict[str, np.ndarray]:
+    """
+    Метрики сводной таблицы сразу для всех стратегий batch (массивы длины n_strategies):
+    final_balance, total_return, cagr, sharpe, sortino, max_drawdown, buys, sells,
+    win_rate, exposure, turnover (входов и выходов в год), avg_trade_days.
+    Годовые величины считаются через periods_per_year — см. periods_per_year(interval).
+    """
+    cum = batch["cum_returns"]
+    events = batch["events"]
+    n, k = cum.shape
+    if n == 0:
+        zeros = np.zeros(k)
+        return {
+            "final_balance": np.asarray(batch["final_balance"], dtype=np.float64),
+            "total_return": zeros,
+            "cagr": zeros,
+            "sharpe": zeros,
+            "sortino": zeros,
+            "max_drawdown": zeros,
+            "buys": np.zeros(k, dtype=np.int64),
+            "sells": np.zeros(k, dtype=np.int64),
+            "win_rate": zeros,
+            "exposure": zeros,
+            "turnover": zeros,
+            "avg_trade_days": zeros,
+        }
+
+    final = cum[-1]
+    years = n / periods_per_year
+    sharpe, sortino = sharpe_sortino(batch["returns"], periods_per_year)
+    col, entry_row, exit_row, trade_ret = closed_trades(events, cum)
+    n_trades = np.bincount(col, minlength=k)
+    wins = np.bincount(col, weights=(trade_ret > 0).astype(np.float64), minlength=k)
+    bars_held = np.bincount(col, weights=(exit_row - entry_row).astype(np.float64), minlength=k)
+    buys = np.bincount(events["strategy"][events["side"] == 1], minlength=k)
+    sells = np.bincount(events["strategy"][events["side"] == -1], minlength=k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = np.where(final > 0, final ** (1.0 / years) - 1.0, -1.0)
+        drawdown = cum / np.maximum.accumulate(cum, axis=0) - 1.0
+        win_rate = np.where(n_trades > 0, wins / n_trades, 0.0)
+        avg_trade_days = np.where(n_trades > 0, bars_held / n_trades * 365.0 / periods_per_year, 0.0)
+    return {
+        "final_balance": np.asarray(batch["final_balance"], dtype=np.float64),
+        "total_return": final - 1.0,
+        "cagr": cagr,
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "max_drawdown": np.nanmin(drawdown, axis=0),
+        "buys": buys,
+        "sells": sells,
+        "win_rate": win_rate,
+        "exposure": (batch["positions"] > 0).mean(axis=0),
+        "turnover": (buys + sells) / years,
+        "avg_trade_days": avg_trade_days,
+    }
@@ -0,0 +1,335 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Type
+import inspect
+import numpy as np
+import pandas as pd
+from .strategies_helpful_functions import indicator_column_label, indicator_output_names, instance_kwargs
+from .strategies_kernels import (
+    EPS,
+    adx,
+    cci,
+    di,
+    directional_move,
+    dx,
+    ema,
+    gains,
+    losses,
+    rolling_std,
+    rsi,
+    sma,
+    true_range,
+    wilder_avg,
+    wilder_sum,
+)
+
+NAN = float("nan")
+
+
+class OnlineIndicator(ABC):
+    """
+    Индикатор с состоянием O(window): update(bar) — значения выходов на новом баре,
+    batch(df) — тот же расчёт по истории (с нуля, на свежем инстансе); после batch состояние такое же,
+    как после update по каждому бару, поэтому живой режим продолжает ряд без пересчёта.
+    Бары прогрева — NaN, как у batch-версий.
+    """
+
+    inputs: Tuple[str, ...] = ("Close",)
+    outputs: Tuple[str, ...] = ("i period",)  # имена выходов как в indicators_output_parameters.csv
+
+    @abstractmethod
+    def _step(self, *values: float) -> Tuple[float, ...]:
+        """Значения inputs на новом баре -> значения outputs; сдвигает состояние."""
+
+    def _batch(self, *columns: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Выходы по всей истории + состояние после последнего бара. Здесь — цикл по _step;
+        индикаторы ниже считают историю векторно (ядрами strategies_kernels) и ставят состояние сами.
+        """
+        out = np.full((len(columns[0]), len(self.outputs)), np.nan)
+        for i, values in enumerate(zip(*(c.tolist() for c in columns))):
+            out[i] = self._step(*values)
+        return tuple(out[:, j] for j in range(len(self.outputs)))
+
+    def update(self, bar: Mapping[str, Any]) -> Tuple[float, ...]:
+        return self._step(*(float(bar[col]) for col in self.inputs))
+
+    def batch(self, data) -> Dict[str, np.ndarray]:
+        """data — DataFrame (или dict) с колонками inputs либо 1-D массив, если вход один (Close)."""
+        if hasattr(data, "columns") or isinstance(data, Mapping):
+            columns = [np.asarray(data[col], dtype=np.float64) for col in self.inputs]
+        elif len(self.inputs) == 1:
+            columns = [np.asarray(data, dtype=np.float64)]
+        else:
+            raise ValueError(f"{type(self).__name__}.batch needs columns {self.inputs}")
+        return dict(zip(self.outputs, self._batch(*columns)))
+
+
+class OnlineSMA(OnlineIndicator):
+    def __init__(self, period: int = 30):
+        self.period = int(period)
+        self._window: deque = deque()
+        self._sum = 0.0
+
+    def _step(self, close):
+        self._window.append(close)
+        self._sum += close
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+        return (self._sum / self.period if len(self._window) == self.period else NAN,)
+
+    def _batch(self, close):
+        self._window = deque(close[-self.period:].tolist())
+        self._sum = float(np.sum(self._window))
+        return (sma(close, self.period),)
+
+
+class OnlineEMA(OnlineIndicator):
+    """Старт — SMA первых period баров, дальше value += k * (close - value), k = 2 / (period + 1)."""
+
+    def __init__(self, period: int = 30):
+        self.period = int(period)
+        self._k = 2.0 / (self.period + 1)
+        self._count = 0
+        self._seed = 0.0
+        self._value = NAN
+
+    def _step(self, close):
+        if self._count < self.period:
+            self._count += 1
+            self._seed += close
+            if self._count < self.period:
+                return (NAN,)
+            self._value = self._seed / self.period
+        else:
+            self._value += self._k * (close - self._value)
+        return (self._value,)
+
+    def _batch(self, close):
+        out = ema(close, self.period)
+        self._count = min(len(close), self.period)
+        self._seed = float(np.sum(close[:self.period]))
+        self._value = float(out[-1]) if len(close) >= self.period else NAN
+        return (out,)
+
+
+class OnlineRSI(OnlineIndicator):
+    """RSI Уайлдера: средние роста/падения за первые period изменений, дальше сглаживание (period - 1) / period."""
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self._prev = NAN
+        self._count = 0
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def _step(self, close):
+        prev, self._prev = self._prev, close
+        if prev != prev:  # первый бар
+            return (NAN,)
+        diff = close - prev
+        gain, loss = max(diff, 0.0), max(-diff, 0.0)
+        p = self.period
+        if self._count < p:
+            self._count += 1
+            self._gain += gain
+            self._loss += loss
+            if self._count < p:
+                return (NAN,)
+            self._gain /= p
+            self._loss /= p
+        else:
+            self._gain = (self._gain * (p - 1) + gain) / p
+            self._loss = (self._loss * (p - 1) + loss) / p
+        total = self._gain + self._loss
+        return (100.0 * self._gain / total if total > EPS else 0.0,)
+
+    def _batch(self, close):
+        p = self.period
+        gain, loss = gains(close), losses(close)
+        avg_gain, avg_loss = wilder_avg(gain, p), wilder_avg(loss, p)
+        changes = max(len(close) - 1, 0)
+        self._prev = float(close[-1]) if len(close) else NAN
+        self._count = min(changes, p)
+        if changes >= p:
+            self._gain, self._loss = float(avg_gain[-1]), float(avg_loss[-1])
+        else:  # ещё прогрев: суммы, а не средние
+            self._gain, self._loss = float(np.sum(gain[1:])), float(np.sum(loss[1:]))
+        return (rsi(avg_gain, avg_loss),)
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class OnlineADX(OnlineIndicator):
+    """
+    ADX Уайлдера: +DM/-DM и TR сглаживаются суммой (первые period - 1 баров — простая сумма),
+    DX усредняется за первые period значений, дальше ADX = (ADX * (period - 1) + DX) / period.
+    Первое значение — на баре 2 * period - 1.
+    """
+
+    inputs = ("High", "Low", "Close")
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self._prev = None
+        self._count = 0  # баров после первого
+        self._plus_dm = self._minus_dm = self._tr = 0.0
+        self._sum_dx = 0.0
+        self._adx = NAN
+
+    def _step(self, high, low, close):
+        prev, self._prev = self._prev, (high, low, close)
+        if prev is None:
+            return (NAN,)
+        prev_high, prev_low, prev_close = prev
+        diff_plus, diff_minus = high - prev_high, prev_low - low
+        plus_dm = diff_plus if diff_plus > 0 and diff_plus > diff_minus else 0.0
+        minus_dm = diff_minus if diff_minus > 0 and diff_plus < diff_minus else 0.0
+        tr = _true_range(high, low, prev_close)
+        p = self.period
+        self._count += 1
+        if self._count < p:
+            self._plus_dm += plus_dm
+            self._minus_dm += minus_dm
+            self._tr += tr
+            return (NAN,)
+        self._plus_dm += plus_dm - self._plus_dm / p
+        self._minus_dm += minus_dm - self._minus_dm / p
+        self._tr += tr - self._tr / p
+        dx = None
+        if abs(self._tr) > EPS:
+            plus_di, minus_di = 100.0 * self._plus_dm / self._tr, 100.0 * self._minus_dm / self._tr
+            if abs(plus_di + minus_di) > EPS:
+                dx = 100.0 * abs(plus_di - minus_di) / (plus_di + minus_di)
+        if self._count < 2 * p:
+            self._sum_dx += dx or 0.0
+            if self._count < 2 * p - 1:
+                return (NAN,)
+            self._adx = self._sum_dx / p
+        elif dx is not None:
+            self._adx = (self._adx * (p - 1) + dx) / p
+        return (self._adx,)
+
+    def _batch(self, high, low, close):
+        p, n = self.period, len(close)
+        raw = (
+            directional_move(high, low, plus=True),
+            directional_move(high, low, plus=False),
+            true_range(high, low, close),
+        )
+        sums = [wilder_sum(x, p) for x in raw]
+        plus_di, minus_di = di(sums[0], sums[2]), di(sums[1], sums[2])
+        out = adx(plus_di, minus_di, p)
+        self._prev = (float(high[-1]), float(low[-1]), float(close[-1])) if n else None
+        self._count = max(n - 1, 0)
+        # до первой суммы Уайлдера (бар period - 1) — простая сумма
+        self._plus_dm, self._minus_dm, self._tr = (
+            float(smoothed[-1]) if self._count >= p - 1 else float(np.sum(x[1:])) for x, smoothed in zip(raw, sums)
+        )
+        self._sum_dx = float(np.nansum(dx(plus_di, minus_di)[p:2 * p]))
+        self._adx = float(out[-1]) if self._count >= 2 * p - 1 else NAN
+        return (out,)
+
+
+class OnlineBBANDS(OnlineIndicator):
+    """Полосы Боллинджера на SMA: середина ± nbdev * стандартное отклонение (по генеральной совокупности)."""
+
+    outputs = ("upperband", "middleband", "lowerband")
+
+    def __init__(self, period: int = 5, nbdevup: float = 2.0, nbdevdn: float = 2.0, matype: int = 0):
+        if int(matype) != 0:
+            raise ValueError("Online BBANDS supports only matype=0 (SMA)")
+        self.period = int(period)
+        self.nbdevup, self.nbdevdn = float(nbdevup), float(nbdevdn)
+        self._window: deque = deque(maxlen=self.period)
+
+    def _step(self, close):
+        self._window.append(close)
+        if len(self._window) < self.period:
+            return NAN, NAN, NAN
+        # отклонение — вторым проходом по окну, O(window): sum_sq / n - mean² теряет точность при больших ценах
+        mean = sum(self._window) / self.period
+        std = (sum((v - mean) ** 2 for v in self._window) / self.period) ** 0.5
+        return mean + self.nbdevup * std, mean, mean - self.nbdevdn * std
+
+    def _batch(self, close):
+        middle, std = sma(close, self.period), rolling_std(close, self.period)
+        self._window = deque(close[-self.period:].tolist(), maxlen=self.period)
+        return middle + self.nbdevup * std, middle, middle - self.nbdevdn * std
+
+
+class OnlineCCI(OnlineIndicator):
+    """CCI: (TP - SMA(TP)) / (0.015 * среднее абсолютное отклонение TP), TP = (High + Low + Close) / 3."""
+
+    inputs = ("High", "Low", "Close")
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self._window: deque = deque(maxlen=self.period)
+
+    def _step(self, high, low, close):
+        tp = (high + low + close) / 3.0
+        self._window.append(tp)
+        if len(self._window) < self.period:
+            return (NAN,)
+        mean = sum(self._window) / self.period
+        deviation = sum(abs(v - mean) for v in self._window) / self.period  # O(window)
+        return ((tp - mean) / (0.015 * deviation) if abs(deviation) > EPS else 0.0,)
+
+    def _batch(self, high, low, close):
+        tp = (high + low + close) / 3.0
+        self._window = deque(tp[-self.period:].tolist(), maxlen=self.period)
+        return (cci(tp, self.period),)
+
+
+# Индикаторы, у которых есть онлайн-версия (имя как в indicator_list.txt)
+ONLINE_INDICATORS: Dict[str, Type[OnlineIndicator]] = {
+    "SMA": OnlineSMA,
+    "EMA": OnlineEMA,
+    "RSI": OnlineRSI,
+    "ADX": OnlineADX,
+    "BBANDS": OnlineBBANDS,
+    "CCI": OnlineCCI,
+}
+
+
+def online_instances(name: str, params: Dict[str, List[Any]]) -> List[OnlineIndicator]:
+    """
+    Инстансы индикатора по параметрам из kwargs_map ({'period': [14, 28]} -> два объекта) в порядке инстансов.
+    Нет онлайн-версии или параметр не распознан -> [].
+    """
+    cls = ONLINE_INDICATORS.get(name)
+    if cls is None:
+        return []
+    kwargs = instance_kwargs(params, set(inspect.signature(cls).parameters))
+    try:
+        return [cls(**kw) for kw in kwargs] if kwargs is not None else []
+    except (TypeError, ValueError):
+        return []
+
+
+def online_columns(df: pd.DataFrame, name: str, params: Dict[str, List[Any]]) -> Optional[pd.DataFrame]:
+    """
+    Колонки индикатора по всей истории через batch онлайн-версий — с теми же именами, что подписи
+    колонок в условиях ('SMA_14 period', 'BBANDS_upperband'). Нет онлайн-версии -> None.
+    Подписи различают инстансы только по period: если у нескольких инстансов имена совпали бы
+    (BBANDS с двумя period), тоже None — индикатор считается через calculate.Indicator.
+    """
+    instances = online_instances(name, params)
+    if not instances:
+        return None
+    names = indicator_output_names(name, instances[0].outputs)
+    labels = [
+        [indicator_column_label(name, inst_no, label, {f"{name}__{inst_no}__period": inst.period}) for label in names]
+        for inst_no, inst in enumerate(instances, start=1)
+    ]
+    if len({label for row in labels for label in row}) < sum(map(len, labels)):
+        return None
+    cols: Dict[str, np.ndarray] = {}
+    for inst, row in zip(instances, labels):
+        values = inst.batch(df)
+        cols.update((label, values[output]) for label, output in zip(row, inst.outputs))
+    return pd.DataFrame(cols, index=df.index)
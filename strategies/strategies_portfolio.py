@@ -0,0 +1,216 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import time
+import numpy as np
+import pandas as pd
+from .strategies_backtest import run_backtest
+from .strategies_candles import load_candles
+from .strategies_executor import (
+    publish_candles,
+    attach_candles,
+    release_candles,
+    terminate_pool,
+    BacktestTimeout,
+    MP_CONTEXT,
+)
+from .strategies_metrics import summary_metrics, equity_metrics
+from .strategies_constants import (
+    PORTFOLIO_WORKERS,
+    PORTFOLIO_LOAD_THREADS,
+    BACKTEST_ENGINE,
+    BACKTEST_TIMEOUT,
+    DEFAULT_BARS_PER_YEAR,
+)
+
+# (символ, дескриптор свечей в shared memory, индикаторы, параметры индикаторов, условия, periods_per_year, движок)
+SymbolJob = Tuple[str, Dict[str, Any], List[str], Dict[str, Dict[str, Any]], Dict, float, str]
+# progress(доля выполненного 0..1, этап)
+Progress = Callable[[float, str], None]
+
+def _load_symbol(symbol: str, start, end, interval: str) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """Свечи символа (в потоке родителя, через общий кэш) -> (свечи, None) или (None, ошибка)."""
+    try:
+        candles = load_candles(symbol, start, end, interval)
+    except Exception as exc:
+        return None, f"load: {exc}"
+    if len(candles) == 0:
+        return None, "no data"
+    return candles, None
+
+
+def _symbol_job(job: SymbolJob) -> Dict[str, Any]:
+    """Один символ в процессе пула: индикаторы -> бэктест всех стратегий; ошибка — в поле error, а не исключением."""
+    symbol, desc, indicators, kwargs_map, conditions, ppy, engine = job
+    shm, candles = attach_candles(desc)
+    try:
+        batch, _, _ = run_backtest(
+            candles.copy(), conditions, indicators, kwargs_map, engine=engine, periods_per_year=ppy
+        )
+    except Exception as exc:
+        return {"symbol": symbol, "error": str(exc)}
+    finally:
+        del candles
+        release_candles(shm)
+    return {
+        "symbol": symbol,
+        "ids": list(batch["ids"]),
+        "cum_returns": np.asarray(batch["cum_returns"], dtype=np.float64),
+        "metrics": summary_metrics(batch, ppy),
+    }
+
+
+def align_equity(results: List[Dict[str, Any]], ids: List[str]) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """
+    Кривые капитала символов -> общая шкала времени (объединение баров всех символов):
+    матрица (n_bars × n_symbols × n_strategies). Бар, которого у символа нет, наследует
+    предыдущее значение; до первого бара символа капитал равен 1.
+    """
+    index = results[0]["index"]
+    for res in results[1:]:
+        index = index.union(res["index"])
+    equity = np.ones((len(index), len(results), len(ids)))
+    for s, res in enumerate(results):
+        columns = [res["ids"].index(sid) if sid in res["ids"] else None for sid in ids]
+        frame = pd.DataFrame(
+            {j: res["cum_returns"][:, c] for j, c in enumerate(columns) if c is not None}, index=res["index"]
+        )
+        frame = frame.reindex(index).ffill().fillna(1.0)
+        for j in frame.columns:
+            equity[:, s, j] = frame[j].to_numpy()
+    return index, equity
+
+
+def cross_section(per_symbol: pd.DataFrame) -> pd.DataFrame:
+    """
+    Срез по символам для каждой стратегии: сколько символов, доля прибыльных, средний и медианный
+    Sharpe, разброс доходности между символами, лучший и худший символ.
+    """
+    if per_symbol.empty:
+        return per_symbol
+    rows = []
+    for sid, part in per_symbol.groupby("strategy", sort=False):
+        ranked = part.sort_values("total_return", ascending=False)
+        rows.append(
+            {
+                "strategy": sid,
+                "symbols": len(part),
+                "profitable_share": float((part["total_return"] > 0).mean()),
+                "mean_sharpe": float(part["sharpe"].mean()),
+                "median_sharpe": float(part["sharpe"].median()),
+                "return_dispersion": float(part["total_return"].std(ddof=0)),
+                "best_symbol": ranked["symbol"].iloc[0],
+                "worst_symbol": ranked["symbol"].iloc[-1],
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def _run_jobs(jobs: List[SymbolJob], workers: int, timeout: Optional[float], progress: Progress) -> List[Dict[str, Any]]:
+    """Расчёт символов в пуле процессов (или в текущем, если воркер/символ один) с общим таймаутом."""
+    deadline = time.monotonic() + timeout if timeout else None
+    results: List[Dict[str, Any]] = []
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            if deadline is not None and time.monotonic() > deadline:
+                raise BacktestTimeout(f"Portfolio did not finish in {timeout:g} s")
+            results.append(_symbol_job(job))
+            progress(len(results) / len(jobs), f"Backtest {len(results)}/{len(jobs)}")
+        return results
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=MP_CONTEXT)
+    try:
+        futures = [pool.submit(_symbol_job, job) for job in jobs]
+        for future in as_completed(futures, timeout=timeout or None):
+            results.append(future.result())
+            progress(len(results) / len(jobs), f"Backtest {len(results)}/{len(jobs)}")
+        pool.shutdown()
+    except FutureTimeout:
+        terminate_pool(pool)
+        raise BacktestTimeout(f"Portfolio did not finish in {timeout:g} s")
+    except BaseException:
+        terminate_pool(pool)  # в т.ч. отмена фоновой задачи
+        raise
+    return results
+
+
+def _no_progress(fraction: float, stage: str) -> None:
+    pass
+
+
+def run_portfolio(
+    symbols: List[str],
+    start,
+    end,
+    interval: str,
+    indicators: List[str],
+    kwargs_map: Dict[str, Dict[str, Any]],
+    conditions: Dict,
+    periods_per_year: float = DEFAULT_BARS_PER_YEAR,
+    workers: int = PORTFOLIO_WORKERS,
+    engine: str = BACKTEST_ENGINE,
+    timeout: Optional[float] = BACKTEST_TIMEOUT,
+    progress: Progress = _no_progress,
+) -> Dict[str, Any]:
+    """
+    Один набор стратегий на N символах: свечи грузятся в родителе (потоки, общий кэш свечей),
+    в пул процессов уходит только расчёт — свечи через shared memory. Затем кривые капитала
+    выравниваются по времени и складываются в портфель (равные доли капитала на символ, без ребалансировки).
+    Не уложились в timeout — BacktestTimeout. progress(доля, этап) — для фонового callback-а.
+    Возвращает index, ids, equity (n_bars × n_strategies — портфель), portfolio (метрики портфеля),
+    per_symbol (метрики символ × стратегия), cross_section и errors ({символ: текст}).
+    """
+    symbols = list(dict.fromkeys(symbols))
+    progress(0.0, "Loading data")
+    with ThreadPoolExecutor(max_workers=max(1, min(PORTFOLIO_LOAD_THREADS, len(symbols)))) as threads:
+        loaded = dict(zip(symbols, threads.map(lambda sym: _load_symbol(sym, start, end, str(interval)), symbols)))
+
+    errors = {symbol: error for symbol, (_, error) in loaded.items() if error}
+    candles = {symbol: frame for symbol, (frame, _) in loaded.items() if frame is not None}
+    published = {symbol: publish_candles(frame) for symbol, frame in candles.items()}
+    try:
+        jobs: List[SymbolJob] = [
+            (symbol, desc, indicators, kwargs_map, conditions, periods_per_year, engine)
+            for symbol, (_, desc) in published.items()
+        ]
+        results = _run_jobs(jobs, workers, timeout, progress)
+    finally:
+        for shm, _ in published.values():
+            release_candles(shm, unlink=True)
+
+    order = {symbol: i for i, symbol in enumerate(symbols)}
+    results.sort(key=lambda res: order[res["symbol"]])
+    for res in results:
+        res["index"] = candles[res["symbol"]].index
+    errors.update((res["symbol"], res["error"]) for res in results if "error" in res)
+    results = [res for res in results if "error" not in res]
+    ids = list(dict.fromkeys(sid for res in results for sid in res["ids"]))
+    if not results or not ids:
+        return {
+            "index": pd.DatetimeIndex([]),
+            "ids": [],
+            "equity": np.ones((0, 0)),
+            "portfolio": pd.DataFrame(),
+            "per_symbol": pd.DataFrame(),
+            "cross_section": pd.DataFrame(),
+            "errors": errors,
+        }
+
+    index, sleeves = align_equity(results, ids)
+    equity = sleeves.mean(axis=1)
+    portfolio = pd.DataFrame({"strategy": ids, **equity_metrics(equity, periods_per_year)})
+    per_symbol = pd.DataFrame(
+        [
+            {"symbol": res["symbol"], "strategy": sid, **{name: float(v[j]) for name, v in res["metrics"].items()}}
+            for res in results
+            for j, sid in enumerate(res["ids"])
+        ]
+    )
+    return {
+        "index": index,
+        "ids": ids,
+        "equity": equity,
+        "portfolio": portfolio,
+        "per_symbol": per_symbol,
+        "cross_section": cross_section(per_symbol),
+        "errors": errors,
+    }
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import pandas as pd
+from .strategies_lru import ByteLRU
+from .strategies_spec import spec_hash
+from .strategies_figures import chart_entry_nbytes
+from .strategies_constants import (
+    RESULT_CACHE_TTL,
+    RESULT_CACHE_MAX_BYTES,
+    CANDLE_TAIL_REFRESH_SECONDS,
+    BACKGROUND_CALLBACKS,
+    BACKGROUND_CACHE_DIR,
+)
+
+
+def submit_key(ticker: str, start, end, interval: str, spec: Dict[str, Any], walk_forward: str = "off") -> str:
+    """
+    Канонический хэш запроса Submit: данные (тикер, даты, интервал) + хэш спецификации стратегий
+    (strategies_spec) — порядок карточек, UI-подписи и пустые условия на ключ не влияют —
+    + режим walk-forward.
+    """
+    payload = {
+        "ticker": ticker,
+        "start": str(start),
+        "end": str(end),
+        "interval": str(interval),
+        "indicators": list(spec["indicators"]),
+        "spec": spec_hash(spec),
+        "walk_forward": walk_forward or "off",
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def result_ttl(end) -> float:
+    """Диапазон до сегодняшнего дня устаревает вместе с хвостом свечей, прошлый — по RESULT_CACHE_TTL."""
+    try:
+        ends_today = pd.Timestamp(end).normalize() >= pd.Timestamp.today().normalize()
+    except (TypeError, ValueError):
+        ends_today = True
+    return CANDLE_TAIL_REFRESH_SECONDS if ends_today else RESULT_CACHE_TTL
+
+
+# Оценка размера выходов create_charts без сериализации: трассы фигур — прореженные копии массивов
+# chart_entry (не больше их самих), сверху — таблицы метрик, раскладка и компоненты
+_OUTPUTS_OVERHEAD_BYTES = 256 * 1024
+
+
+def _payload_nbytes(value: Dict[str, Any]) -> int:
+    return value["nbytes"]
+
+
+class ResultCache:
+    """
+    Готовые выходы create_charts (компоненты с прореженными фигурами и таблицами метрик) и массивы
+    графиков для зума по ключу submit_key, с TTL и LRU-вытеснением по байтам.
+    В фоновом режиме — в diskcache: задача create_charts выполняется в отдельном процессе.
+    """
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_MAX_BYTES, disk_dir: Optional[str] = None):
+        self._memory = ByteLRU(max_bytes, _payload_nbytes, ttl=RESULT_CACHE_TTL)
+        self._disk = None
+        if disk_dir:
+            try:
+                import diskcache
+
+                self._disk = diskcache.Cache(disk_dir, size_limit=max_bytes)
+            except ImportError:
+                self._disk = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._disk is not None:
+            return self._disk.get(key)
+        return self._memory.get(key)
+
+    def put(self, key: str, outputs, chart_entry: Dict[str, Any], token: str, ttl: float) -> None:
+        value = {"outputs": outputs, "chart_entry": chart_entry, "token": token}
+        if self._disk is not None:
+            self._disk.set(key, value, expire=ttl)
+            return
+        value["nbytes"] = 2 * chart_entry_nbytes(chart_entry) + _OUTPUTS_OVERHEAD_BYTES
+        self._memory.put(key, value, ttl=ttl)
+
+
+result_cache = ResultCache(disk_dir=os.path.join(BACKGROUND_CACHE_DIR, "results") if BACKGROUND_CALLBACKS else None)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+from .strategies_conditions import normalize_conditions
+from .strategies_helpful_functions import replace_ids_with_names, indicator_column_label, RAW_OUTPUT_RE
+
+# Каноническая спецификация стратегии (без UI-полей *_label / *_raw-дубликатов):
+# {
+#   "version": 1,
+#   "indicators": {"SMA": {"1": {"period": 5}, "2": {"period": 10}}},
+#   "strategies": [{"name": "A", "buy": [["Close", ">", "SMA__1__i period"]], "sell": [["Close", "<", 100]]}]
+# }
+# Ссылка на колонку — raw-ключ индикатора (IND__INST__COL) или имя колонки свечей; число — константа.
+SPEC_VERSION = 1
+
+
+def _canonical_value(value: Any):
+    """'14' -> 14, '0.5' -> 0.5, ' 5..50:5 ' -> '5..50:5'; пустые значения -> None."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return int(value) if float(value).is_integer() else float(value)
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    return int(number) if number.is_integer() else number
+
+
+def _ref(ref: Tuple) -> Any:
+    if ref[0] == "const":
+        return _canonical_value(ref[1])
+    _, value, raw = ref
+    return raw if RAW_OUTPUT_RE.fullmatch(str(raw)) else value
+
+
+def build_spec(
+    indicators: Optional[List[str]],
+    stored_inputs: Optional[Dict[str, Any]],
+    conditions_store_inputs: Optional[Dict[str, Dict[str, Any]]],
+    strategies: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Состояние UI -> спецификация. strategies (strategies_store) нужен, если ключи условий
+    ещё с id стратегий ('1_buy_0'); после replace_ids_with_names его можно не передавать.
+    Параметры невыбранных индикаторов (остаются в stored_inputs после снятия) и пустые карточки стратегий
+    не попадают в спецификацию, стратегии сортируются по содержимому — spec_hash не зависит от устаревших полей и порядка карточек.
+    """
+    conditions = conditions_store_inputs or {}
+    if strategies:
+        conditions = replace_ids_with_names(conditions, strategies)
+
+    params: Dict[str, Dict[str, Dict[str, Any]]] = {ind: {} for ind in indicators or []}
+    for key, value in (stored_inputs or {}).items():
+        parts = key.split("__", 2)
+        value = _canonical_value(value)
+        if len(parts) != 3 or value is None or parts[0] not in params:
+            continue
+        ind, inst, param = parts
+        params[ind].setdefault(str(int(inst)), {})[param] = value
+
+    strategies_spec = [
+        {
+            "name": sid,
+            "buy": [[_ref(lhs), op, _ref(rhs)] for lhs, op, rhs in buy],
+            "sell": [[_ref(lhs), op, _ref(rhs)] for lhs, op, rhs in sell],
+        }
+        for sid, buy, sell in normalize_conditions(conditions)
+        if buy or sell  # карточка без единого заполненного условия в бэктест не попадает
+    ]
+    return {
+        "version": SPEC_VERSION,
+        "indicators": params,
+        "strategies": sorted(strategies_spec, key=export_spec),
+    }
+
+
+def export_spec(spec: Dict[str, Any]) -> str:
+    """Компактный канонический JSON (ключи отсортированы) — одинаковая спецификация даёт одну строку."""
+    return json.dumps(spec, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def spec_hash(spec: Dict[str, Any]) -> str:
+    return hashlib.blake2b(export_spec(spec).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def import_spec(text: str) -> Dict[str, Any]:
+    """JSON -> спецификация; ValueError, если формат не тот."""
+    spec = json.loads(text)
+    if not isinstance(spec, dict) or spec.get("version") != SPEC_VERSION:
+        raise ValueError(f"Unsupported strategy spec version: {spec.get('version') if isinstance(spec, dict) else None!r}")
+    if not isinstance(spec.get("indicators"), dict) or not isinstance(spec.get("strategies"), list):
+        raise ValueError("Strategy spec must contain 'indicators' (dict) and 'strategies' (list)")
+    for strategy in spec["strategies"]:
+        for side in ("buy", "sell"):
+            for clause in strategy.get(side, []):
+                if not (isinstance(clause, list) and len(clause) == 3):
+                    raise ValueError(f"Bad condition in strategy {strategy.get('name')!r}: {clause!r}")
+    return spec
+
+
+def _condition_fields(ref: Any, stored_inputs: Dict[str, Any], prefix: str) -> Dict[str, Any]:
+    m = RAW_OUTPUT_RE.fullmatch(str(ref))
+    if m:
+        ind, inst, col = m.groups()
+        label = indicator_column_label(ind, inst, col, stored_inputs)
+        return {prefix: label, f"{prefix}_label": label, f"{prefix}_raw": ref}
+    return {prefix: ref, f"{prefix}_label": ref, f"{prefix}_raw": ref}
+
+
+def spec_to_inputs(spec: Dict[str, Any]) -> Tuple[List[str], Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Спецификация -> (indicators, stored_inputs, conditions_store_inputs) в тех же формах, что даёт UI
+    (ключи условий — по имени стратегии, как после replace_ids_with_names).
+    """
+    indicators = list(spec["indicators"].keys())
+    stored_inputs = {
+        f"{ind}__{inst}__{param}": value
+        for ind, instances in spec["indicators"].items()
+        for inst, values in instances.items()
+        for param, value in values.items()
+    }
+    conditions: Dict[str, Dict[str, Any]] = {}
+    for strategy in spec["strategies"]:
+        sid = str(strategy["name"])
+        for side in ("buy", "sell"):
+            clauses = strategy.get(side) or []
+            if not clauses:
+                conditions[f"{sid}_{side}_0"] = {}
+            for idx, (lhs, op, rhs) in enumerate(clauses):
+                cond = {"comparison_operator": op, **_condition_fields(lhs, stored_inputs, "column")}
+                if isinstance(rhs, (int, float)) and not isinstance(rhs, bool):
+                    cond.update(column_or_custom="custom", custom=rhs)
+                else:
+                    cond.update(_condition_fields(rhs, stored_inputs, "column_or_custom"))
+                conditions[f"{sid}_{side}_{idx}"] = cond
+    return indicators, stored_inputs, conditions
@@ -0,0 +1,223 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import itertools
+import re
+import time
+import numpy as np
+import pandas as pd
+from .strategies_backtest import run_batch_backtest
+from .strategies_executor import (
+    publish_candles,
+    attach_candles,
+    release_candles,
+    terminate_pool,
+    BacktestTimeout,
+    MP_CONTEXT,
+)
+from .strategies_helpful_functions import group_params, relabel_conditions
+from .strategies_indicators import compute_indicators
+from .strategies_metrics import summary_metrics
+from .strategies_constants import SWEEP_MAX_COMBINATIONS, SWEEP_WORKERS, BACKTEST_TIMEOUT, DEFAULT_BARS_PER_YEAR
+
+# '5..50:5' (от..до:шаг, границы включительно) или '5..50' (шаг 1)
+RANGE_RE = re.compile(
+    r"^\s*(-?\d+(?:\.\d+)?)\s*\.\.\s*(-?\d+(?:\.\d+)?)\s*(?::\s*(\d+(?:\.\d+)?))?\s*$"
+)
+
+RANK_METRIC = "sharpe"
+
+
+def _number(value):
+    value = round(float(value), 10)
+    return int(value) if value.is_integer() else value
+
+
+def parse_param_values(value: Any) -> List[Any]:
+    """
+    Значение поля параметра -> список значений для перебора:
+    14 -> [14]; '5..50:5' -> [5, 10, ..., 50]; '10, 20, 30' -> [10, 20, 30]; 'abc' -> ['abc'].
+    """
+    if value is None or isinstance(value, (int, float)):
+        return [value]
+    text = str(value).strip()
+    m = RANGE_RE.match(text)
+    if m:
+        lo, hi = float(m.group(1)), float(m.group(2))
+        step = float(m.group(3) or 1)
+        if step <= 0 or hi < lo:
+            return [text]
+        count = int(np.floor((hi - lo) / step + 1e-9)) + 1
+        return [_number(lo + i * step) for i in range(count)]
+    parts = [p.strip() for p in text.split(",")] if "," in text else [text]
+    out = []
+    for part in parts:
+        try:
+            out.append(_number(part))
+        except ValueError:
+            out.append(part)
+    return out
+
+
+def expand_param_grid(
+    stored_inputs: Optional[Dict[str, Any]], limit: int = SWEEP_MAX_COMBINATIONS
+) -> Tuple[List[Dict[str, Any]], List[str], int]:
+    """
+    stored_inputs (IND__INST__PARAM -> значение/диапазон) -> (комбинации, ключи перебора, размер сетки).
+    Комбинаций возвращается не больше limit. Без диапазонов — ровно одна комбинация с числовыми значениями.
+    """
+    stored_inputs = stored_inputs or {}
+    keys = list(stored_inputs.keys())
+    values = [
+        parse_param_values(v) if not (isinstance(v, str) and v.strip() == "") else [v]
+        for v in stored_inputs.values()
+    ]
+    swept = [k for k, vals in zip(keys, values) if len(vals) > 1]
+    combos = [dict(zip(keys, combo)) for combo in itertools.islice(itertools.product(*values), limit)]
+    return combos, swept, int(np.prod([len(vals) for vals in values]))
+
+
+def params_label(combo: Dict[str, Any], swept: List[str]) -> str:
+    """{'SMA__1__period': 10} -> 'SMA 1 period=10' (только перебираемые ключи)."""
+    return ", ".join(f"{k.replace('__', ' ')}={combo[k]}" for k in swept)
+
+
+# Состояние воркера пула: условия передаются один раз на процесс (initializer),
+# свечи — через shared memory (воркер держит представление до конца перебора).
+# Пул стартует от MP_CONTEXT (forkserver/spawn), поэтому initializer, evaluate и их аргументы
+# передаются через pickle: только функции уровня модуля и простые данные
+_WORKER: Dict[str, Any] = {}
+
+# Оценка одной комбинации: (combo, состояние воркера) -> результат; функция уровня модуля (pickle)
+Evaluate = Callable[[Dict[str, Any], Dict[str, Any]], Any]
+
+
+def _init_worker(
+    candles_desc: Dict[str, Any],
+    indicators: List[str],
+    conditions: Dict,
+    periods_per_year: float,
+    evaluate: Evaluate,
+    options: Optional[Dict[str, Any]] = None,
+) -> None:
+    shm, candles = attach_candles(candles_desc)
+    _WORKER.update(
+        shm=shm,
+        candles=candles,
+        indicators=indicators,
+        conditions=conditions,
+        periods_per_year=periods_per_year,
+        evaluate=evaluate,
+        options=options or {},
+    )
+
+
+def _call_worker(combo: Dict[str, Any]):
+    return _WORKER["evaluate"](combo, _WORKER)
+
+
+def combo_rows(batch: Dict[str, Any], periods_per_year: float) -> List[Dict[str, Any]]:
+    """Бэктест одной комбинации -> строки рейтинга: метрики по каждой стратегии."""
+    metrics = summary_metrics(batch, periods_per_year)
+    return [
+        {"strategy": sid, **{name: float(values[j]) for name, values in metrics.items()}}
+        for j, sid in enumerate(batch["ids"])
+    ]
+
+
+def _evaluate_combo(combo: Dict[str, Any], state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Одна комбинация параметров: индикаторы -> сигналы -> бэктест -> метрики по каждой стратегии."""
+    df, _ = compute_indicators(state["candles"], state["indicators"], group_params(combo))
+    try:
+        batch = run_batch_backtest(df, relabel_conditions(state["conditions"], combo), state["periods_per_year"])
+    except KeyError:
+        return []
+    return combo_rows(batch, state["periods_per_year"])
+
+
+def map_combos(
+    candles: pd.DataFrame,
+    indicators: List[str],
+    combos: List[Dict[str, Any]],
+    conditions: Dict,
+    evaluate: Evaluate,
+    periods_per_year: float = DEFAULT_BARS_PER_YEAR,
+    options: Optional[Dict[str, Any]] = None,
+    max_workers: int = SWEEP_WORKERS,
+    timeout: Optional[float] = BACKTEST_TIMEOUT,
+) -> List[Any]:
+    """
+    evaluate(combo, state) для каждой комбинации — в пуле процессов (свечи общие для воркеров
+    через shared memory) или в текущем процессе, если воркер один или комбинация одна.
+    Результаты — в порядке combos. Не уложились в timeout секунд — BacktestTimeout: пул этого вызова
+    завершается (в текущем процессе проверка — между комбинациями).
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    if max_workers <= 1 or len(combos) < 2:
+        state = dict(
+            candles=candles,
+            indicators=indicators,
+            conditions=conditions,
+            periods_per_year=periods_per_year,
+            options=options or {},
+        )
+        out = []
+        for c in combos:
+            if deadline is not None and time.monotonic() > deadline:
+                raise BacktestTimeout(f"Parameter search did not finish in {timeout:g} s")
+            out.append(evaluate(c, state))
+        return out
+    shm, desc = publish_candles(candles)
+    pool = ProcessPoolExecutor(
+        max_workers=min(max_workers, len(combos)),
+        mp_context=MP_CONTEXT,
+        initializer=_init_worker,
+        initargs=(desc, indicators, conditions, periods_per_year, evaluate, options),
+    )
+    try:
+        results = list(
+            pool.map(_call_worker, combos, chunksize=max(1, len(combos) // (4 * max_workers)), timeout=timeout or None)
+        )
+        pool.shutdown()
+        return results
+    except FutureTimeout:
+        terminate_pool(pool)
+        raise BacktestTimeout(f"Parameter search did not finish in {timeout:g} s")
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        release_candles(shm, unlink=True)
+
+
+def run_sweep(
+    candles: pd.DataFrame,
+    indicators: List[str],
+    combos: List[Dict[str, Any]],
+    swept: List[str],
+    conditions: Dict,
+    periods_per_year: float = DEFAULT_BARS_PER_YEAR,
+    max_workers: int = SWEEP_WORKERS,
+) -> pd.DataFrame:
+    """
+    Перебор комбинаций параметров в пуле процессов (свечи общие для воркеров через shared memory)
+    -> таблица метрик, отсортированная по RANK_METRIC (лучшие сверху).
+    Колонка 'combo' хранит полный набор параметров строки.
+    """
+    chunks = map_combos(
+        candles, indicators, combos, conditions, _evaluate_combo, periods_per_year, max_workers=max_workers
+    )
+    return sweep_ranking(combos, swept, chunks)
+
+
+def sweep_ranking(combos: List[Dict[str, Any]], swept: List[str], chunks: List[List[Dict[str, Any]]]) -> pd.DataFrame:
+    """Строки метрик по комбинациям (combo_rows, в порядке combos) -> рейтинг по RANK_METRIC."""
+    rows = [
+        {"params": params_label(combo, swept), "combo": combo, **row}
+        for combo, chunk in zip(combos, chunks)
+        for row in chunk
+    ]
+    ranking = pd.DataFrame(rows)
+    if ranking.empty:
+        return ranking
+    return ranking.sort_values(RANK_METRIC, ascending=False, kind="stable").reset_index(drop=True)
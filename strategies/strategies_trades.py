@@ -0,0 +1,96 @@
+from __future__ import annotations
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+# Одна строка — одна сделка; strategy — номер столбца batch (batch["ids"][strategy])
+LEDGER_DTYPE = np.dtype(
+    [
+        ("strategy", np.int32),
+        ("entry_bar", np.int64),
+        ("exit_bar", np.int64),
+        ("entry_price", np.float64),
+        ("exit_price", np.float64),
+        ("pnl", np.float64),
+        ("holding_bars", np.int64),
+        ("mae", np.float64),
+        ("mfe", np.float64),
+        ("is_open", np.bool_),
+    ]
+)
+
+
+def _segment_reduce(ufunc, values: np.ndarray, starts: np.ndarray, ends: np.ndarray, empty: float) -> np.ndarray:
+    """ufunc.reduce по отрезкам [starts, ends) за один вызов reduceat; пустые отрезки -> empty."""
+    if len(starts) == 0:
+        return np.empty(0)
+    padded = np.append(values, empty)
+    bounds = np.empty(2 * len(starts), dtype=np.int64)
+    bounds[0::2] = starts
+    bounds[1::2] = ends
+    out = ufunc.reduceat(padded, bounds)[0::2]
+    out[ends <= starts] = empty
+    return out
+
+
+def build_ledger(batch: Dict, df: pd.DataFrame) -> np.ndarray:
+    """
+    Журнал сделок всех стратегий по событиям batch["events"]: вход/выход (бар и цена Close),
+    PnL сделки, число баров в позиции, MAE/MFE (худшее/лучшее движение Low/High
+    относительно цены входа за время удержания). Незакрытая позиция оценивается по последнему бару.
+    """
+    events = batch["events"]
+    n = len(df)
+    close = df["Close"].to_numpy(dtype=np.float64)
+    high = df["High"].to_numpy(dtype=np.float64) if "High" in df.columns else close
+    low = df["Low"].to_numpy(dtype=np.float64) if "Low" in df.columns else close
+
+    is_entry = events["side"] == 1
+    entry_col, entry_bar = events["strategy"][is_entry], events["bar"][is_entry]
+    exit_col, exit_bar = events["strategy"][~is_entry], events["bar"][~is_entry]
+
+    # k-й выход стратегии закрывает её k-й вход; входам без выхода — последний бар
+    k = len(batch["ids"])
+    n_exits = np.bincount(exit_col, minlength=k)
+    entry_starts = np.concatenate(([0], np.cumsum(np.bincount(entry_col, minlength=k))[:-1]))
+    exit_starts = np.concatenate(([0], np.cumsum(n_exits)[:-1]))
+    rank = np.arange(len(entry_col)) - entry_starts[entry_col]
+    is_open = rank >= n_exits[entry_col]
+    paired = np.where(is_open, 0, exit_starts[entry_col] + rank)
+    trade_exit = np.where(is_open, n - 1, exit_bar[paired] if len(exit_bar) else n - 1)
+
+    ledger = np.empty(len(entry_col), dtype=LEDGER_DTYPE)
+    ledger["strategy"] = entry_col
+    ledger["entry_bar"] = entry_bar
+    ledger["exit_bar"] = trade_exit
+    ledger["entry_price"] = close[entry_bar]
+    ledger["exit_price"] = close[trade_exit]
+    ledger["holding_bars"] = trade_exit - entry_bar
+    ledger["is_open"] = is_open
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ledger["pnl"] = np.nan_to_num(close[trade_exit] / close[entry_bar] - 1.0)
+        # в позиции с бара после сигнала входа по бар выхода включительно
+        worst = _segment_reduce(np.fmin, low, entry_bar + 1, trade_exit + 1, np.nan)
+        best = _segment_reduce(np.fmax, high, entry_bar + 1, trade_exit + 1, np.nan)
+        ledger["mae"] = np.nan_to_num(np.minimum(worst / close[entry_bar] - 1.0, 0.0))
+        ledger["mfe"] = np.nan_to_num(np.maximum(best / close[entry_bar] - 1.0, 0.0))
+    return ledger
+
+
+def ledger_frame(ledger: np.ndarray, ids: List[str], index: pd.Index) -> pd.DataFrame:
+    """Журнал сделок -> DataFrame для выгрузки и таблицы: имена стратегий и время вместо номеров."""
+    names = np.asarray(ids, dtype=object)
+    return pd.DataFrame(
+        {
+            "strategy": names[ledger["strategy"]] if len(ledger) else [],
+            "entry_time": index[ledger["entry_bar"]],
+            "exit_time": index[ledger["exit_bar"]],
+            "entry_price": ledger["entry_price"],
+            "exit_price": ledger["exit_price"],
+            "pnl": ledger["pnl"],
+            "holding_bars": ledger["holding_bars"],
+            "mae": ledger["mae"],
+            "mfe": ledger["mfe"],
+            "is_open": ledger["is_open"],
+        }
+    )
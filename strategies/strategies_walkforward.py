@@ -0,0 +1,201 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .strategies_backtest import backtest_batch, signal_matrices
+from .strategies_helpful_functions import group_params, relabel_conditions
+from .strategies_indicators import compute_indicators
+from .strategies_metrics import summary_metrics
+from .strategies_sweep import map_combos, params_label, combo_rows, run_sweep, sweep_ranking, RANK_METRIC
+from .strategies_constants import (
+    WALK_FORWARD_WINDOWS,
+    WALK_FORWARD_TRAIN_RATIO,
+    SWEEP_WORKERS,
+    DEFAULT_BARS_PER_YEAR,
+)
+
+# Метрики окна, которые попадают в таблицу walk-forward
+WINDOW_METRICS = ("total_return", "sharpe", "sortino", "max_drawdown", "win_rate", "buys")
+
+Window = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+def walk_forward_windows(
+    n: int,
+    windows: int = WALK_FORWARD_WINDOWS,
+    train_ratio: float = WALK_FORWARD_TRAIN_RATIO,
+    anchored: bool = False,
+) -> List[Window]:
+    """
+    n баров -> [((train_start, train_stop), (test_start, test_stop))] — позиции баров, stop не включительно.
+    Тестовые отрезки идут подряд до конца ряда и не пересекаются; обучающий отрезок — сразу перед тестовым:
+    фиксированной длины (rolling) или от начала ряда (anchored). train_ratio — доля обучающей части
+    в первом окне. Слишком короткий ряд -> [].
+    """
+    if windows < 1 or not 0.0 < train_ratio < 1.0:
+        raise ValueError(f"Bad walk-forward setup: windows={windows}, train_ratio={train_ratio}")
+    test_len = int(n / (windows + train_ratio / (1.0 - train_ratio)))
+    train_len = n - windows * test_len
+    if test_len < 2 or train_len < 2:
+        return []
+    out: List[Window] = []
+    for w in range(windows):
+        test_start = train_len + w * test_len
+        train_start = 0 if anchored else test_start - train_len
+        out.append(((train_start, test_start), (test_start, test_start + test_len)))
+    return out
+
+
+def _window_scores(close: np.ndarray, buy: np.ndarray, sell: np.ndarray, bounds, periods_per_year: float):
+    """Бэктест каждого отрезка bounds -> {метрика: матрица (n_windows × n_strategies)}."""
+    per_window = [
+        summary_metrics(
+            backtest_batch(close[a:b], buy[a:b], sell[a:b], periods_per_year=periods_per_year), periods_per_year
+        )
+        for a, b in bounds
+    ]
+    return {name: np.stack([m[name] for m in per_window]).astype(np.float64) for name in WINDOW_METRICS}
+
+
+def _evaluate_windows(combo: Dict[str, Any], state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Одна комбинация параметров: индикаторы и сигналы — один раз по всему ряду (окна получают срезы,
+    у каждого окна есть история для прогрева индикаторов), затем бэктест обучающих и тестовых отрезков.
+    С options["full"] — ещё и строки рейтинга по всему ряду (как у перебора параметров) из тех же сигналов.
+    """
+    df, _ = compute_indicators(state["candles"], state["indicators"], group_params(combo))
+    try:
+        ids, buy, sell = signal_matrices(df, relabel_conditions(state["conditions"], combo))
+    except KeyError:
+        return None
+    close = df["Close"].to_numpy(dtype=np.float64)
+    windows = state["options"]["windows"]
+    ppy = state["periods_per_year"]
+    out = {
+        "ids": ids,
+        "train": _window_scores(close, buy, sell, [train for train, _ in windows], ppy),
+        "test": _window_scores(close, buy, sell, [test for _, test in windows], ppy),
+    }
+    if state["options"].get("full"):
+        batch = backtest_batch(close, buy, sell, periods_per_year=ppy)
+        batch["ids"] = ids
+        out["full"] = combo_rows(batch, ppy)
+    return out
+
+
+def _walk_forward_frame(candles: pd.DataFrame, combos, swept, bounds: List[Window], results) -> pd.DataFrame:
+    """Результаты _evaluate_windows по комбинациям -> таблица walk-forward (см. run_walk_forward)."""
+    valid = [(combo, res) for combo, res in zip(combos, results) if res is not None and res["ids"]]
+    if not valid:
+        return pd.DataFrame()
+
+    ids = valid[0][1]["ids"]
+    # (комбинации × окна × стратегии) -> номер лучшей комбинации для каждого (окна, стратегии)
+    best = np.argmax(np.stack([res["train"][RANK_METRIC] for _, res in valid]), axis=0)
+    index = candles.index
+    rows = []
+    for w, ((train_a, train_b), (test_a, test_b)) in enumerate(bounds):
+        for j, sid in enumerate(ids):
+            combo, res = valid[best[w, j]]
+            rows.append(
+                {
+                    "window": w + 1,
+                    "strategy": sid,
+                    "train_start": index[train_a],
+                    "train_end": index[train_b - 1],
+                    "test_start": index[test_a],
+                    "test_end": index[test_b - 1],
+                    "params": params_label(combo, swept),
+                    "combo": combo,
+                    f"train_{RANK_METRIC}": float(res["train"][RANK_METRIC][w, j]),
+                    **{f"test_{name}": float(res["test"][name][w, j]) for name in WINDOW_METRICS},
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def run_walk_forward(
+    candles: pd.DataFrame,
+    indicators: List[str],
+    combos: List[Dict[str, Any]],
+    swept: List[str],
+    conditions: Dict,
+    periods_per_year: float = DEFAULT_BARS_PER_YEAR,
+    windows: int = WALK_FORWARD_WINDOWS,
+    train_ratio: float = WALK_FORWARD_TRAIN_RATIO,
+    anchored: bool = False,
+    max_workers: int = SWEEP_WORKERS,
+) -> pd.DataFrame:
+    """
+    Walk-forward: в каждом окне для каждой стратегии берём комбинацию с лучшим RANK_METRIC
+    на обучающем отрезке и оцениваем её на следующем за ним тестовом (out-of-sample).
+    Комбинации считаются в пуле процессов (strategies_sweep.map_combos), каждая — сразу по всем окнам.
+    Строка — (окно, стратегия): границы отрезков, победившие параметры, train_<RANK_METRIC>, test_<метрика>.
+    """
+    bounds = walk_forward_windows(len(candles), windows, train_ratio, anchored)
+    if not bounds or not combos:
+        return pd.DataFrame()
+    results = map_combos(
+        candles,
+        indicators,
+        combos,
+        conditions,
+        _evaluate_windows,
+        periods_per_year,
+        options={"windows": bounds},
+        max_workers=max_workers,
+    )
+    return _walk_forward_frame(candles, combos, swept, bounds, results)
+
+
+def run_sweep_walk_forward(
+    candles: pd.DataFrame,
+    indicators: List[str],
+    combos: List[Dict[str, Any]],
+    swept: List[str],
+    conditions: Dict,
+    periods_per_year: float = DEFAULT_BARS_PER_YEAR,
+    windows: int = WALK_FORWARD_WINDOWS,
+    train_ratio: float = WALK_FORWARD_TRAIN_RATIO,
+    anchored: bool = False,
+    max_workers: int = SWEEP_WORKERS,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Перебор параметров и walk-forward за один проход по комбинациям: индикаторы и сигналы каждой
+    комбинации считаются один раз, из них — и метрики по всему ряду, и метрики окон.
+    -> (рейтинг как у strategies_sweep.run_sweep, таблица как у run_walk_forward).
+    """
+    bounds = walk_forward_windows(len(candles), windows, train_ratio, anchored)
+    if not bounds:
+        return run_sweep(candles, indicators, combos, swept, conditions, periods_per_year, max_workers), pd.DataFrame()
+    results = map_combos(
+        candles,
+        indicators,
+        combos,
+        conditions,
+        _evaluate_windows,
+        periods_per_year,
+        options={"windows": bounds, "full": True},
+        max_workers=max_workers,
+    )
+    ranking = sweep_ranking(combos, swept, [res["full"] if res is not None else [] for res in results])
+    return ranking, _walk_forward_frame(candles, combos, swept, bounds, results)
+
+
+def walk_forward_summary(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Итог по стратегиям: доходность тестовых отрезков, сложенная подряд (oos_return), средние
+    train/test RANK_METRIC и доля окон с положительной тестовой доходностью.
+    """
+    if frame.empty:
+        return frame
+    grouped = frame.groupby("strategy", sort=False)
+    return pd.DataFrame(
+        {
+            "windows": grouped.size(),
+            "oos_return": grouped["test_total_return"].apply(lambda r: float(np.prod(1.0 + r) - 1.0)),
+            f"train_{RANK_METRIC}": grouped[f"train_{RANK_METRIC}"].mean(),
+            f"test_{RANK_METRIC}": grouped[f"test_{RANK_METRIC}"].mean(),
+            "positive_windows": grouped["test_total_return"].apply(lambda r: float((r > 0).mean())),
+        }
+    ).reset_index()
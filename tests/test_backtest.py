@@ -0,0 +1,126 @@
+import operator
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("calculate")  # strategies_backtest -> strategies_indicators -> calculate.Indicator
+
+from strategies.strategies_backtest import backtest_batch, batch_from_results, run_batch_backtest
+
+CLOSE = [100.0, 104.0, 106.0, 108.0, 103.0, 99.0, 101.0, 107.0, 110.0, 112.0]
+
+OPS = {">": operator.gt, "<": operator.lt, ">=": operator.ge, "<=": operator.le}
+
+
+def _cond(column, op, value):
+    return {"column": column, "operator": op, "column_or_custom": "custom", "custom": str(value)}
+
+
+# A — вход на 2, выход на 5, снова вход на 7 и позиция открыта на конце;
+# B — sell на баре 0 без открытой позиции, вход на 8 (открыта на конце);
+# C — два условия покупки (И) и buy + sell на одном баре (3) — состояние не меняется;
+# D — только продажа: стратегия без условий покупки в результат не попадает.
+CONDITIONS = {
+    "A_buy_0": _cond("Close", ">", 105),
+    "A_sell_0": _cond("Close", "<", 100),
+    "B_buy_0": _cond("Close", ">", 109),
+    "B_sell_0": _cond("Close", "<", 102),
+    "C_buy_0": _cond("Close", ">", 103),
+    "C_buy_1": _cond("Close", "<", 109),
+    "C_sell_0": _cond("Close", ">", 107),
+    "D_sell_0": _cond("Close", "<", 100),
+}
+
+
+def _reference(close, conditions):
+    """Построчный бэктест: условия на каждом баре, позиция с бара сигнала получает доходность со следующего."""
+    clauses = {}
+    for key, cond in conditions.items():
+        sid, side, _ = key.rsplit("_", 2)
+        clauses.setdefault(sid, {"buy": [], "sell": []})[side].append(cond)
+    out = {}
+    for sid, sides in clauses.items():
+        if not sides["buy"]:
+            continue
+        position, equity = 0, 1.0
+        cum, deals = [], []
+        for i, price in enumerate(close):
+            if i:
+                equity *= 1.0 + position * (price / close[i - 1] - 1.0)
+            hit = {
+                side: bool(sides[side]) and all(OPS[c["operator"]](price, float(c["custom"])) for c in sides[side])
+                for side in ("buy", "sell")
+            }
+            new = 1 if hit["buy"] and not hit["sell"] else 0 if hit["sell"] and not hit["buy"] else position
+            deals.append(new - position)
+            position = new
+            cum.append(equity)
+        out[sid] = (np.array(cum), np.array(deals, dtype=np.int8))
+    return out
+
+
+@pytest.fixture
+def candles():
+    return pd.DataFrame({"Close": CLOSE}, index=pd.date_range("2024-01-01", periods=len(CLOSE), freq="D"))
+
+
+def test_batch_matches_row_by_row_reference(candles):
+    batch = run_batch_backtest(candles, CONDITIONS, periods_per_year=365)
+    reference = _reference(CLOSE, CONDITIONS)
+
+    assert batch["ids"] == ["A", "B", "C"]
+    for j, sid in enumerate(batch["ids"]):
+        cum, deals = reference[sid]
+        np.testing.assert_allclose(batch["cum_returns"][:, j], cum, rtol=1e-12)
+        np.testing.assert_array_equal(batch["deals"][:, j], deals)
+
+    assert batch["deals"][:, 0].tolist() == [0, 0, 1, 0, 0, -1, 0, 1, 0, 0]  # A: открыта на конце
+    assert batch["deals"][:, 1].tolist() == [0] * 8 + [1, 0]  # B: sell без позиции — не сделка
+    assert batch["deals"][:, 2].tolist() == [0, 1, 0, 0, 0, 0, 0, 0, -1, 0]  # C: buy и sell на баре 3 — без смены
+
+
+def test_events_follow_deals(candles):
+    batch = run_batch_backtest(candles, CONDITIONS, periods_per_year=365)
+    events = batch["events"]
+    expected = [
+        (bar, j, int(batch["deals"][bar, j]))
+        for j in range(len(batch["ids"]))
+        for bar in np.flatnonzero(batch["deals"][:, j])
+    ]
+    assert list(zip(events["bar"].tolist(), events["strategy"].tolist(), events["side"].tolist())) == expected
+    np.testing.assert_array_equal(events["price"], np.array(CLOSE)[events["bar"]])
+    np.testing.assert_array_equal(events["cum"], batch["cum_returns"][events["bar"], events["strategy"]])
+    assert events["offsets"].tolist() == [0, 3, 4, 6]
+
+
+def test_legacy_results_adapter_matches_batch(candles):
+    """batch_from_results (форма ответа Indicator.backtest_all_strategies) даёт те же массивы, что backtest_batch."""
+    reference = _reference(CLOSE, CONDITIONS)
+    df = candles.copy()
+    results = {}
+    for sid, (cum, deals) in reference.items():
+        df[f"{sid}_cum"], df[f"{sid}_deal"] = cum, deals
+        results[sid] = {
+            "cum_returns_column": f"{sid}_cum",
+            "deal_column": f"{sid}_deal",
+            "final_balance": 10000.0 * cum[-1],
+            "sharpe_ratio": 0.0,
+            "sortino_ratio": 0.0,
+        }
+    legacy = batch_from_results(results, df)
+    batch = run_batch_backtest(candles, CONDITIONS, periods_per_year=365)
+
+    assert legacy["ids"] == batch["ids"]
+    for key in ("positions", "returns", "cum_returns", "deals"):
+        np.testing.assert_allclose(legacy[key], batch[key], rtol=1e-12, err_msg=key)
+    for key in ("bar", "strategy", "side", "price", "cum", "offsets"):
+        np.testing.assert_allclose(legacy["events"][key], batch["events"][key], rtol=1e-12, err_msg=key)
+
+
+def test_empty_and_flat_inputs():
+    batch = backtest_batch(np.array([]), np.zeros((0, 2), dtype=bool), np.zeros((0, 2), dtype=bool))
+    assert batch["cum_returns"].shape == (0, 2)
+    flat = backtest_batch(np.full(5, 10.0), np.ones((5, 1), dtype=bool), np.zeros((5, 1), dtype=bool))
+    assert flat["deals"][:, 0].tolist() == [1, 0, 0, 0, 0]
+    np.testing.assert_array_equal(flat["cum_returns"][:, 0], np.ones(5))
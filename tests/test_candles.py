@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("calculate")  # strategies_candles -> calculate.Coin
+
+from strategies.strategies_candle_store import ColumnarCandleStore
+from strategies.strategies_candles import CandleCache
+
+
+class Loader:
+    """Дневные свечи [start, end] с Close = номер дня от 2024-01-01 (+ bump); запоминает вызовы."""
+
+    def __init__(self):
+        self.calls = []
+        self.bump = 0.0
+
+    def __call__(self, symbol, start, end, interval):
+        self.calls.append((start, end))
+        index = pd.date_range(start, end, freq="D")
+        close = (index - pd.Timestamp("2024-01-01")).days.to_numpy(dtype=np.float64) + self.bump
+        return pd.DataFrame({"Close": close, "Volume": np.ones(len(index))}, index=index)
+
+
+def _days(frame):
+    return [ts.strftime("%m-%d") for ts in frame.index]
+
+
+def test_narrower_range_is_a_slice_without_loading():
+    loader = Loader()
+    cache = CandleCache(loader=loader)
+    full = cache.get("A", "2024-01-01", "2024-01-31", "D")
+    part = cache.get("A", "2024-01-10", "2024-01-12T00:00:00", "D")
+    assert len(full) == 31
+    assert _days(part) == ["01-10", "01-11", "01-12"]  # end — включительно, до конца дня
+    assert part["Close"].tolist() == [9.0, 10.0, 11.0]
+    assert loader.calls == [("2024-01-01", "2024-01-31")]
+    assert cache.stats()["hits"] == 1
+
+
+def test_earlier_start_reloads_the_union_not_a_narrower_range():
+    loader = Loader()
+    cache = CandleCache(loader=loader)
+    cache.get("A", "2024-01-10", "2024-01-20", "D")
+    out = cache.get("A", "2024-01-05", "2024-01-12", "D")
+    assert _days(out)[0] == "01-05" and _days(out)[-1] == "01-12"
+    assert loader.calls[-1] == ("2024-01-05", "2024-01-20")
+    cache.get("A", "2024-01-15", "2024-01-20", "D")  # прежний конец диапазона остался в кэше
+    assert len(loader.calls) == 2
+
+
+def test_later_end_appends_only_the_tail():
+    loader = Loader()
+    cache = CandleCache(loader=loader)
+    first = cache.get("A", "2024-01-01", "2024-01-10", "D")
+    loader.bump = 100.0  # последняя свеча «доформировалась»
+    out = cache.get("A", "2024-01-01", "2024-01-12", "D")
+    assert loader.calls[-1] == ("2024-01-10", "2024-01-12")
+    assert len(out) == 12 and not out.index.duplicated().any()
+    assert out["Close"].tolist()[-3:] == [109.0, 110.0, 111.0]  # последний бар перезаписан свежей копией
+    assert first["Close"].iloc[-1] == 9.0  # выданный раньше кадр не изменился
+    assert cache.stats()["tail_appends"] == 1
+
+
+def test_eviction_by_bytes():
+    loader = Loader()
+    probe = CandleCache(loader=loader)
+    probe.get("A", "2024-01-01", "2024-01-31", "D")
+    one = probe.stats()["bytes"]
+    cache = CandleCache(max_bytes=one + one // 2, loader=loader)
+    cache.get("A", "2024-01-01", "2024-01-31", "D")
+    cache.get("B", "2024-01-01", "2024-01-31", "D")
+    assert cache.stats()["entries"] == 1
+    cache.get("A", "2024-01-01", "2024-01-31", "D")
+    assert cache.stats()["misses"] == 3  # A вытеснен
+
+
+def test_store_merge_keeps_the_stored_range(tmp_path):
+    loader = Loader()
+    store = ColumnarCandleStore(str(tmp_path))
+    CandleCache(loader=loader, store=store).get("A", "2024-01-10", "2024-01-20", "D")
+    fresh = CandleCache(loader=loader, store=store)  # другой процесс: память пуста, хранилище — общее
+    out = fresh.get("A", "2024-01-01", "2024-01-05", "D")
+    assert _days(out) == ["01-01", "01-02", "01-03", "01-04", "01-05"]
+    assert loader.calls[-1] == ("2024-01-01", "2024-01-10")  # только недостающий край
+    meta = store.meta("A", "D")
+    assert (meta["start"], meta["end"], meta["rows"]) == (pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-20"), 20)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+talib = pytest.importorskip("talib")
+
+from strategies.strategies_indicator_plan import build_plan
+
+KWARGS_MAP = {
+    "SMA": {"period": [20, 26]},
+    "EMA": {"period": [26, 12]},
+    "BBANDS": {"period": [20], "nbdevup": [2], "nbdevdn": [1.5]},
+    "MACD": {"fastperiod": [12], "slowperiod": [26], "signalperiod": [9]},
+    "RSI": {"period": [14]},
+    "ATR": {"period": [14]},
+    "ADX": {"period": [14, 20]},
+    "PLUS_DI": {"period": [14]},
+    "MINUS_DI": {"period": [14]},
+    "CCI": {"period": [20]},
+    "WILLR": {"period": [14]},
+}
+
+
+@pytest.fixture(scope="module")
+def candles():
+    rng = np.random.default_rng(2)
+    n = 5000
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + rng.random(n) * 2
+    low = close - rng.random(n) * 2
+    close[200:230] = high[200:230] = low[200:230] = close[200]  # плоский участок: нулевые TR и отклонение
+    return pd.DataFrame({"Open": close, "High": high, "Low": low, "Close": close, "Volume": 1.0})
+
+
+def test_shared_nodes_are_registered_once():
+    plan, rest = build_plan(KWARGS_MAP)
+    assert rest == ["WILLR"]
+    assert plan.requested == 82
+    assert len(plan.nodes) == 38
+
+
+def test_plan_matches_talib(candles):
+    plan, _ = build_plan(KWARGS_MAP)
+    out = plan.run(candles)
+    h, l, c = (candles[col].to_numpy() for col in ("High", "Low", "Close"))
+    expected = {
+        ("SMA", "SMA_20 period"): talib.SMA(c, 20),
+        ("SMA", "SMA_26 period"): talib.SMA(c, 26),
+        ("EMA", "EMA_12 period"): talib.EMA(c, 12),
+        ("EMA", "EMA_26 period"): talib.EMA(c, 26),
+        ("RSI", "RSI_14 period"): talib.RSI(c, 14),
+        ("ATR", "ATR_14 period"): talib.ATR(h, l, c, 14),
+        ("ADX", "ADX_14 period"): talib.ADX(h, l, c, 14),
+        ("ADX", "ADX_20 period"): talib.ADX(h, l, c, 20),
+        ("PLUS_DI", "PLUS_DI_14 period"): talib.PLUS_DI(h, l, c, 14),
+        ("MINUS_DI", "MINUS_DI_14 period"): talib.MINUS_DI(h, l, c, 14),
+        ("CCI", "CCI_20 period"): talib.CCI(h, l, c, 20),
+    }
+    for j, values in enumerate(talib.BBANDS(c, 20, 2, 1.5)):
+        expected[("BBANDS", out["BBANDS"].columns[j])] = values
+    for j, values in enumerate(talib.MACD(c, 12, 26, 9)):
+        expected[("MACD", out["MACD"].columns[j])] = values
+    for (name, col), values in expected.items():
+        actual = out[name][col].to_numpy()
+        np.testing.assert_array_equal(np.isnan(actual), np.isnan(values), err_msg=col)
+        np.testing.assert_allclose(actual, values, rtol=1e-7, atol=1e-7, equal_nan=True, err_msg=col)
+
+
+@pytest.mark.parametrize("name, params", [("BBANDS", {"period": [10, 20]}), ("MACD", {"fastperiod": [12, 5]})])
+def test_colliding_instances_go_to_rest(name, params):
+    plan, rest = build_plan({name: params, "SMA": {"period": [10, 20]}})
+    assert rest == [name]
+    assert list(plan.outputs) == ["SMA"]
+    assert [col for col, _ in plan.outputs["SMA"]] == ["SMA_10 period", "SMA_20 period"]
+    assert len(plan.nodes) == 3  # Close и две SMA — узлы отброшенного индикатора в план не попали
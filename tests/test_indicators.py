@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("calculate")  # strategies_indicators -> calculate.Indicator
+
+import strategies.strategies_indicators as indicators
+from strategies.strategies_indicators import compute_indicators, freeze_params, frame_fingerprint
+
+
+@pytest.fixture
+def candles():
+    index = pd.date_range("2024-01-01", periods=50, freq="h")
+    close = 100.0 + np.arange(50.0)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1.0}, index=index)
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """Считает вызовы расчёта индикатора (без calculate): SMA по period каждого инстанса."""
+    calls = []
+
+    def compute_one(df, name, params):
+        calls.append((name, freeze_params(params)))
+        periods = params.get("period", [14])
+        return pd.DataFrame({f"{name}_{p} period": df["Close"].rolling(p).mean() for p in periods}, index=df.index)
+
+    monkeypatch.setattr(indicators, "INDICATOR_ENGINE", "batch")
+    monkeypatch.setattr(indicators, "_compute_one", compute_one)
+    indicators.indicator_cache.clear()
+    yield calls
+    indicators.indicator_cache.clear()
+
+
+def test_fingerprint_is_stable_for_equal_frames(candles):
+    assert frame_fingerprint(candles) == frame_fingerprint(candles.copy())
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda df: df.assign(Close=df["Close"].where(df.index != df.index[-1], 0.0)),  # последний бар доформировался
+        lambda df: df.set_axis(df.index + pd.Timedelta(hours=1)),  # те же значения, другое время
+        lambda df: df.iloc[:-1],  # бар меньше
+        lambda df: df.rename(columns={"Volume": "Vol"}),
+        lambda df: df.assign(Extra=0.0),
+    ],
+)
+def test_fingerprint_changes_with_data(candles, change):
+    assert frame_fingerprint(change(candles)) != frame_fingerprint(candles)
+
+
+def test_freeze_params_ignores_key_order():
+    assert freeze_params({"period": [14, 28], "nbdevup": [2]}) == freeze_params({"nbdevup": [2], "period": [14, 28]})
+    assert freeze_params({"period": [14, 28]}) != freeze_params({"period": [28, 14]})  # порядок инстансов важен
+
+
+def test_repeat_submit_reuses_cached_columns(candles, computed):
+    first, added = compute_indicators(candles, ["SMA"], {"SMA": {"period": [5, 10]}}, use_cache=True)
+    again, _ = compute_indicators(candles.copy(), ["SMA"], {"SMA": {"period": [5, 10]}}, use_cache=True)
+    assert computed == [("SMA", (("period", (5, 10)),))]
+    assert added == {"SMA": ["SMA_5 period", "SMA_10 period"]}
+    pd.testing.assert_frame_equal(first, again)
+
+
+def test_changed_candles_or_params_invalidate(candles, computed):
+    compute_indicators(candles, ["SMA"], {"SMA": {"period": [5]}}, use_cache=True)
+    moved = candles.copy()
+    moved.iloc[-1, moved.columns.get_loc("Close")] += 1.0
+    out, _ = compute_indicators(moved, ["SMA"], {"SMA": {"period": [5]}}, use_cache=True)
+    compute_indicators(candles, ["SMA"], {"SMA": {"period": [6]}}, use_cache=True)
+    assert len(computed) == 3
+    assert out["SMA_5 period"].iloc[-1] == pytest.approx(moved["Close"].iloc[-5:].mean())
+
+
+def test_cache_off_always_computes(candles, computed):
+    for _ in range(2):
+        compute_indicators(candles, ["SMA"], {"SMA": {"period": [5]}}, use_cache=False)
+    assert len(computed) == 2
+    assert indicators.indicator_cache.stats()["entries"] == 0
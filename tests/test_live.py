@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("calculate")  # strategies_live -> strategies_indicators -> calculate.Indicator
+
+from strategies.strategies_live import LiveSession, parse_bar
+
+CONDITIONS = {
+    "A_buy_0": {"column": "Close", "comparison_operator": ">", "column_or_custom": "custom", "custom": "105"},
+    "A_sell_0": {"column": "Close", "comparison_operator": "<", "column_or_custom": "custom", "custom": "95"},
+}
+
+
+class _NoFeed:
+    def poll(self):
+        return []
+
+    def close(self):
+        pass
+
+
+def _session(tz):
+    index = pd.date_range("2024-01-01", periods=10, freq="h", tz=tz)
+    close = np.full(10, 100.0)
+    candles = pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0}, index=index)
+    return LiveSession("BTCUSDT", "60", candles, [], {}, CONDITIONS, _NoFeed())
+
+
+def test_parse_bar_times_are_naive_utc():
+    assert parse_bar("2024-01-01T12:00:00+03:00,1,2,0.5,1.5,10")["time"] == pd.Timestamp("2024-01-01 09:00")
+    assert parse_bar('{"time": 1704067200000, "open": 1, "high": 1, "low": 1, "close": 1}')["time"] == pd.Timestamp("2024-01-01")
+
+
+@pytest.mark.parametrize("tz", [None, "UTC", "Europe/Moscow"])
+def test_on_bar_compares_times_in_history_tz(tz):
+    session = _session(tz)
+    last_utc = session.last_time.tz_convert("UTC").tz_localize(None) if tz else session.last_time
+    line = f"{last_utc.isoformat()},100,100,100,100,1"
+    assert session.on_bar(parse_bar(line)) is None  # последний бар истории — повтор
+
+    tick = session.on_bar(parse_bar(line.replace(last_utc.isoformat(), (last_utc + pd.Timedelta(hours=1)).isoformat(), 1)))
+    assert tick is not None
+    assert tick["bar"]["time"] == session.last_time
+    assert getattr(tick["bar"]["time"], "tz", None) == session.tz
+    tick = session.on_bar({**parse_bar(line), "time": last_utc + pd.Timedelta(hours=2), "Close": 110.0})
+    assert tick["events"].tolist() == [1]
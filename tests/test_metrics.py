@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from strategies.strategies_metrics import closed_trades, equity_metrics, sharpe_sortino, summary_metrics
+
+PPY = 365.0
+
+
+def _batch():
+    """Две стратегии на Close 100, 110, 99, 99, 120: A — вход 0, выход 2, вход 3 (открыта на конце); B — вне рынка."""
+    close = np.array([100.0, 110.0, 99.0, 99.0, 120.0])
+    positions = np.array([[0, 0], [1, 0], [1, 0], [0, 0], [1, 0]], dtype=np.float64)
+    asset = np.r_[0.0, close[1:] / close[:-1] - 1.0]
+    returns = positions * asset[:, None]
+    cum = np.cumprod(1.0 + returns, axis=0)
+    bar, strategy, side = np.array([0, 2, 3]), np.array([0, 0, 0]), np.array([1, -1, 1], dtype=np.int8)
+    events = {
+        "bar": bar,
+        "strategy": strategy,
+        "side": side,
+        "price": close[bar],
+        "cum": cum[bar, strategy],
+        "offsets": np.array([0, 3, 3]),
+    }
+    return {
+        "positions": positions,
+        "returns": returns,
+        "cum_returns": cum,
+        "events": events,
+        "final_balance": 10000.0 * cum[-1],
+    }
+
+
+def test_sharpe_sortino_values():
+    r = np.array([[0.01], [-0.02], [0.03], [0.0]])
+    sharpe, sortino = sharpe_sortino(r, 252)
+    assert sharpe[0] == pytest.approx(r.mean() / r.std(ddof=1) * np.sqrt(252))
+    assert sortino[0] == pytest.approx(r.mean() / np.sqrt(np.mean(np.minimum(r, 0) ** 2)) * np.sqrt(252))
+
+
+def test_sharpe_sortino_zero_variance_and_flat():
+    r = np.column_stack([np.full(10, 0.01), np.zeros(10)])  # постоянная доходность и вне рынка
+    sharpe, sortino = sharpe_sortino(r, PPY)
+    assert sharpe.tolist() == [0.0, 0.0]
+    assert sortino.tolist() == [0.0, 0.0]
+    assert np.all(np.isfinite(sharpe)) and np.all(np.isfinite(sortino))
+
+
+def test_sharpe_sortino_short_series():
+    sharpe, sortino = sharpe_sortino(np.array([[0.05, -0.05]]), PPY)
+    assert sharpe.tolist() == [0.0, 0.0] and sortino.tolist() == [0.0, 0.0]
+
+
+def test_closed_trades_skip_open_position():
+    batch = _batch()
+    col, entry, exit_, ret = closed_trades(batch["events"], batch["cum_returns"])
+    assert (col.tolist(), entry.tolist(), exit_.tolist()) == ([0], [0], [2])
+    assert ret[0] == pytest.approx(0.99 - 1.0)
+
+
+def test_summary_metrics():
+    m = summary_metrics(_batch(), PPY)
+    assert m["total_return"] == pytest.approx([0.2, 0.0])
+    assert m["cagr"] == pytest.approx([1.2 ** (PPY / 5) - 1.0, 0.0])
+    assert m["max_drawdown"] == pytest.approx([0.99 / 1.1 - 1.0, 0.0])
+    assert m["buys"].tolist() == [2, 0] and m["sells"].tolist() == [1, 0]
+    assert m["win_rate"].tolist() == [0.0, 0.0]
+    assert m["exposure"] == pytest.approx([0.6, 0.0])
+    assert m["avg_trade_days"] == pytest.approx([2.0, 0.0])
+    assert m["turnover"] == pytest.approx([3 / (5 / PPY), 0.0])
+    assert m["final_balance"] == pytest.approx([12000.0, 10000.0])
+    assert m["sharpe"][1] == 0.0 and m["sortino"][1] == 0.0  # вне рынка весь период
+    for values in m.values():
+        assert np.all(np.isfinite(values))
+
+
+def test_summary_metrics_empty():
+    batch = {
+        "positions": np.zeros((0, 2)),
+        "returns": np.zeros((0, 2)),
+        "cum_returns": np.ones((0, 2)),
+        "events": {k: np.array([], dtype=np.int64) for k in ("bar", "strategy", "side", "price", "cum")},
+        "final_balance": np.array([10000.0, 10000.0]),
+    }
+    m = summary_metrics(batch, PPY)
+    assert all(len(v) == 2 for v in m.values())
+    assert m["total_return"].tolist() == [0.0, 0.0]
+
+
+def test_equity_metrics_flat_curve():
+    m = equity_metrics(np.ones((20, 1)), PPY)
+    assert {k: float(v[0]) for k, v in m.items()} == {
+        "total_return": 0.0,
+        "cagr": 0.0,
+        "sharpe": 0.0,
+        "sortino": 0.0,
+        "max_drawdown": 0.0,
+    }
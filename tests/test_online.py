@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+talib = pytest.importorskip("talib")
+
+from strategies.strategies_online import (
+    OnlineADX,
+    OnlineBBANDS,
+    OnlineCCI,
+    OnlineEMA,
+    OnlineIndicator,
+    OnlineRSI,
+    OnlineSMA,
+    online_columns,
+)
+
+
+def _candles(base: float, n: int = 3000, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = base + np.cumsum(rng.normal(0.0, base * 0.01, n))
+    high = close + rng.random(n) * base * 0.02
+    low = close - rng.random(n) * base * 0.02
+    close[200:230] = high[200:230] = low[200:230] = close[200]  # плоский участок: нулевые TR и отклонение
+    return pd.DataFrame({"Open": close, "High": high, "Low": low, "Close": close, "Volume": 1.0})
+
+
+CASES = [
+    (lambda: OnlineSMA(20), lambda h, l, c: [talib.SMA(c, 20)]),
+    (lambda: OnlineEMA(12), lambda h, l, c: [talib.EMA(c, 12)]),
+    (lambda: OnlineRSI(14), lambda h, l, c: [talib.RSI(c, 14)]),
+    (lambda: OnlineADX(14), lambda h, l, c: [talib.ADX(h, l, c, 14)]),
+    (lambda: OnlineBBANDS(20, 2.0, 1.5), lambda h, l, c: list(talib.BBANDS(c, 20, 2.0, 1.5))),
+    (lambda: OnlineCCI(20), lambda h, l, c: [talib.CCI(h, l, c, 20)]),
+]
+
+
+def _assert_close(actual, expected, scale):
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=1e-7, atol=1e-7 * scale, equal_nan=True)
+
+
+@pytest.mark.parametrize("base", [100.0, 60000.0])
+@pytest.mark.parametrize("make, reference", CASES)
+def test_batch_and_update_match_talib(make, reference, base):
+    df = _candles(base)
+    expected = reference(*(df[col].to_numpy() for col in ("High", "Low", "Close")))
+
+    batch = make().batch(df)
+    stepped = make()
+    rows = np.array([stepped.update(bar) for bar in df.to_dict("records")])
+
+    for j, (name, values) in enumerate(batch.items()):
+        _assert_close(values, expected[j], base)
+        _assert_close(rows[:, j], expected[j], base)
+
+
+@pytest.mark.parametrize("make, reference", CASES)
+def test_batch_state_continues_with_update(make, reference):
+    df = _candles(100.0)
+    for split in (5, 30, 1000):
+        full = make().batch(df)
+        inst = make()
+        inst.batch(df.iloc[:split])
+        rows = np.array([inst.update(bar) for bar in df.iloc[split:].to_dict("records")])
+        for j, values in enumerate(full.values()):
+            _assert_close(rows[:, j], values[split:], 100.0)
+
+
+def test_step_is_abstract():
+    with pytest.raises(TypeError):
+        OnlineIndicator()
+
+
+def test_online_columns_skips_colliding_instances():
+    df = _candles(100.0, n=300)
+    assert online_columns(df, "BBANDS", {"period": [10, 20]}) is None
+    cols = online_columns(df, "SMA", {"period": [10, 20]})
+    assert list(cols.columns) == ["SMA_10 period", "SMA_20 period"]
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.strategies_constants import CANDLE_TAIL_REFRESH_SECONDS, RESULT_CACHE_TTL
+from strategies.strategies_result_cache import ResultCache, result_ttl, submit_key
+from strategies.strategies_spec import build_spec
+
+CONDITIONS = {
+    "A_buy_0": {"column": "Close", "comparison_operator": ">", "column_or_custom": "custom", "custom": "100"},
+    "A_buy_1": {"column": "Close", "comparison_operator": "<", "column_or_custom": "custom", "custom": "120"},
+    "A_sell_0": {"column": "Close", "comparison_operator": "<", "column_or_custom": "custom", "custom": "90"},
+}
+
+
+def _spec(conditions=CONDITIONS, period="14"):
+    return build_spec(["SMA"], {"SMA__1__period": period}, conditions)
+
+
+def _key(**overrides):
+    args = dict(ticker="BTCUSDT", start="2024-01-01", end="2024-03-01", interval="60", spec=_spec(), walk_forward="off")
+    args.update(overrides)
+    return submit_key(**args)
+
+
+def test_submit_key_is_stable():
+    assert _key() == _key()
+    assert _key(walk_forward=None) == _key(walk_forward="off")
+    assert _key(spec=_spec(period=14)) == _key()  # '14' из поля ввода и 14 из спецификации — одно значение
+
+
+def test_submit_key_ignores_condition_order_and_labels():
+    reordered = dict(reversed(list(CONDITIONS.items())))
+    labelled = {k: {**v, "column_label": "Close (label)"} for k, v in CONDITIONS.items()}
+    assert _key(spec=_spec(reordered)) == _key()
+    assert _key(spec=_spec(labelled)) == _key()
+
+
+@pytest.mark.parametrize(
+    "override",
+    [
+        {"ticker": "ETHUSDT"},
+        {"start": "2024-01-02"},
+        {"end": "2024-03-02"},
+        {"interval": "D"},
+        {"walk_forward": "anchored"},
+        {"spec": _spec(period="20")},
+        {"spec": _spec({**CONDITIONS, "A_sell_0": {**CONDITIONS["A_sell_0"], "custom": "95"}})},
+    ],
+)
+def test_submit_key_changes(override):
+    assert _key(**override) != _key()
+
+
+def test_result_ttl():
+    assert result_ttl("2020-01-01") == RESULT_CACHE_TTL
+    assert result_ttl(pd.Timestamp.today()) == CANDLE_TAIL_REFRESH_SECONDS
+    assert result_ttl("not a date") == CANDLE_TAIL_REFRESH_SECONDS
+
+
+def _chart_entry():
+    index = pd.date_range("2024-01-01", periods=10, freq="h")
+    return {"index": index, "charts": {"A": {"lines": {"cum": np.ones(10)}}}}
+
+
+def test_result_cache_memory_roundtrip():
+    cache = ResultCache()
+    assert cache.get("missing") is None
+    cache.put("k", ["outputs"], _chart_entry(), "token", ttl=60)
+    hit = cache.get("k")
+    assert hit["outputs"] == ["outputs"] and hit["token"] == "token"
+    assert hit["chart_entry"]["charts"]["A"]["lines"]["cum"].shape == (10,)
+
+
+def test_result_cache_expires():
+    cache = ResultCache()
+    cache.put("k", ["outputs"], _chart_entry(), "token", ttl=-1)
+    assert cache.get("k") is None
+
+
+def test_result_cache_disk_roundtrip(tmp_path):
+    pytest.importorskip("diskcache")
+    ResultCache(disk_dir=str(tmp_path)).put("k", ["outputs"], _chart_entry(), "token", ttl=60)
+    hit = ResultCache(disk_dir=str(tmp_path)).get("k")  # другой процесс видит те же файлы
+    assert hit["outputs"] == ["outputs"] and hit["token"] == "token"
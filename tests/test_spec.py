@@ -0,0 +1,92 @@
+import pytest
+
+from strategies.strategies_spec import build_spec, export_spec, import_spec, spec_hash, spec_to_inputs
+
+
+def _cond(column, op, right, raw=None):
+    cond = {"column": column, "comparison_operator": op, "column_label": f"{column} (label)"}
+    if raw:
+        cond["column_raw"] = raw
+    if isinstance(right, (int, float)) or str(right).replace(".", "").isdigit():
+        cond.update(column_or_custom="custom", custom=str(right))
+    else:
+        cond.update(column_or_custom=right)
+    return cond
+
+
+CONDITIONS = {
+    "A_buy_0": _cond("SMA_14 period", ">", "Close", raw="SMA__1__i period"),
+    "A_buy_1": _cond("Close", ">", "100"),
+    "A_sell_0": _cond("Close", "<", "90"),
+    "B_buy_0": _cond("Close", ">", "105.5"),
+    "B_sell_0": {},
+}
+STORED = {"SMA__1__period": "14"}
+
+
+def _hash(conditions=CONDITIONS, stored=STORED, indicators=("SMA",), strategies=None):
+    return spec_hash(build_spec(list(indicators), stored, conditions, strategies))
+
+
+def test_hash_ignores_key_order():
+    assert _hash(dict(reversed(list(CONDITIONS.items())))) == _hash()
+
+
+def test_hash_ignores_condition_order():
+    swapped = {**CONDITIONS, "A_buy_0": CONDITIONS["A_buy_1"], "A_buy_1": CONDITIONS["A_buy_0"]}
+    assert _hash(swapped) == _hash()
+
+
+def test_hash_ignores_card_order_and_ids():
+    def by_id(mapping):
+        return {mapping[k[:2]] + k[2:]: v for k, v in CONDITIONS.items()}
+
+    cards = [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}]
+    assert _hash(by_id({"A_": "1_", "B_": "2_"}), strategies=cards) == _hash()
+    reordered = [{"id": 1, "name": "B"}, {"id": 2, "name": "A"}]  # карточки в другом порядке
+    assert _hash(by_id({"A_": "2_", "B_": "1_"}), strategies=reordered) == _hash()
+
+
+def test_hash_ignores_labels_empty_and_stale_params():
+    plain = {k: {f: v for f, v in c.items() if f != "column_label"} for k, c in CONDITIONS.items()}
+    assert _hash(plain) == _hash()
+    assert _hash({**CONDITIONS, "A_sell_1": {}, "C_buy_0": {"column": "Close"}}) == _hash()
+    assert _hash(stored={**STORED, "RSI__1__period": "7", "SMA__2__period": ""}) == _hash()
+    assert _hash(stored={"SMA__1__period": 14}) == _hash()
+
+
+@pytest.mark.parametrize(
+    "conditions, stored",
+    [
+        ({**CONDITIONS, "A_sell_0": _cond("Close", "<=", "90")}, STORED),
+        ({**CONDITIONS, "A_sell_0": _cond("Close", "<", "91")}, STORED),
+        ({**CONDITIONS, "A_buy_2": _cond("Close", "<", "200")}, STORED),
+        (CONDITIONS, {"SMA__1__period": "20"}),
+        (CONDITIONS, {**STORED, "SMA__2__period": "50"}),
+    ],
+)
+def test_hash_changes(conditions, stored):
+    assert _hash(conditions, stored) != _hash()
+
+
+def test_export_import_roundtrip():
+    spec = build_spec(["SMA"], STORED, CONDITIONS)
+    assert spec_hash(import_spec(export_spec(spec))) == spec_hash(spec)
+    indicators, stored, conditions = spec_to_inputs(spec)
+    columns = {conditions[k]["column"] for k in conditions if k.startswith("A_buy_")}
+    assert columns == {"Close", "SMA_14 period"}  # подпись восстановлена по period
+    assert spec_hash(build_spec(indicators, stored, conditions)) == spec_hash(spec)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"version": 2, "indicators": {}, "strategies": []}',
+        '{"version": 1, "indicators": [], "strategies": []}',
+        '{"version": 1, "indicators": {}, "strategies": [{"name": "A", "buy": [["Close", ">"]]}]}',
+        "[1, 2]",
+    ],
+)
+def test_import_spec_rejects(text):
+    with pytest.raises(ValueError):
+        import_spec(text)
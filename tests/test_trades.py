@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategies.strategies_trades import build_ledger, ledger_frame
+
+CLOSE = np.array([100.0, 102.0, 98.0, 105.0, 103.0, 110.0])
+
+
+def _df(with_range=True):
+    index = pd.date_range("2024-01-01", periods=len(CLOSE), freq="D")
+    data = {"Close": CLOSE}
+    if with_range:
+        data.update(High=CLOSE + 2.0, Low=CLOSE - 3.0)
+    return pd.DataFrame(data, index=index)
+
+
+def _batch():
+    """
+    s0: вход 0 -> выход 3, вход 4 (открыта); s1: вход 1 -> выход 2;
+    s2: без сделок; s3: вход на последнем баре.
+    """
+    events = [(0, 0, 1), (0, 3, -1), (0, 4, 1), (1, 1, 1), (1, 2, -1), (3, 5, 1)]
+    strategy, bar, side = (np.array(col) for col in zip(*events))
+    return {
+        "ids": ["s0", "s1", "s2", "s3"],
+        "events": {"strategy": strategy, "bar": bar, "side": side.astype(np.int8)},
+    }
+
+
+def test_ledger_pairs_and_pnl():
+    ledger = build_ledger(_batch(), _df())
+    assert ledger["strategy"].tolist() == [0, 0, 1, 3]
+    assert ledger["entry_bar"].tolist() == [0, 4, 1, 5]
+    assert ledger["exit_bar"].tolist() == [3, 5, 2, 5]
+    assert ledger["holding_bars"].tolist() == [3, 1, 1, 0]
+    assert ledger["is_open"].tolist() == [False, True, False, True]
+    assert ledger["pnl"] == pytest.approx([0.05, 110 / 103 - 1, 98 / 102 - 1, 0.0])
+
+
+def test_ledger_mae_mfe():
+    ledger = build_ledger(_batch(), _df())
+    # окно удержания — с бара после входа по бар выхода включительно: Low/High против цены входа
+    assert ledger["mae"] == pytest.approx([95 / 100 - 1, 0.0, 95 / 102 - 1, 0.0])
+    assert ledger["mfe"] == pytest.approx([107 / 100 - 1, 112 / 103 - 1, 0.0, 0.0])
+    assert np.all(ledger["mae"] <= 0) and np.all(ledger["mfe"] >= 0)
+
+
+def test_ledger_mae_mfe_without_high_low():
+    ledger = build_ledger(_batch(), _df(with_range=False))
+    assert ledger["mae"] == pytest.approx([98 / 100 - 1, 0.0, 98 / 102 - 1, 0.0])
+    assert ledger["mfe"] == pytest.approx([105 / 100 - 1, 110 / 103 - 1, 0.0, 0.0])
+
+
+def test_ledger_empty():
+    batch = {"ids": ["s0"], "events": {k: np.array([], dtype=np.int64) for k in ("strategy", "bar", "side")}}
+    ledger = build_ledger(batch, _df())
+    assert len(ledger) == 0
+    assert len(ledger_frame(ledger, batch["ids"], _df().index)) == 0
+
+
+def test_ledger_frame():
+    df = _df()
+    frame = ledger_frame(build_ledger(_batch(), df), _batch()["ids"], df.index)
+    assert frame["strategy"].tolist() == ["s0", "s0", "s1", "s3"]
+    assert frame["entry_time"].iloc[1] == df.index[4]
+    assert frame["exit_time"].iloc[0] == df.index[3]